@@ -3,67 +3,128 @@ GenAI risk explanation generation using Groq
 """
 
 import os
-from groq import Groq
+from typing import Iterator, Optional
+from app.ai.llm_gateway import complete, stream, is_llm_available
 from app.ai.prompts import get_stock_risk_prompt, get_portfolio_risk_prompt
+from app.ai.explanation_cache import (
+    build_explanation_cache_key,
+    get_cached_explanation,
+    set_cached_explanation,
+    schedule_refresh
+)
 from app.utils.logger import get_logger
+from app.utils.metrics import time_stage
 
 logger = get_logger()
 
-def get_groq_client():
-    """Get Groq client instance"""
-    api_key = os.getenv("GROQ_API_KEY")
-    if not api_key:
+SYSTEM_PROMPT = "You are a professional financial risk analyst. Provide clear, concise risk explanations without speculation. Be honest about uncertainties and limitations."
+
+def build_explanation_messages(prompt: str) -> list:
+    """Wrap a prompt in the analyst chat messages"""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+def llm_enabled() -> bool:
+    """Whether explanations can be generated by the LLM gateway"""
+    if not is_llm_available():
         logger.warning("GROQ_API_KEY not set, using template-based explanations")
-        return None
-    return Groq(api_key=api_key)
+        return False
+    return True
 
-def generate_with_groq(prompt: str) -> str:
+def get_explanation_model_name() -> str:
+    """Resolve the Groq model used for risk explanations"""
+    model_name = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+    if "llama-3.1-70b-versatile" in model_name:
+        model_name = "llama-3.3-70b-versatile"
+    return model_name
+
+def call_llm(prompt: str) -> Optional[str]:
     """
-    Generate explanation using Groq API
+    Generate explanation through the LLM gateway without the template fallback
     
     Args:
         prompt: Formatted prompt string
         
     Returns:
-        Generated explanation text
+        Generated explanation text, or None if the LLM is unavailable or failed
     """
+    if not llm_enabled():
+        return None
+    
     try:
-        client = get_groq_client()
-        
-        if client is None:
-            # Fallback to template if no API key
-            return generate_template_explanation(prompt)
+        logger.info("Generating explanation via LLM gateway")
         
-        logger.info("Generating explanation with Groq")
-        
-        model_name = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
-        if "llama-3.1-70b-versatile" in model_name:
-            model_name = "llama-3.3-70b-versatile"
-            
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a professional financial risk analyst. Provide clear, concise risk explanations without speculation. Be honest about uncertainties and limitations."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
+        explanation = complete(
+            build_explanation_messages(prompt),
+            model=get_explanation_model_name(),
             temperature=float(os.getenv("GROQ_TEMPERATURE", "0.3")),
             max_tokens=1000,
         )
         
-        explanation = response.choices[0].message.content
-        logger.info("Successfully generated explanation with Groq")
+        logger.info("Successfully generated explanation")
         
         return explanation
     
     except Exception as e:
         logger.error(f"Error generating with Groq: {e}")
+        return None
+
+def stream_llm(prompt: str) -> Iterator[str]:
+    """
+    Stream explanation tokens through the LLM gateway without the template fallback
+    
+    Yields nothing if the LLM is unavailable or fails before the first token;
+    errors after the first token are re-raised since the output is partial.
+    
+    Args:
+        prompt: Formatted prompt string
+        
+    Yields:
+        Explanation text chunks as they arrive
+    """
+    if not llm_enabled():
+        return
+    
+    emitted = False
+    
+    try:
+        logger.info("Streaming explanation via LLM gateway")
+        
+        for token in stream(
+            build_explanation_messages(prompt),
+            model=get_explanation_model_name(),
+            temperature=float(os.getenv("GROQ_TEMPERATURE", "0.3")),
+            max_tokens=1000,
+        ):
+            emitted = True
+            yield token
+        
+        logger.info("Finished streaming explanation")
+    
+    except Exception as e:
+        logger.error(f"Error streaming with Groq: {e}")
+        if emitted:
+            raise
+
+def generate_with_groq(prompt: str) -> str:
+    """
+    Generate explanation using Groq API
+    
+    Args:
+        prompt: Formatted prompt string
+        
+    Returns:
+        Generated explanation text
+    """
+    explanation = call_llm(prompt)
+    
+    if explanation is None:
+        # Fallback to template if no API key or the call failed
         return generate_template_explanation(prompt)
+    
+    return explanation
 
 def generate_template_explanation(prompt: str) -> str:
     """
@@ -114,14 +175,88 @@ def generate_risk_explanation(risk_metrics: dict, news_context: list, symbol: st
     """
     logger.info(f"Generating risk explanation for {symbol or 'portfolio'}")
     
-    # Generate appropriate prompt
-    if symbol:
-        prompt = get_stock_risk_prompt(symbol, risk_metrics, news_context)
-    else:
-        # For portfolio (news_context contains holdings in this case)
-        prompt = get_portfolio_risk_prompt(news_context if isinstance(news_context, list) and len(news_context) > 0 and 'symbol' in news_context[0] else [], risk_metrics)
+    with time_stage("explanation"):
+        # Generate appropriate prompt
+        if symbol:
+            prompt = get_stock_risk_prompt(symbol, risk_metrics, news_context)
+            return generate_cached_explanation(prompt, symbol, risk_metrics, news_context)
+        else:
+            # For portfolio (news_context contains holdings in this case)
+            prompt = get_portfolio_risk_prompt(news_context if isinstance(news_context, list) and len(news_context) > 0 and 'symbol' in news_context[0] else [], risk_metrics)
+        
+        # Generate with Groq
+        explanation = generate_with_groq(prompt)
     
-    # Generate with Groq
-    explanation = generate_with_groq(prompt)
+    return explanation
+
+def generate_cached_explanation(prompt: str, symbol: str, risk_metrics: dict, news_context: list) -> str:
+    """
+    Serve a stock explanation from cache, generating it with Groq on a miss
+    
+    Stale entries are returned immediately while a background refresh runs.
+    Template fallbacks are never cached so a transient Groq failure does not
+    stick for the whole TTL.
     
+    Args:
+        prompt: Formatted stock prompt
+        symbol: Stock ticker symbol
+        risk_metrics: Dictionary with all risk metrics
+        news_context: List of verified news items
+        
+    Returns:
+        Generated explanation text
+    """
+    key = build_explanation_cache_key(symbol, risk_metrics, news_context, get_explanation_model_name())
+    cached = get_cached_explanation(key)
+    
+    if cached is not None:
+        explanation, is_stale = cached
+        if is_stale:
+            logger.info(f"Serving stale explanation for {symbol}, refreshing in background")
+            schedule_refresh(key, lambda: call_llm(prompt))
+        else:
+            logger.info(f"Explanation cache hit for {symbol}")
+        return explanation
+    
+    explanation = call_llm(prompt)
+    
+    if explanation is None:
+        return generate_template_explanation(prompt)
+    
+    set_cached_explanation(key, explanation)
     return explanation
+
+def stream_risk_explanation(risk_metrics: dict, news_context: list, symbol: str) -> Iterator[str]:
+    """
+    Stream a stock risk explanation, serving cached text in a single chunk
+    
+    Args:
+        risk_metrics: Dictionary with all risk metrics
+        news_context: List of verified news items
+        symbol: Stock ticker symbol
+        
+    Yields:
+        Explanation text chunks
+    """
+    prompt = get_stock_risk_prompt(symbol, risk_metrics, news_context)
+    key = build_explanation_cache_key(symbol, risk_metrics, news_context, get_explanation_model_name())
+    cached = get_cached_explanation(key)
+    
+    if cached is not None:
+        explanation, is_stale = cached
+        if is_stale:
+            schedule_refresh(key, lambda: call_llm(prompt))
+        yield explanation
+        return
+    
+    chunks = []
+    for token in stream_llm(prompt):
+        chunks.append(token)
+        yield token
+    
+    if not chunks:
+        # Template fallbacks are never cached
+        yield generate_template_explanation(prompt)
+        return
+    
+    set_cached_explanation(key, "".join(chunks))
@@ -0,0 +1,151 @@
+"""
+In-memory cache for AI risk explanations with stale-while-revalidate
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple
+
+from app.ai.prompts import PROMPT_VERSION, format_stock_metrics
+from app.utils.config import get_explanation_cache_config
+from app.utils.logger import get_logger
+from app.utils.metrics import record_cache_lookup
+
+logger = get_logger()
+
+# key -> {"value": str, "created_at": float}, kept in LRU order
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+# Keys with a background refresh in flight
+_refreshing = set()
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="explanation-refresh")
+
+_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_failures": 0}
+
+def build_explanation_cache_key(symbol: str, risk_metrics: dict, news_context: list, model_name: str) -> str:
+    """
+    Build a cache key that only changes when the rendered prompt would
+
+    Args:
+        symbol: Stock ticker symbol
+        risk_metrics: Dictionary with all risk metrics
+        news_context: List of verified news items
+        model_name: LLM model generating the explanation
+
+    Returns:
+        Cache key string
+    """
+    metrics = format_stock_metrics(risk_metrics)
+    metrics_part = "|".join(f"{name}={value}" for name, value in sorted(metrics.items()))
+    metrics_part += f"|partial={bool(risk_metrics.get('partial_data'))}"
+
+    titles = "\n".join(news.get("title", "") for news in (news_context or [])[:3])
+    news_hash = hashlib.sha1(titles.encode("utf-8")).hexdigest()[:16]
+
+    return f"{symbol}:{model_name}:v{PROMPT_VERSION}:{metrics_part}:{news_hash}"
+
+def get_cached_explanation(key: str) -> Optional[Tuple[str, bool]]:
+    """
+    Look up a cached explanation
+
+    Args:
+        key: Key from build_explanation_cache_key
+
+    Returns:
+        (explanation, is_stale) or None when missing or too old to serve
+    """
+    config = get_explanation_cache_config()
+    if not config["enabled"]:
+        return None
+
+    now = time.time()
+
+    with _lock:
+        entry = _entries.get(key)
+
+        if entry is not None:
+            age = now - entry["created_at"]
+
+            if age <= config["ttl"]:
+                _entries.move_to_end(key)
+                _stats["hits"] += 1
+                record_cache_lookup("explanations", True)
+                return entry["value"], False
+
+            if config["serve_stale"] and age <= config["ttl"] + config["stale_ttl"]:
+                _entries.move_to_end(key)
+                _stats["stale_hits"] += 1
+                record_cache_lookup("explanations", True)
+                return entry["value"], True
+
+            del _entries[key]
+
+        _stats["misses"] += 1
+        record_cache_lookup("explanations", False)
+        return None
+
+def set_cached_explanation(key: str, explanation: str):
+    """Store an explanation, evicting the least recently used entries"""
+    config = get_explanation_cache_config()
+    if not config["enabled"]:
+        return
+
+    with _lock:
+        _entries[key] = {"value": explanation, "created_at": time.time()}
+        _entries.move_to_end(key)
+
+        while len(_entries) > config["max_entries"]:
+            _entries.popitem(last=False)
+
+def schedule_refresh(key: str, generate: Callable[[], Optional[str]]):
+    """
+    Regenerate a stale explanation in the background
+
+    Args:
+        key: Cache key to refresh
+        generate: Callable returning the new explanation, or None on failure
+    """
+    with _lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def _refresh():
+        refreshed = False
+        try:
+            explanation = generate()
+            if explanation:
+                set_cached_explanation(key, explanation)
+                refreshed = True
+        except Exception as e:
+            logger.error(f"Background explanation refresh failed: {e}")
+        finally:
+            with _lock:
+                _stats["refreshes" if refreshed else "refresh_failures"] += 1
+                _refreshing.discard(key)
+
+    _refresh_executor.submit(_refresh)
+
+def clear_explanation_cache():
+    """Clear all cached explanations"""
+    with _lock:
+        _entries.clear()
+
+def get_explanation_cache_stats() -> dict:
+    """Get hit-rate statistics for the explanation cache"""
+    with _lock:
+        stats = dict(_stats)
+        entries = len(_entries)
+    lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+
+    return {
+        **stats,
+        "lookups": lookups,
+        "hit_rate": (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0,
+        "entries": entries,
+        "enabled": get_explanation_cache_config()["enabled"]
+    }
@@ -0,0 +1,352 @@
+"""
+Shared LLM gateway: one pooled client, concurrency limits, deadlines,
+429 retries, usage accounting and pluggable backends (Groq or local stub)
+"""
+
+import random
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+from app.utils.config import get_llm_config
+from app.utils.logger import get_logger
+from app.utils.metrics import inc_counter, observe_histogram
+
+logger = get_logger()
+
+class LLMError(Exception):
+    """Raised when an LLM call fails after retries or misses its deadline"""
+
+# Lazily created shared state
+_groq_client = None
+_semaphore = None
+_init_lock = threading.Lock()
+
+# Per-model accounting since process start
+_stats = {}
+_stats_lock = threading.Lock()
+
+# name -> {"complete": fn(messages, model, temperature, max_tokens, timeout) -> (text, usage),
+#          "stream": fn(messages, model, temperature, max_tokens, timeout) -> Iterator[(token, usage)]}
+_backends = {}
+
+def register_backend(name: str, complete: Callable, stream: Callable):
+    """
+    Register an LLM backend
+
+    Args:
+        name: Backend name selected with LLM_BACKEND
+        complete: Callable returning (text, usage dict or None)
+        stream: Callable yielding (token, usage dict or None) pairs
+    """
+    _backends[name] = {"complete": complete, "stream": stream}
+
+def is_llm_available() -> bool:
+    """Whether the configured backend can serve requests"""
+    config = get_llm_config()
+    if config["backend"] == "groq":
+        return bool(config["api_key"])
+    return config["backend"] in _backends
+
+def _get_backend() -> dict:
+    backend = get_llm_config()["backend"]
+    if backend not in _backends:
+        raise LLMError(f"Unknown LLM backend: {backend}")
+    return _backends[backend]
+
+def _get_semaphore():
+    global _semaphore
+    if _semaphore is None:
+        with _init_lock:
+            if _semaphore is None:
+                _semaphore = threading.BoundedSemaphore(get_llm_config()["max_concurrency"])
+    return _semaphore
+
+def _record(model: str, latency: float, usage: Optional[dict] = None, error: bool = False, retries: int = 0):
+    """Accumulate call, token and latency counters for a model"""
+    with _stats_lock:
+        entry = _stats.setdefault(model, {
+            "calls": 0,
+            "errors": 0,
+            "retries": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_latency": 0.0,
+            "max_latency": 0.0
+        })
+        entry["calls"] += 1
+        entry["errors"] += int(error)
+        entry["retries"] += retries
+        entry["total_latency"] += latency
+        entry["max_latency"] = max(entry["max_latency"], latency)
+        if usage:
+            entry["prompt_tokens"] += usage.get("prompt_tokens", 0) or 0
+            entry["completion_tokens"] += usage.get("completion_tokens", 0) or 0
+
+    inc_counter("llm_requests_total", {"model": model, "outcome": "error" if error else "success"})
+    observe_histogram("llm_request_duration_seconds", latency, {"model": model})
+    if usage:
+        inc_counter("llm_tokens_total", {"model": model, "kind": "prompt"}, usage.get("prompt_tokens", 0) or 0)
+        inc_counter("llm_tokens_total", {"model": model, "kind": "completion"}, usage.get("completion_tokens", 0) or 0)
+
+def get_llm_stats() -> dict:
+    """Get token and latency accounting per model"""
+    with _stats_lock:
+        models = {
+            model: {
+                **entry,
+                "avg_latency": entry["total_latency"] / entry["calls"] if entry["calls"] else 0.0
+            }
+            for model, entry in _stats.items()
+        }
+
+    config = get_llm_config()
+    return {
+        "backend": config["backend"],
+        "max_concurrency": config["max_concurrency"],
+        "models": models
+    }
+
+def _is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+def _retry_delay(error: Exception, attempt: int, backoff_base: float) -> float:
+    """Honour Retry-After when present, else exponential backoff with jitter"""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after is not None:
+            return float(retry_after)
+    except ValueError:
+        pass
+    return backoff_base * (2 ** attempt) * (1 + random.random() * 0.25)
+
+def _remaining(deadline: float) -> float:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise LLMError("LLM call deadline exceeded")
+    return remaining
+
+def _acquire_slot(deadline: float):
+    if not _get_semaphore().acquire(timeout=_remaining(deadline)):
+        raise LLMError("Timed out waiting for an LLM concurrency slot")
+
+def complete(messages: list, model: str, temperature: float = 0.3, max_tokens: int = 1000,
+             timeout: float = None) -> str:
+    """
+    Run a chat completion through the configured backend
+
+    Args:
+        messages: Chat messages ({"role", "content"} dicts)
+        model: Model name
+        temperature: Sampling temperature
+        max_tokens: Completion token limit
+        timeout: Overall deadline in seconds, including queueing and retries
+
+    Returns:
+        Completion text
+
+    Raises:
+        LLMError: If the call fails, is rate limited past the retry budget
+            or misses its deadline
+    """
+    config = get_llm_config()
+    backend = _get_backend()
+    deadline = time.monotonic() + (timeout or config["timeout"])
+    start = time.monotonic()
+    attempt = 0
+
+    _acquire_slot(deadline)
+    try:
+        while True:
+            try:
+                text, usage = backend["complete"](messages, model, temperature, max_tokens, _remaining(deadline))
+                _record(model, time.monotonic() - start, usage, retries=attempt)
+                return text
+            except LLMError:
+                raise
+            except Exception as e:
+                if not _is_rate_limited(e) or attempt >= config["max_retries"]:
+                    raise LLMError(str(e)) from e
+
+                delay = _retry_delay(e, attempt, config["backoff_base"])
+                if delay >= _remaining(deadline):
+                    raise LLMError("Rate limited and retry would exceed deadline") from e
+
+                logger.warning(f"LLM rate limited (attempt {attempt + 1}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
+    except LLMError:
+        _record(model, time.monotonic() - start, error=True, retries=attempt)
+        raise
+    finally:
+        _get_semaphore().release()
+
+def stream(messages: list, model: str, temperature: float = 0.3, max_tokens: int = 1000,
+           timeout: float = None) -> Iterator[str]:
+    """
+    Stream a chat completion through the configured backend
+
+    Rate limits are retried only before the first token is received. The
+    concurrency slot is held until the stream is exhausted or closed.
+
+    Args:
+        messages: Chat messages ({"role", "content"} dicts)
+        model: Model name
+        temperature: Sampling temperature
+        max_tokens: Completion token limit
+        timeout: Overall deadline in seconds
+
+    Yields:
+        Completion text chunks
+
+    Raises:
+        LLMError: On failure or deadline expiry
+    """
+    config = get_llm_config()
+    backend = _get_backend()
+    deadline = time.monotonic() + (timeout or config["timeout"])
+    start = time.monotonic()
+    attempt = 0
+    emitted = False
+    usage = None
+
+    _acquire_slot(deadline)
+    try:
+        while True:
+            try:
+                for token, chunk_usage in backend["stream"](messages, model, temperature, max_tokens, _remaining(deadline)):
+                    usage = chunk_usage or usage
+                    if token:
+                        emitted = True
+                        yield token
+                _record(model, time.monotonic() - start, usage, retries=attempt)
+                return
+            except LLMError:
+                raise
+            except Exception as e:
+                if emitted or not _is_rate_limited(e) or attempt >= config["max_retries"]:
+                    raise LLMError(str(e)) from e
+
+                delay = _retry_delay(e, attempt, config["backoff_base"])
+                if delay >= _remaining(deadline):
+                    raise LLMError("Rate limited and retry would exceed deadline") from e
+
+                logger.warning(f"LLM rate limited (attempt {attempt + 1}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
+    except LLMError:
+        _record(model, time.monotonic() - start, error=True, retries=attempt)
+        raise
+    finally:
+        _get_semaphore().release()
+
+# Groq backend
+
+def _get_groq_client():
+    """Create the process-wide Groq client with a pooled HTTP connection"""
+    global _groq_client
+
+    if _groq_client is None:
+        with _init_lock:
+            if _groq_client is None:
+                import httpx
+                from groq import Groq
+
+                config = get_llm_config()
+                if not config["api_key"]:
+                    raise LLMError("GROQ_API_KEY not set")
+
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=config["max_connections"],
+                        max_keepalive_connections=config["max_connections"]
+                    ),
+                    timeout=config["timeout"]
+                )
+                # Retries are handled here so the deadline covers them
+                _groq_client = Groq(api_key=config["api_key"], http_client=http_client, max_retries=0)
+
+    return _groq_client
+
+def _usage_dict(usage) -> Optional[dict]:
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0),
+        "completion_tokens": getattr(usage, "completion_tokens", 0)
+    }
+
+def _groq_complete(messages, model, temperature, max_tokens, timeout):
+    response = _get_groq_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        timeout=timeout,
+    )
+    return response.choices[0].message.content, _usage_dict(response.usage)
+
+def _groq_stream(messages, model, temperature, max_tokens, timeout):
+    response = _get_groq_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        timeout=timeout,
+        stream=True,
+    )
+    for chunk in response:
+        token = chunk.choices[0].delta.content if chunk.choices else None
+        x_groq = getattr(chunk, "x_groq", None)
+        yield token, _usage_dict(getattr(x_groq, "usage", None))
+
+# Local stub backend for load tests and offline runs
+
+STUB_VERDICT = '{"credible": true, "sentiment": "neutral", "fake_indicator": false}'
+
+STUB_EXPLANATION = """• ANALYSIS OF RISK SCORE: This is a canned explanation from the local stub LLM backend.
+• MARKET RISK ANALYSIS: Market metrics are reported in the risk breakdown.
+• FINANCIAL RISK ANALYSIS: Financial metrics are reported in the risk breakdown.
+• KEY RISK FACTORS: Not assessed by the stub backend.
+• NEWS IMPACT: Not assessed by the stub backend.
+• LIMITATIONS: Generated offline without a language model."""
+
+def _stub_response(messages) -> str:
+    prompt = messages[-1]["content"] if messages else ""
+    return STUB_VERDICT if "Respond in JSON format" in prompt else STUB_EXPLANATION
+
+def _stub_usage(messages, text) -> dict:
+    # Rough 4-characters-per-token estimate
+    prompt_chars = sum(len(m.get("content", "")) for m in messages)
+    return {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(text) // 4}
+
+def _stub_fault():
+    """Simulate an upstream failure at the configured rate"""
+    error_rate = get_llm_config()["stub_error_rate"]
+    if error_rate and random.random() < error_rate:
+        raise RuntimeError("Injected stub LLM failure")
+
+def _stub_complete(messages, model, temperature, max_tokens, timeout):
+    latency = get_llm_config()["stub_latency_ms"] / 1000.0
+    if latency:
+        time.sleep(min(latency, timeout))
+    _stub_fault()
+    text = _stub_response(messages)
+    return text, _stub_usage(messages, text)
+
+def _stub_stream(messages, model, temperature, max_tokens, timeout):
+    _stub_fault()
+    text = _stub_response(messages)
+    words = text.split(" ")
+    delay = get_llm_config()["stub_latency_ms"] / 1000.0 / max(len(words), 1)
+
+    for i, word in enumerate(words):
+        if delay:
+            time.sleep(delay)
+        yield (word if i == 0 else " " + word), None
+
+    yield None, _stub_usage(messages, text)
+
+register_backend("groq", _groq_complete, _groq_stream)
+register_backend("stub", _stub_complete, _stub_stream)
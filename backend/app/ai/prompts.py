@@ -2,6 +2,32 @@
 Prompt templates for GenAI risk explanation
 """
 
+# Bump whenever prompt wording changes so cached explanations are invalidated
+PROMPT_VERSION = "1"
+
+def format_stock_metrics(risk_metrics: dict) -> dict:
+    """
+    Render stock risk metrics at prompt display precision
+    
+    Args:
+        risk_metrics: Dictionary with all risk metrics
+        
+    Returns:
+        Dictionary of formatted metric strings
+    """
+    market_risk = risk_metrics.get("market_risk", {})
+    financial_risk = risk_metrics.get("financial_risk", {})
+    
+    return {
+        "overall_score": f"{risk_metrics.get('overall_score', 5.0):.1f}",
+        "beta": f"{market_risk.get('beta', 1.0):.2f}",
+        "volatility": f"{market_risk.get('volatility', 0.2):.2%}",
+        "correlation": f"{market_risk.get('correlation', 0.5):.2f}",
+        "debt_to_equity": f"{financial_risk.get('debt_to_equity', 1.0):.2f}",
+        "interest_coverage": f"{financial_risk.get('interest_coverage', 5.0):.2f}",
+        "earnings_variability": f"{financial_risk.get('earnings_variability', 0.2):.2f}"
+    }
+
 def get_stock_risk_prompt(symbol: str, risk_metrics: dict, news_context: list) -> str:
     """
     Generate prompt for stock risk explanation
@@ -14,9 +40,7 @@ def get_stock_risk_prompt(symbol: str, risk_metrics: dict, news_context: list) -
     Returns:
         Formatted prompt string
     """
-    market_risk = risk_metrics.get("market_risk", {})
-    financial_risk = risk_metrics.get("financial_risk", {})
-    overall_score = risk_metrics.get("overall_score", 5.0)
+    metrics = format_stock_metrics(risk_metrics)
     
     news_summary = "\n".join([
         f"- {news.get('title', '')} (Confidence: {news.get('confidence', 0):.0%})"
@@ -29,18 +53,18 @@ def get_stock_risk_prompt(symbol: str, risk_metrics: dict, news_context: list) -
 
     prompt = f"""You are a financial risk analyst. Explain the risk profile for {symbol} in a clear, professional manner.
 
-**Risk Score:** {overall_score:.1f}/10
+**Risk Score:** {metrics['overall_score']}/10
 {partial_data_note}
 
 **Market Risk Metrics:**
-- Beta: {market_risk.get('beta', 1.0):.2f}
-- Volatility: {market_risk.get('volatility', 0.2):.2%}
-- Market Correlation: {market_risk.get('correlation', 0.5):.2f}
+- Beta: {metrics['beta']}
+- Volatility: {metrics['volatility']}
+- Market Correlation: {metrics['correlation']}
 
 **Financial Risk Metrics:**
-- Debt-to-Equity: {financial_risk.get('debt_to_equity', 1.0):.2f}
-- Interest Coverage: {financial_risk.get('interest_coverage', 5.0):.2f}
-- Earnings Variability: {financial_risk.get('earnings_variability', 0.2):.2f}
+- Debt-to-Equity: {metrics['debt_to_equity']}
+- Interest Coverage: {metrics['interest_coverage']}
+- Earnings Variability: {metrics['earnings_variability']}
 
 Provide a structured explanation using the EXACT format below. You MUST use the dot character '•' for list items.
 
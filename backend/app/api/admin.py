@@ -0,0 +1,36 @@
+"""
+Admin endpoints for request profiles
+"""
+
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from app.utils.config import get_profiling_config
+from app.utils.profiler import get_profile_path, list_profiles
+
+router = APIRouter()
+
+def require_admin(token: str):
+    """Reject the request unless it carries the configured admin token"""
+    admin_token = get_profiling_config()["admin_token"]
+    if not admin_token or not hmac.compare_digest(token or "", admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@router.get("/admin/profiles")
+async def get_profiles(x_admin_token: str = Header(default="")):
+    """List captured request profiles, newest first"""
+    require_admin(x_admin_token)
+    return {"profiles": list_profiles(get_profiling_config()["directory"])}
+
+@router.get("/admin/profiles/{request_id}")
+async def get_profile(request_id: str, x_admin_token: str = Header(default="")):
+    """Download the speedscope profile captured for a request"""
+    require_admin(x_admin_token)
+
+    path = get_profile_path(get_profiling_config()["directory"], request_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"No profile for request {request_id}")
+
+    return FileResponse(path, media_type="application/json", filename=f"{request_id}.speedscope.json")
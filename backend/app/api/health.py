@@ -3,14 +3,62 @@ Health check API endpoint
 """
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.news_rag.verdict_cache import get_verdict_cache_stats
+from app.ai.explanation_cache import get_explanation_cache_stats
+from app.ai.llm_gateway import get_llm_stats, is_llm_available
+from app.data_sources.providers import get_circuit_states, get_provider_chain
+from app.data_sources.warmup import get_warmup_status
+from app.utils.cache import get_cache_size
 
 router = APIRouter()
 
 @router.get("/health")
-async def health_check():
-    """System health check endpoint"""
-    return {
+async def health_check(ready: bool = False):
+    """
+    System health check endpoint
+    
+    With ready=true also reports cache sizes, upstream circuit breakers and
+    LLM availability, answering 503 when no price provider can be reached.
+    """
+    body = {
         "status": "healthy",
         "service": "AI Stock Risk Analysis Platform",
         "version": "1.0.0"
     }
+    
+    if not ready:
+        return body
+    
+    circuits = get_circuit_states()
+    price_chain = get_provider_chain("prices")
+    prices_available = any(circuits[name]["state"] != "open" for name in price_chain)
+    
+    body.update({
+        "status": "healthy" if prices_available else "degraded",
+        "checks": {
+            "price_providers": {name: circuits[name] for name in price_chain},
+            "circuits": circuits,
+            "llm_available": is_llm_available(),
+            "data_cache_entries": get_cache_size(),
+            "verdict_cache_entries": get_verdict_cache_stats()["entries"],
+            "explanation_cache_entries": get_explanation_cache_stats()["entries"],
+            "warmup": get_warmup_status()
+        }
+    })
+    
+    return JSONResponse(body, status_code=200 if prices_available else 503)
+
+@router.get("/health/cache")
+async def cache_stats():
+    """Hit-rate statistics for the LLM result caches"""
+    return {
+        "news_verdicts": get_verdict_cache_stats(),
+        "explanations": get_explanation_cache_stats()
+    }
+
+@router.get("/health/llm")
+async def llm_stats():
+    """Token and latency accounting for the shared LLM gateway"""
+    return get_llm_stats()
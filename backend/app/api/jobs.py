@@ -0,0 +1,121 @@
+"""
+Background job API endpoints
+"""
+
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+from pydantic import ValidationError
+
+from app.jobs.store import cancel_job, get_job, get_job_result, get_queue_stats, submit_job
+from app.jobs.worker import notify_job_submitted
+from app.models.request import JOB_PARAM_MODELS, JobRequest
+from app.models.response import JobStatusResponse
+from app.utils.config import get_job_config
+from app.utils.logger import get_logger
+
+router = APIRouter()
+logger = get_logger()
+
+def _timestamp(value):
+    return datetime.fromtimestamp(value).isoformat() if value is not None else None
+
+def _job_response(job: dict) -> dict:
+    return {
+        "job_id": job["id"],
+        "type": job["type"],
+        "status": job["status"],
+        "priority": job["priority"],
+        "progress": job["progress"],
+        "message": job["message"],
+        "error": job["error"],
+        "cancel_requested": job["cancel_requested"],
+        "created_at": _timestamp(job["created_at"]),
+        "started_at": _timestamp(job["started_at"]),
+        "finished_at": _timestamp(job["finished_at"]),
+        "expires_at": _timestamp(job["expires_at"])
+    }
+
+def _existing_job(job_id: str) -> dict:
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or its result has expired")
+    return job
+
+@router.post("/jobs", response_model=JobStatusResponse, status_code=202)
+def create_job(request: JobRequest):
+    """
+    Submit a portfolio, screen, stress or simulation job
+
+    The job runs in the worker process pool; poll GET /api/jobs/{job_id} for
+    progress and fetch GET /api/jobs/{job_id}/result when it has succeeded.
+
+    Args:
+        request: JobRequest with type, params and priority
+
+    Returns:
+        Job status (202), or 429 when the queue is full
+    """
+    config = get_job_config()
+    if not config["enabled"]:
+        raise HTTPException(status_code=503, detail="Background jobs are disabled")
+
+    try:
+        params = JOB_PARAM_MODELS[request.type].model_validate(request.params)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    symbols = getattr(params, "holdings", None) or getattr(params, "symbols", None) or []
+    if len(symbols) > config["max_symbols"]:
+        raise HTTPException(status_code=400, detail=f"At most {config['max_symbols']} symbols per job")
+
+    job = submit_job(request.type, params.model_dump(), request.priority)
+    if job is None:
+        raise HTTPException(status_code=429, detail=f"Job queue is full ({config['queue_max']} jobs waiting)")
+    notify_job_submitted()
+    return _job_response(job)
+
+@router.get("/jobs/stats")
+def get_job_stats():
+    """Job counts by status"""
+    return get_queue_stats()
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def get_job_status(job_id: str):
+    """Status and progress of a job"""
+    return _job_response(_existing_job(job_id))
+
+@router.get("/jobs/{job_id}/result")
+def get_job_output(job_id: str):
+    """
+    Result of a succeeded job (kept for JOB_RESULT_TTL seconds)
+
+    Returns:
+        The stored JSON result; 409 while the job is queued or running, or
+        when it failed or was cancelled
+    """
+    job = _existing_job(job_id)
+    if job["status"] != "succeeded":
+        detail = f"Job is {job['status']}" + (f": {job['error']}" if job["error"] else "")
+        raise HTTPException(status_code=409, detail=detail)
+
+    result = get_job_result(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job not found or its result has expired")
+    return Response(content=result, media_type="application/json")
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobStatusResponse)
+def cancel_job_request(job_id: str):
+    """
+    Cancel a job
+
+    Queued jobs are cancelled at once; running jobs stop at their next
+    progress report. Finished jobs are returned unchanged.
+    """
+    _existing_job(job_id)
+    job = cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or its result has expired")
+    logger.info(f"Cancel requested for job {job_id}")
+    return _job_response(job)
@@ -2,30 +2,66 @@
 Portfolio analysis API endpoint
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import Response
 from datetime import datetime
+from typing import Optional
 
-from app.models.request import PortfolioAnalysisRequest
-from app.models.response import PortfolioAnalysisResponse
+from app.models.request import (
+    PortfolioAnalysisRequest, PortfolioOptimizationRequest, PortfolioSessionRequest, PortfolioSessionUpdate,
+    SessionOptimizationRequest
+)
+from app.models.response import PortfolioAnalysisResponse, PortfolioSessionResponse
 from app.risk_engine.portfolio_risk import calculate_portfolio_risk
 from app.risk_engine.aggregation import aggregate_stock_risk
+from app.risk_engine.factor_model import get_factor_model, get_symbol_factors
+from app.risk_engine.optimizer import optimize_symbols
+from app.risk_engine.portfolio_session import (
+    create_session, delete_session, get_session, session_covariance, session_explanation, session_metrics,
+    update_session
+)
 from app.ai.explanation import generate_risk_explanation
+from app.data_sources.warmup import record_symbol_request
 from app.utils.logger import get_logger
+from app.utils.metrics import time_stage
+from app.utils.serialization import MATRIX_MODES, MEDIA_TYPES, encode_matrix_response, negotiate_format
 
 router = APIRouter()
 logger = get_logger()
 
-@router.post("/analyze/portfolio", response_model=PortfolioAnalysisResponse)
-async def analyze_portfolio(request: PortfolioAnalysisRequest):
+@router.post(
+    "/analyze/portfolio",
+    response_model=PortfolioAnalysisResponse,
+    responses={200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}}
+)
+async def analyze_portfolio(
+    request: PortfolioAnalysisRequest,
+    matrix: str = Query("full", description="Correlation matrix encoding: full, triangle (float32 upper triangle) or summary (omitted)"),
+    format: Optional[str] = Query(None, description="json, msgpack or arrow (overrides the Accept header)"),
+    accept: Optional[str] = Header(None)
+):
     """
     Analyze risk for a portfolio with correlation and diversification metrics
     
+    The response format is negotiated from the Accept header (application/json,
+    application/msgpack, application/vnd.apache.arrow.stream). The correlation
+    matrix bypasses pydantic and is encoded straight from the numpy array.
+    
     Args:
         request: PortfolioAnalysisRequest with holdings
+        matrix: Correlation matrix encoding
+        format: Explicit response format
+        accept: Accept header
         
     Returns:
         PortfolioAnalysisResponse with risk metrics
     """
+    fmt = format.lower() if format else negotiate_format(accept)
+    if fmt not in MEDIA_TYPES:
+        raise HTTPException(status_code=406, detail=f"Supported formats: {', '.join(MEDIA_TYPES.values())}")
+    if matrix not in MATRIX_MODES:
+        raise HTTPException(status_code=400, detail=f"matrix must be one of: {', '.join(MATRIX_MODES)}")
+    
     try:
         logger.info(f"Portfolio analysis request with {len(request.holdings)} holdings")
         
@@ -36,13 +72,15 @@ async def analyze_portfolio(request: PortfolioAnalysisRequest):
         ]
         
         # Calculate portfolio-specific metrics
-        portfolio_metrics = calculate_portfolio_risk(holdings_list)
+        portfolio_metrics = calculate_portfolio_risk(holdings_list, matrix_as_array=True)
+        corr_matrix = portfolio_metrics.pop("correlation_matrix")
         
         # Calculate weighted risk score from individual stocks
         total_risk_score = 0.0
         individual_risks = {}
         
         for holding in request.holdings:
+            record_symbol_request(holding.symbol)
             stock_risk = aggregate_stock_risk(holding.symbol)
             individual_risks[holding.symbol] = stock_risk["overall_score"]
             total_risk_score += stock_risk["overall_score"] * holding.weight
@@ -61,18 +99,176 @@ async def analyze_portfolio(request: PortfolioAnalysisRequest):
             None
         )
         
-        response = PortfolioAnalysisResponse(
-            holdings=[{"symbol": h.symbol, "weight": h.weight} for h in request.holdings],
-            overall_risk_score=total_risk_score,
-            metrics=combined_metrics,
-            explanation=explanation,
-            timestamp=datetime.now().isoformat()
-        )
+        body = {
+            "holdings": holdings_list,
+            "overall_risk_score": total_risk_score,
+            "metrics": combined_metrics,
+            "explanation": explanation,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        with time_stage("serialization"):
+            content = encode_matrix_response(
+                body,
+                ("metrics", "portfolio_risk", "correlation_matrix"),
+                corr_matrix,
+                [h["symbol"] for h in holdings_list],
+                fmt,
+                matrix
+            )
         
         logger.info(f"Successfully analyzed portfolio")
         
-        return response
+        return Response(content=content, media_type=MEDIA_TYPES[fmt], headers={"Vary": "Accept"})
+    
+    except ImportError as e:
+        raise HTTPException(status_code=406, detail=str(e))
     
     except Exception as e:
         logger.error(f"Error analyzing portfolio: {e}")
         raise HTTPException(status_code=500, detail=f"Portfolio analysis failed: {str(e)}")
+
+@router.get("/factors/{symbol}")
+def get_factor_profile(symbol: str):
+    """
+    Factor exposures, R² and idiosyncratic volatility of a symbol from the fitted universe model
+    
+    Args:
+        symbol: Stock ticker symbol
+        
+    Returns:
+        Factor profile
+    """
+    model = get_factor_model()
+    if model is None:
+        raise HTTPException(status_code=503, detail="Factor model has not been fitted yet")
+    
+    profile = get_symbol_factors(symbol.upper(), model)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"{symbol.upper()} is not in the factor model universe")
+    return profile
+
+def _live_session(session_id: str) -> dict:
+    session = get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Portfolio session not found or expired")
+    return session
+
+@router.post("/portfolio/sessions", response_model=PortfolioSessionResponse, status_code=201)
+def create_portfolio_session(request: PortfolioSessionRequest):
+    """
+    Create a what-if portfolio session
+    
+    Every holding is analyzed once here; later edits reuse those results.
+    No explanation is generated (see the explanation endpoint).
+    
+    Args:
+        request: PortfolioSessionRequest with the initial holdings
+        
+    Returns:
+        Session id and portfolio metrics
+    """
+    try:
+        session = create_session([{"symbol": h.symbol, "weight": h.weight} for h in request.holdings])
+        return session_metrics(session)
+    except Exception as e:
+        logger.error(f"Error creating portfolio session: {e}")
+        raise HTTPException(status_code=500, detail=f"Portfolio session failed: {str(e)}")
+
+@router.get("/portfolio/sessions/{session_id}", response_model=PortfolioSessionResponse)
+def get_portfolio_session(session_id: str):
+    """Current metrics of a portfolio session"""
+    return session_metrics(_live_session(session_id))
+
+@router.patch("/portfolio/sessions/{session_id}", response_model=PortfolioSessionResponse)
+def update_portfolio_session(session_id: str, request: PortfolioSessionUpdate):
+    """
+    Re-weight, add or remove holdings in a portfolio session
+    
+    Re-weighting recomputes metrics from cached per-holding results and the
+    session's correlation matrix; only added holdings are analyzed.
+    
+    Args:
+        session_id: Session id
+        request: PortfolioSessionUpdate with the edits
+        
+    Returns:
+        Updated portfolio metrics
+    """
+    session = _live_session(session_id)
+    try:
+        update_session(
+            session,
+            weights=request.weights,
+            add=[{"symbol": h.symbol, "weight": h.weight} for h in request.add],
+            remove=request.remove
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return session_metrics(session)
+
+@router.post("/portfolio/sessions/{session_id}/explanation")
+def explain_portfolio_session(session_id: str):
+    """AI explanation of the session's current state (cached until the next edit)"""
+    session = _live_session(session_id)
+    explanation = session_explanation(session)
+    return {"session_id": session_id, "version": session["version"], "explanation": explanation}
+
+@router.post("/portfolio/sessions/{session_id}/optimize")
+def optimize_portfolio_session(session_id: str, request: SessionOptimizationRequest):
+    """
+    Optimal weights for a session's holdings
+    
+    Reuses the session's correlation matrix and cached volatilities, so no
+    market data is fetched.
+    
+    Args:
+        session_id: Session id
+        request: SessionOptimizationRequest with method, constraints and apply
+        
+    Returns:
+        Optimization result; with apply, the session is re-weighted and its
+        new version is returned
+    """
+    session = _live_session(session_id)
+    symbols, cov = session_covariance(session)
+    if len(symbols) < 2:
+        raise HTTPException(status_code=400, detail="At least two holdings are required to optimize")
+    try:
+        result = optimize_symbols(symbols, request.method, request.min_weight, request.max_weight,
+                                  request.sector_caps, cov=cov)
+        if request.apply:
+            update_session(session, weights=result["weights"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return dict(result, session_id=session_id, version=session["version"], applied=request.apply)
+
+@router.post("/optimize/portfolio")
+def optimize_portfolio(request: PortfolioOptimizationRequest):
+    """
+    Minimum-variance, risk-parity or maximum-diversification weights
+    
+    The covariance comes from the correlation store, so only symbols it has
+    not seen today are fetched.
+    
+    Args:
+        request: PortfolioOptimizationRequest with symbols, method and constraints
+        
+    Returns:
+        Weights, risk contributions, sector weights and portfolio statistics
+    """
+    try:
+        return optimize_symbols(request.symbols, request.method, request.min_weight, request.max_weight,
+                                request.sector_caps)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error optimizing portfolio: {e}")
+        raise HTTPException(status_code=500, detail=f"Portfolio optimization failed: {str(e)}")
+
+@router.delete("/portfolio/sessions/{session_id}", status_code=204)
+def delete_portfolio_session(session_id: str):
+    """End a portfolio session"""
+    if not delete_session(session_id):
+        raise HTTPException(status_code=404, detail="Portfolio session not found or expired")
+    return Response(status_code=204)
@@ -2,15 +2,21 @@
 Stock search API endpoints
 """
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import JSONResponse
 from typing import Optional
 
 from app.data_sources.stock_search import (
     search_stocks_yfinance,
     get_popular_indian_stocks,
     get_popular_us_stocks,
-    get_stock_info_api
+    get_stock_info_api,
+    peek_stock_info_api
 )
+from app.data_sources.market_data import get_quotes
+from app.data_sources.symbol_index import lookup_symbol
+from app.utils.config import get_http_cache_config, get_quotes_config
+from app.utils.http_cache import caching_headers, etag_matches, make_etag
 
 from app.utils.logger import get_logger
 
@@ -20,17 +26,22 @@ logger = get_logger()
 @router.get("/search/stocks")
 async def search_stocks(
     q: str = Query(..., description="Search query (symbol or company name)"),
-    limit: int = Query(10, ge=1, le=50, description="Maximum results")
+    limit: int = Query(10, ge=1, le=50, description="Maximum results"),
+    markets: Optional[str] = Query(None, description="Comma-separated markets (e.g. NSE,BSE,NASDAQ) or 'all'")
 ):
     """
     Search for stocks by symbol or company name
     
-    Returns real-time stock data from yfinance
+    Answers from the local symbol index, falling back to Yahoo autocomplete
     """
     try:
         logger.info(f"Stock search request: {q}")
         
-        results = search_stocks_yfinance(q, limit)
+        market_filter = None
+        if markets:
+            market_filter = [] if markets.lower() == "all" else [m.strip() for m in markets.split(",") if m.strip()]
+        
+        results = search_stocks_yfinance(q, limit, market_filter)
         
         return {
             "query": q,
@@ -86,22 +97,39 @@ async def get_popular_stocks(market: Optional[str] = Query(None, description="Ma
         }
 
 @router.get("/search/info/{symbol}")
-async def get_stock_details(symbol: str):
+async def get_stock_details(symbol: str, if_none_match: Optional[str] = Header(None)):
     """
     Get detailed information for a specific stock
     
+    Responses carry an ETag of the fundamentals; a matching If-None-Match
+    gets 304 Not Modified. The tag is checked against the cached fundamentals
+    before anything is fetched.
+    
     Args:
         symbol: Stock ticker symbol (e.g., AAPL, RELIANCE.NS)
+        if_none_match: Previously received ETag(s)
     """
     try:
         logger.info(f"Stock info request: {symbol}")
         
-        info = get_stock_info_api(symbol)
+        config = get_http_cache_config()
         
-        return {
+        info = peek_stock_info_api(symbol)
+        etag = make_etag({"info": info}) if info is not None else None
+        if etag is not None and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=caching_headers(
+                etag, config["info_max_age"], config["stale_while_revalidate"]
+            ))
+        
+        if info is None:
+            info = get_stock_info_api(symbol)
+            etag = make_etag({"info": info})
+        headers = caching_headers(etag, config["info_max_age"], config["stale_while_revalidate"])
+        
+        return JSONResponse({
             "symbol": symbol,
             "data": info
-        }
+        }, headers=headers)
     
     except Exception as e:
         logger.error(f"Error getting stock info for {symbol}: {e}")
@@ -110,3 +138,40 @@ async def get_stock_details(symbol: str):
             "data": None,
             "error": str(e)
         }
+
+@router.get("/search/quotes")
+def get_batch_quotes(symbols: str = Query(..., description="Comma-separated symbols, e.g. AAPL,TCS.NS")):
+    """
+    Get latest quotes for a watchlist in one request
+    
+    Symbols are fetched in chunked multi-symbol upstream calls and cached
+    briefly, so a watchlist page needs one round trip instead of one per row.
+    
+    Args:
+        symbols: Comma-separated ticker symbols
+    """
+    requested = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    max_symbols = get_quotes_config()["max_symbols"]
+    
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(requested) > max_symbols:
+        raise HTTPException(status_code=400, detail=f"At most {max_symbols} symbols per request")
+    
+    logger.info(f"Quote request for {len(requested)} symbols")
+    quotes = get_quotes(requested)
+    
+    results = {}
+    for symbol, quote in quotes.items():
+        listing = lookup_symbol(symbol)
+        results[symbol] = {
+            **quote,
+            "name": listing["name"] if listing else symbol,
+            "market": listing["market"] if listing else None
+        }
+    
+    return {
+        "count": len(results),
+        "quotes": results,
+        "missing": [symbol for symbol in requested if symbol not in results]
+    }
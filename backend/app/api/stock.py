@@ -2,24 +2,111 @@
 Stock analysis API endpoint
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Path, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from datetime import datetime
+from typing import Optional
+import asyncio
+import json
+import time
 
-from app.models.request import StockAnalysisRequest
+from app.models.request import BatchStockAnalysisRequest, StockAnalysisRequest
 from app.models.response import StockAnalysisResponse, NewsItem
 from app.risk_engine.aggregation import aggregate_stock_risk
 from app.news_rag.context_builder import build_news_context
-from app.ai.explanation import generate_risk_explanation
-from app.utils.logger import get_logger
+from app.ai.explanation import generate_risk_explanation, get_explanation_model_name, stream_risk_explanation
+from app.data_sources.snapshot import get_analysis_snapshot
+from app.data_sources.warmup import record_symbol_request
+from app.utils.cache import get_cache, set_cache
+from app.utils.config import get_batch_analysis_config, get_http_cache_config
+from app.utils.http_cache import caching_headers, etag_matches, make_etag
+from app.utils.logger import get_logger, quiet_symbol_logs
+from app.utils.metrics import time_stage
 
 router = APIRouter()
 logger = get_logger()
 
+def format_news_items(news_context: list) -> list:
+    """Convert raw news context into NewsItem models"""
+    return [
+        NewsItem(
+            title=news.get("title", ""),
+            summary=news.get("summary", ""),
+            source=news.get("source", ""),
+            confidence=news.get("confidence", 0.5),
+            published_at=news.get("published_at", ""),
+            url=news.get("url")
+        )
+        for news in news_context
+    ]
+
+def format_sse(event: str, data) -> str:
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def build_stock_analysis(symbol: str) -> StockAnalysisResponse:
+    """Run the full analysis pipeline for one symbol (blocking)"""
+    # Calculate deterministic risk metrics
+    risk_metrics = aggregate_stock_risk(symbol)
+    
+    # Retrieve and verify news
+    news_context = build_news_context(symbol)
+    
+    # Generate AI explanation (no numeric modification)
+    explanation = generate_risk_explanation(risk_metrics, news_context, symbol)
+    
+    # Format news for response
+    news_items = format_news_items(news_context)
+    
+    return StockAnalysisResponse(
+        symbol=symbol,
+        risk_score=risk_metrics["overall_score"],
+        risk_breakdown=risk_metrics,
+        news_impact=news_items,
+        explanation=explanation,
+        timestamp=datetime.now().isoformat()
+    )
+
+def get_analysis_etag(symbol: str) -> Optional[str]:
+    """
+    ETag for a stock analysis, derived from the versions of its inputs
+    
+    Only cached inputs are read; None when any of them is not cached, in
+    which case the analysis has to run (and fetch) anyway.
+    """
+    snapshot = get_analysis_snapshot(symbol)
+    if snapshot is None:
+        return None
+    return make_etag({**snapshot, "model": get_explanation_model_name()})
+
+def render_stock_analysis(symbol: str) -> tuple:
+    """
+    Run the analysis and store its rendered body with the ETag of its inputs
+    
+    One entry per symbol, analysis_{symbol} -> (etag, body), replaced when
+    the inputs change.
+    
+    Returns:
+        (etag or None, body dict)
+    """
+    result = build_stock_analysis(symbol)
+    with time_stage("serialization"):
+        body = result.model_dump()
+    
+    # Inputs are cached by now, so the snapshot costs only lookups
+    etag = get_analysis_etag(symbol)
+    if etag is not None:
+        set_cache(f"analysis_{symbol}", (etag, body), ttl_seconds=get_http_cache_config()["analysis_ttl"])
+    return etag, body
+
 @router.post("/analyze/stock", response_model=StockAnalysisResponse)
 async def analyze_stock(request: StockAnalysisRequest):
     """
     Analyze risk for a single stock with news verification and GenAI explanation
     
+    The ETag header identifies the data snapshot; pollers should prefer the
+    conditional GET /analyze/stock/{symbol}.
+    
     Args:
         request: StockAnalysisRequest with symbol
         
@@ -28,42 +115,215 @@ async def analyze_stock(request: StockAnalysisRequest):
     """
     try:
         logger.info(f"Stock analysis request for {request.symbol}")
+        record_symbol_request(request.symbol)
         
-        # Calculate deterministic risk metrics
-        risk_metrics = aggregate_stock_risk(request.symbol)
+        etag, body = render_stock_analysis(request.symbol)
         
-        # Retrieve and verify news
-        news_context = build_news_context(request.symbol)
+        logger.info(f"Successfully analyzed {request.symbol}")
         
-        # Generate AI explanation (no numeric modification)
-        explanation = generate_risk_explanation(risk_metrics, news_context, request.symbol)
+        with time_stage("serialization"):
+            return JSONResponse(body, headers={"ETag": etag} if etag else None)
+    
+    except Exception as e:
+        logger.error(f"Error analyzing stock {request.symbol}: {e}")
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+@router.get("/analyze/stock/{symbol}", response_model=StockAnalysisResponse)
+def get_stock_analysis(
+    symbol: str = Path(..., min_length=1, max_length=20, description="Stock ticker symbol"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Cacheable stock analysis for dashboards that poll
+    
+    The ETag is derived from the data snapshot (price and benchmark series,
+    fundamentals, news and explanation model) as currently cached. A matching
+    If-None-Match gets 304 before any risk metric or explanation is computed,
+    and unchanged snapshots reuse the rendered analysis. When an input is not
+    cached the analysis runs normally and the tag is computed afterwards.
+    
+    Args:
+        symbol: Stock ticker symbol
+        if_none_match: Previously received ETag(s)
         
-        # Format news for response
-        news_items = [
-            NewsItem(
-                title=news.get("title", ""),
-                summary=news.get("summary", ""),
-                source=news.get("source", ""),
-                confidence=news.get("confidence", 0.5),
-                published_at=news.get("published_at", ""),
-                url=news.get("url")
-            )
-            for news in news_context
-        ]
+    Returns:
+        StockAnalysisResponse, or 304 Not Modified
+    """
+    symbol = symbol.upper().strip()
+    config = get_http_cache_config()
+    
+    try:
+        record_symbol_request(symbol)
+        etag = get_analysis_etag(symbol)
         
-        response = StockAnalysisResponse(
-            symbol=request.symbol,
-            risk_score=risk_metrics["overall_score"],
-            risk_breakdown=risk_metrics,
-            news_impact=news_items,
-            explanation=explanation,
-            timestamp=datetime.now().isoformat()
-        )
+        if etag is not None and etag_matches(if_none_match, etag):
+            logger.info(f"Analysis for {symbol} not modified")
+            headers = caching_headers(etag, config["analysis_max_age"], config["stale_while_revalidate"])
+            return Response(status_code=304, headers=headers)
         
-        logger.info(f"Successfully analyzed {request.symbol}")
+        stored = get_cache(f"analysis_{symbol}")
+        if etag is not None and stored is not None and stored[0] == etag:
+            body = stored[1]
+        else:
+            logger.info(f"Stock analysis request for {symbol}")
+            etag, body = render_stock_analysis(symbol)
         
-        return response
+        headers = caching_headers(etag, config["analysis_max_age"], config["stale_while_revalidate"]) if etag else None
+        with time_stage("serialization"):
+            return JSONResponse(body, headers=headers)
     
     except Exception as e:
-        logger.error(f"Error analyzing stock {request.symbol}: {e}")
+        logger.error(f"Error analyzing stock {symbol}: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+def stream_stock_analysis(symbol: str):
+    """
+    Yield server-sent events for a stock analysis in order of availability
+    
+    Events: breakdown (deterministic metrics), news, token (explanation
+    chunks), then done, or error if a stage fails.
+    """
+    try:
+        logger.info(f"Streaming stock analysis for {symbol}")
+        record_symbol_request(symbol)
+        
+        risk_metrics = aggregate_stock_risk(symbol)
+        yield format_sse("breakdown", {
+            "symbol": symbol,
+            "risk_score": risk_metrics["overall_score"],
+            "risk_breakdown": risk_metrics
+        })
+        
+        news_context = build_news_context(symbol)
+        yield format_sse("news", [item.model_dump() for item in format_news_items(news_context)])
+        
+        for token in stream_risk_explanation(risk_metrics, news_context, symbol):
+            yield format_sse("token", {"text": token})
+        
+        yield format_sse("done", {"timestamp": datetime.now().isoformat()})
+        
+        logger.info(f"Finished streaming analysis for {symbol}")
+    
+    except Exception as e:
+        logger.error(f"Error streaming analysis for {symbol}: {e}")
+        yield format_sse("error", {"detail": f"Analysis failed: {str(e)}"})
+
+@router.post("/analyze/stock/stream")
+async def analyze_stock_stream(request: StockAnalysisRequest):
+    """
+    Analyze a single stock, streaming results as server-sent events
+    
+    The risk breakdown is sent as soon as it is computed, followed by news
+    and the AI explanation token by token, so time-to-first-byte does not
+    depend on LLM latency.
+    
+    Args:
+        request: StockAnalysisRequest with symbol
+        
+    Returns:
+        text/event-stream response
+    """
+    # Sync generator: Starlette iterates it in the threadpool, off the event loop
+    return StreamingResponse(
+        stream_stock_analysis(request.symbol),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def analyze_symbol_record(symbol: str, include_news: bool, include_explanation: bool) -> dict:
+    """
+    Analyze one symbol of a batch and return its NDJSON record (blocking)
+    
+    Failures are reported in the record instead of raised, so one bad symbol
+    does not end the stream.
+    """
+    started = time.perf_counter()
+    record_symbol_request(symbol)
+    
+    try:
+        with quiet_symbol_logs():
+            risk_metrics = aggregate_stock_risk(symbol)
+            record = {
+                "symbol": symbol,
+                "status": "ok",
+                "risk_score": risk_metrics["overall_score"],
+                "risk_breakdown": risk_metrics
+            }
+            
+            if include_news or include_explanation:
+                news_context = build_news_context(symbol)
+                record["news_impact"] = [item.model_dump() for item in format_news_items(news_context)]
+                if include_explanation:
+                    record["explanation"] = generate_risk_explanation(risk_metrics, news_context, symbol)
+    
+    except Exception as e:
+        logger.warning(f"Batch analysis failed for {symbol}: {e}")
+        record = {"symbol": symbol, "status": "error", "detail": f"Analysis failed: {str(e)}"}
+    
+    record["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+async def stream_batch_analysis(request: Request, batch: BatchStockAnalysisRequest, concurrency: int):
+    """
+    Yield one NDJSON line per symbol, in completion order
+    
+    At most `concurrency` symbols are analyzed at once, each in a worker
+    thread. When the client disconnects Starlette cancels this generator,
+    which cancels every symbol that has not started; symbols already running
+    in a thread finish but their results are dropped.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run(symbol: str):
+        async with semaphore:
+            if await request.is_disconnected():
+                return None
+            return await asyncio.to_thread(
+                analyze_symbol_record, symbol, batch.include_news, batch.include_explanation
+            )
+    
+    tasks = [asyncio.create_task(run(symbol)) for symbol in batch.symbols]
+    completed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            record = await next_done
+            if record is None:
+                break
+            completed += 1
+            with time_stage("serialization"):
+                line = json.dumps(record) + "\n"
+            yield line
+    finally:
+        for task in tasks:
+            task.cancel()
+        if completed < len(tasks):
+            logger.info(f"Batch analysis stopped after {completed}/{len(tasks)} symbols")
+        else:
+            logger.info(f"Batch analysis finished for {completed} symbols")
+
+@router.post("/analyze/stocks")
+async def analyze_stocks(batch: BatchStockAnalysisRequest, request: Request):
+    """
+    Analyze many stocks, streaming one NDJSON record per symbol as it completes
+    
+    Each line is {"symbol", "status": "ok", "risk_score", "risk_breakdown",
+    "elapsed_ms"} plus news_impact / explanation when requested, or
+    {"symbol", "status": "error", "detail", "elapsed_ms"}.
+    
+    Args:
+        batch: BatchStockAnalysisRequest with symbols and optional stages
+        
+    Returns:
+        application/x-ndjson response
+    """
+    config = get_batch_analysis_config()
+    if len(batch.symbols) > config["max_symbols"]:
+        raise HTTPException(status_code=400, detail=f"At most {config['max_symbols']} symbols per request")
+    
+    logger.info(f"Batch analysis request for {len(batch.symbols)} symbols")
+    
+    return StreamingResponse(
+        stream_batch_analysis(request, batch, config["concurrency"]),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
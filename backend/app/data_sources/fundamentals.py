@@ -3,53 +3,46 @@ Fundamental data retrieval from stock info
 """
 
 from app.data_sources.market_data import get_stock_info
-from app.utils.logger import get_logger
+from app.data_sources.synthetic_market import generate_earnings_history, generate_fundamentals
+from app.utils.logger import get_logger, log_hot
 
 logger = get_logger()
 
-import hashlib
-
 def generate_fallback_data(symbol: str) -> dict:
     """
-    Generate deterministic but varied fallback data based on symbol hash.
+    Deterministic but varied fallback data from the synthetic market model.
     This ensures that different stocks get different (but consistent) values
     when the API is rate limited.
     """
-    # Create a hash of the symbol
-    h = int(hashlib.md5(symbol.encode()).hexdigest(), 16)
-    
-    # Use hash to seed simple random-like generators
-    # Debt/Equity varies between 0.2 and 2.5
-    de_ratio = 0.2 + (h % 230) / 100.0  
-    
-    # Interest Coverage varies between 2.0 and 20.0
-    int_cov = 2.0 + ((h >> 8) % 180) / 10.0
-    
-    # Earnings variability between 0.05 and 0.45
-    earn_var = 0.05 + ((h >> 16) % 40) / 100.0
+    generated = generate_fundamentals(symbol)
     
     return {
-        "debt_to_equity": de_ratio,
-        "interest_coverage": int_cov,
-        "earnings_variability": earn_var,
+        "debt_to_equity": generated["totalDebt"] / generated["totalStockholderEquity"],
+        "interest_coverage": generated["ebit"] / generated["interestExpense"],
+        "earnings_variability": generated["earningsVariability"],
         # Base values to support specific calculations if needed
-        "total_debt": 1000000 * (1 + (h % 10)),
-        "total_equity": 1000000 * ((1 + (h % 10)) / de_ratio),
-        "ebit": 1000000 * ((1 + (h % 5)) * int_cov),
-        "interest_expense": 1000000 * (1 + (h % 5)),
-        "net_income": 500000 * (1 + (h % 7)),
-        "revenue": 5000000 * (1 + (h % 10))
+        "total_debt": generated["totalDebt"],
+        "total_equity": generated["totalStockholderEquity"],
+        "ebit": generated["ebit"],
+        "interest_expense": generated["interestExpense"],
+        "net_income": generated["netIncomeToCommon"],
+        "revenue": generated["totalRevenue"]
     }
 
-def get_balance_sheet(symbol: str) -> dict:
+def get_balance_sheet(symbol: str, info: dict = None) -> dict:
     """
     Get balance sheet data from stock info with robust fallbacks
+    
+    Pass info from a symbol data bundle to skip the lookup; the bundle has
+    already logged any fallback to estimates.
     """
-    info = get_stock_info(symbol)
+    if info is None:
+        info = get_stock_info(symbol)
+        if not info or len(info) < 5:
+            log_hot("WARNING", "Using SMART estimated balance sheet for {} due to missing data", symbol)
     
     # Check if we got valid data or just an empty dict/rate limit error
     if not info or len(info) < 5:
-        logger.warning(f"Using SMART estimated balance sheet for {symbol} due to missing data")
         fallback = generate_fallback_data(symbol)
         return {
             "total_debt": fallback["total_debt"],
@@ -80,15 +73,17 @@ def get_balance_sheet(symbol: str) -> dict:
         "current_liabilities": info.get("totalCurrentLiabilities", 0)
     }
 
-def get_income_statement(symbol: str) -> dict:
+def get_income_statement(symbol: str, info: dict = None) -> dict:
     """
     Get income statement data from stock info with robust fallbacks
     """
-    info = get_stock_info(symbol)
+    if info is None:
+        info = get_stock_info(symbol)
+        if not info or len(info) < 5:
+            log_hot("WARNING", "Using SMART estimated income statement for {}", symbol)
     
     # FALLBACK for missing data
     if not info or len(info) < 5:
-        logger.warning(f"Using SMART estimated income statement for {symbol}")
         fallback = generate_fallback_data(symbol)
         return {
             "ebit": fallback["ebit"],
@@ -115,19 +110,17 @@ def get_income_statement(symbol: str) -> dict:
         "operating_income": info.get("operatingIncome", 0)
     }
 
-def get_earnings_history(symbol: str, periods: int = 12) -> list:
+def get_earnings_history(symbol: str, periods: int = 12, info: dict = None) -> list:
     """
     Get historical earnings
     """
-    info = get_stock_info(symbol)
+    if info is None:
+        info = get_stock_info(symbol)
     
     trailing_eps = info.get("trailingEps")
     if trailing_eps is not None:
         return [trailing_eps]
         
-    # If we are failing, return a simulated history based on the hash
+    # If we are failing, return a simulated history from the synthetic market
     # to support the "Earnings Variability" calculation
-    fallback = generate_fallback_data(symbol)
-    base_eps = 2.0 + (fallback["earnings_variability"] * 10)
-    # Simulate a slightly noisy series
-    return [base_eps * (1 + (i % 3) * 0.1) for i in range(5)]
+    return generate_earnings_history(symbol, periods)
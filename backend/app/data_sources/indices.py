@@ -2,57 +2,50 @@
 Index data retrieval
 """
 
-import yfinance as yf
 import numpy as np
-from app.utils.cache import get_cache, set_cache
-from app.utils.logger import get_logger
+from app.data_sources import providers
+from app.data_sources.providers.synthetic import generate_fallback_prices
+from app.utils.cache import get_cache_or_stale, schedule_refresh, set_cache
+from app.utils.config import get_warmup_config
+from app.utils.logger import get_logger, log_hot
+from app.utils.metrics import inc_counter
 
 logger = get_logger()
 
-def get_index_prices(index_symbol: str = "^GSPC", period_days: int = 252) -> np.ndarray:
+def get_index_prices(index_symbol: str = "^GSPC", period_days: int = 252, force_refresh: bool = False) -> np.ndarray:
     """
     Get historical index prices (default: S&P 500)
     
     Args:
         index_symbol: Index ticker (^GSPC for S&P 500)
         period_days: Number of trading days
+        force_refresh: Skip the cache and fetch from the providers
         
     Returns:
         numpy array of closing prices
     """
     cache_key = f"index_{index_symbol}_{period_days}"
-    cached = get_cache(cache_key)
     
-    if cached is not None:
-        return cached
+    if not force_refresh:
+        cached = get_cache_or_stale(cache_key)
+        if cached is not None:
+            prices, is_stale = cached
+            if is_stale:
+                schedule_refresh(cache_key, lambda: get_index_prices(index_symbol, period_days, force_refresh=True))
+            return prices
+    
+    log_hot("DEBUG", "Fetching index prices for {}", index_symbol)
     
     try:
-        logger.info(f"Fetching index prices for {index_symbol}")
-        # Try importing the session/raw fetcher
-        from app.data_sources.market_data import get_session, fetch_prices_raw
-        
-        index = yf.Ticker(index_symbol, session=get_session())
-        hist = index.history(period=f"{period_days}d")
-        
-        if not hist.empty:
-            prices = hist['Close'].values
-            set_cache(cache_key, prices, ttl_seconds=3600)
+        prices, source = providers.fetch_prices(index_symbol, period_days)
+        if prices is not None:
+            log_hot("INFO", "Fetched {} via {}", index_symbol, source)
+            set_cache(cache_key, prices, ttl_seconds=3600, stale_seconds=get_warmup_config()["stale_ttl"])
             return prices
-            
-    except Exception as e:
-        logger.warning(f"yfinance failed for index {index_symbol}, trying raw fallback: {e}")
-
-    # Fallback to raw fetch
-    try:
-        from app.data_sources.market_data import fetch_prices_raw, generate_fallback_prices
-        raw_prices = fetch_prices_raw(index_symbol, period_days)
-        if raw_prices is not None and len(raw_prices) > 0:
-            logger.info(f"Raw fallback successful for {index_symbol}")
-            set_cache(cache_key, raw_prices, ttl_seconds=3600)
-            return raw_prices
-            
-        # If raw fetch also fails, return generated random walk
+        
+        # If every provider fails, return generated random walk
         logger.warning(f"Generating fallback index history for {index_symbol}")
+        inc_counter("upstream_fallback_total", {"capability": "prices", "fallback": "synthetic"})
         return generate_fallback_prices(index_symbol, period_days)
         
     except Exception as e:
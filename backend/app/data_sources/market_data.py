@@ -1,193 +1,119 @@
 """
-Market data retrieval using yfinance with robust fallback
+Market data retrieval through pluggable providers with robust fallback
 """
 
-import yfinance as yf
 import numpy as np
-import requests
-from datetime import datetime, timedelta
-from app.utils.cache import get_cache, set_cache
-from app.utils.logger import get_logger
+from app.data_sources import providers
+from app.data_sources.providers.synthetic import generate_fallback_prices
+from app.utils.cache import get_cache, get_cache_or_stale, schedule_refresh, set_cache
+from app.utils.config import get_quotes_config, get_warmup_config
+from app.utils.logger import get_logger, log_hot
+from app.utils.metrics import inc_counter
 
 logger = get_logger()
 
-import random
-import time
-
-# List of common user agents to rotate
-USER_AGENTS = [
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
-    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15',
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:124.0) Gecko/20100101 Firefox/124.0',
-    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
-    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:109.0) Gecko/20100101 Firefox/118.0'
-]
-
-import hashlib
-
-def generate_fallback_prices(symbol: str, period_days: int) -> np.ndarray:
-    """
-    Generate a deterministic 'random walk' price history based on symbol hash.
-    This ensures we have realistic-looking data for Beta/Volatility calculations
-    even when the API is down.
-    """
-    # Create a hash of the symbol to seed
-    h = int(hashlib.md5(symbol.encode()).hexdigest(), 16)
-    
-    # Base parameters derived from hash
-    volatility = 0.01 + (h % 20) / 1000.0  # 1% to 3% daily vol
-    drift = 0.0002 + ((h >> 8) % 10) / 10000.0 # Slight positive drift
-    start_price = 50.0 + (h % 500)
-    
-    # Generate returns
-    np.random.seed(h % (2**32)) # Seed with hash
-    returns = np.random.normal(drift, volatility, period_days)
-    
-    # Construct price path
-    prices = np.zeros(period_days)
-    prices[0] = start_price
-    for i in range(1, period_days):
-        prices[i] = prices[i-1] * (1 + returns[i])
-        
-    return prices
-
-def get_session():
-    """Create a session with rotated headers to avoid bot detection"""
-    session = requests.Session()
-    
-    # Add small random delay to reduce burstiness
-    time.sleep(random.uniform(0.1, 0.5))
-    
-    user_agent = random.choice(USER_AGENTS)
-    
-    session.headers.update({
-        'User-Agent': user_agent,
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://finance.yahoo.com',
-        'Origin': 'https://finance.yahoo.com',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Sec-Fetch-Dest': 'document',
-        'Sec-Fetch-Mode': 'navigate',
-        'Sec-Fetch-Site': 'none',
-        'Sec-Fetch-User': '?1',
-        'Cache-Control': 'max-age=0'
-    })
-    return session
-
-def fetch_prices_raw(symbol: str, period_days: int) -> np.ndarray:
-    """Fallback: Fetch prices using raw Chart API (query2)"""
-    try:
-        # Use query2 which is often more reliable
-        # Calculate range for URL (approximate)
-        url = f"https://query2.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range=1y"
-        
-        session = get_session()
-        response = session.get(url, timeout=10)
-        
-        if response.status_code != 200:
-            logger.warning(f"Raw fetch failed with status {response.status_code} for {symbol}")
-            return None
-            
-        data = response.json()
-        result = data['chart']['result'][0]
-        
-        # Extract quote
-        quote = result['indicators']['quote'][0]
-        closes = quote['close']
-        
-        # Filter None/NaN
-        prices = [x for x in closes if x is not None]
-        
-        if not prices:
-            return None
-            
-        # Return last N days
-        return np.array(prices[-period_days:])
-        
-    except Exception as e:
-        logger.error(f"Raw fetch error for {symbol}: {e}")
-        return None
-
-def get_stock_prices(symbol: str, period_days: int = 252) -> np.ndarray:
+def get_stock_prices(symbol: str, period_days: int = 252, force_refresh: bool = False) -> np.ndarray:
     """
     Get historical stock prices
     
+    Recently expired prices are served stale while a background refresh runs.
+    
     Args:
         symbol: Stock ticker symbol
         period_days: Number of trading days to fetch
+        force_refresh: Skip the cache and fetch from the providers
         
     Returns:
         numpy array of closing prices
     """
     cache_key = f"prices_{symbol}_{period_days}"
-    cached = get_cache(cache_key)
     
-    if cached is not None:
-        logger.info(f"Cache hit for {symbol} prices")
-        return cached
-    
-    # Try YFinance library first (uses query2 internally but handles adjustments)
-    try:
-        logger.info(f"Fetching prices for {symbol} via yfinance")
-        # Use custom session
-        stock = yf.Ticker(symbol, session=get_session())
-        
-        # Get historical data
-        hist = stock.history(period="1y")
-        
-        if not hist.empty:
-            prices = hist['Close'].values
-            # Trim to requested length
-            if len(prices) > period_days:
-                prices = prices[-period_days:]
-                
-            set_cache(cache_key, prices, ttl_seconds=3600)
+    if not force_refresh:
+        cached = get_cache_or_stale(cache_key)
+        if cached is not None:
+            prices, is_stale = cached
+            if is_stale:
+                log_hot("DEBUG", "Serving stale {} prices, refreshing in background", symbol)
+                schedule_refresh(cache_key, lambda: get_stock_prices(symbol, period_days, force_refresh=True))
+            else:
+                log_hot("DEBUG", "Cache hit for {} prices", symbol)
             return prices
-    except Exception as e:
-        logger.warning(f"yfinance failed for {symbol}, trying raw fallback: {e}")
     
-    # Try Raw Fallback
-    logger.info(f"Attempting raw fallback for {symbol}")
-    raw_prices = fetch_prices_raw(symbol, period_days)
-    if raw_prices is not None and len(raw_prices) > 0:
-        logger.info(f"Raw fallback successful for {symbol}")
-        set_cache(cache_key, raw_prices, ttl_seconds=3600)
-        return raw_prices
+    # Try the configured provider chain (yfinance, then raw chart API by default)
+    prices, source = providers.fetch_prices(symbol, period_days)
+    if prices is not None:
+        log_hot("INFO", "Fetched prices for {} via {}", symbol, source)
+        set_cache(cache_key, prices, ttl_seconds=3600, stale_seconds=get_warmup_config()["stale_ttl"])
+        return prices
 
     # Fail - return generated random walk so the UI doesn't look broken
     # and we get non-zero Beta/Volatility
-    logger.warning(f"All methods failed for {symbol}, generating fallback price history")
+    log_hot("WARNING", "All methods failed for {}, generating fallback price history", symbol)
+    inc_counter("upstream_fallback_total", {"capability": "prices", "fallback": "synthetic"})
     fallback_prices = generate_fallback_prices(symbol, period_days)
     return fallback_prices
 
-def get_stock_info(symbol: str) -> dict:
+def get_stock_info(symbol: str, force_refresh: bool = False) -> dict:
     """
     Get stock fundamental information
     
     Args:
         symbol: Stock ticker symbol
+        force_refresh: Skip the cache and fetch from the providers
         
     Returns:
         Dictionary with stock info
     """
     cache_key = f"info_{symbol}"
-    cached = get_cache(cache_key)
     
-    if cached is not None:
-        return cached
+    if not force_refresh:
+        cached = get_cache_or_stale(cache_key)
+        if cached is not None:
+            info, is_stale = cached
+            if is_stale:
+                schedule_refresh(cache_key, lambda: get_stock_info(symbol, force_refresh=True))
+            return info
+    
+    info, source = providers.fetch_info(symbol)
+    
+    if info is None:
+        logger.error(f"Error fetching info for {symbol}: no provider returned data")
+        inc_counter("upstream_fallback_total", {"capability": "info", "fallback": "empty"})
+        return {}
+    
+    # Cache for 24 hours
+    set_cache(cache_key, info, ttl_seconds=86400, stale_seconds=get_warmup_config()["stale_ttl"])
     
-    try:
-        # Use custom session
-        stock = yf.Ticker(symbol, session=get_session())
-        info = stock.info
+    return info
+
+def get_quotes(symbols: list) -> dict:
+    """
+    Get latest quotes for many symbols, fetching only uncached ones
+    
+    Args:
+        symbols: Ticker symbols
         
-        # Cache for 24 hours
-        set_cache(cache_key, info, ttl_seconds=86400)
+    Returns:
+        {symbol: quote dict}; symbols no provider could price are left out
+    """
+    ttl = get_quotes_config()["cache_ttl"]
+    quotes = {}
+    missing = []
+    
+    for symbol in symbols:
+        cached = get_cache(f"quote_{symbol}")
+        if cached is not None:
+            quotes[symbol] = cached
+        else:
+            missing.append(symbol)
+    
+    if missing:
+        fetched = providers.fetch_quotes(missing)
+        for symbol, quote in fetched.items():
+            set_cache(f"quote_{symbol}", quote, ttl_seconds=ttl)
+        quotes.update(fetched)
         
-        return info
+        if len(fetched) < len(missing):
+            logger.warning(f"No quote for {len(missing) - len(fetched)} of {len(missing)} symbols")
     
-    except Exception as e:
-        logger.error(f"Error fetching info for {symbol}: {e}")
-        return {}
+    return quotes
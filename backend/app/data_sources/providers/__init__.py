@@ -0,0 +1,221 @@
+"""
+Pluggable market data providers
+
+A provider is a module exposing:
+    NAME
+    fetch_prices(symbol, period_days) -> numpy array of closes or None
+    fetch_info(symbol) -> fundamentals info dict or None
+    search_quotes(query) -> list of Yahoo-style autocomplete quotes or None
+    fetch_quotes(symbols) -> {symbol: quote dict} for the symbols it could price
+
+Returning None (or raising) means "no answer", and the next provider in the
+chain selected by DATA_PROVIDER is tried. For quotes, only the symbols still
+missing are passed down the chain. With DATA_RECORD=true every live
+answer is also captured into the replay cassette.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Optional, Tuple
+
+from app.data_sources.providers import cassette, chart_api, synthetic, yfinance_provider
+from app.utils.config import get_data_provider_config
+from app.utils.logger import get_logger
+from app.utils.metrics import inc_counter, observe_histogram, set_gauge, time_stage
+
+logger = get_logger()
+
+PROVIDERS = {
+    yfinance_provider.NAME: yfinance_provider,
+    chart_api.NAME: chart_api,
+    synthetic.NAME: synthetic,
+    cassette.NAME: cassette,
+}
+
+# DATA_PROVIDER value -> provider chain per capability
+CHAINS = {
+    "auto": {
+        "prices": ["yfinance", "chart_api"],
+        "info": ["yfinance"],
+        "search": ["chart_api"],
+        "quotes": ["yfinance", "chart_api"],
+    },
+    "yfinance": {"prices": ["yfinance"], "info": ["yfinance"], "search": ["chart_api"], "quotes": ["yfinance"]},
+    "chart_api": {"prices": ["chart_api"], "info": [], "search": ["chart_api"], "quotes": ["chart_api"]},
+    "synthetic": {"prices": ["synthetic"], "info": ["synthetic"], "search": ["synthetic"], "quotes": ["synthetic"]},
+    "replay": {"prices": ["cassette"], "info": ["cassette"], "search": ["cassette"], "quotes": ["cassette"]},
+}
+
+_FUNCTIONS = {"prices": "fetch_prices", "info": "fetch_info", "search": "search_quotes", "quotes": "fetch_quotes"}
+
+# provider name -> {"failures": consecutive failures, "opened_at": monotonic time or None}
+_circuits = {name: {"failures": 0, "opened_at": None} for name in PROVIDERS}
+_circuit_lock = threading.Lock()
+
+def _circuit_allows(name: str, config: dict) -> bool:
+    """Closed circuits allow calls; open ones allow a single probe after the cooldown"""
+    with _circuit_lock:
+        circuit = _circuits[name]
+        if circuit["opened_at"] is None:
+            return True
+        if time.monotonic() - circuit["opened_at"] >= config["circuit_cooldown"]:
+            # Half-open: let this call through, re-open immediately if it fails
+            circuit["opened_at"] = None
+            circuit["failures"] = config["circuit_failures"] - 1
+            return True
+        return False
+
+def _record_outcome(name: str, failed: bool, config: dict):
+    with _circuit_lock:
+        circuit = _circuits[name]
+        if not failed:
+            circuit["failures"] = 0
+            circuit["opened_at"] = None
+        else:
+            circuit["failures"] += 1
+            if circuit["failures"] >= config["circuit_failures"] and circuit["opened_at"] is None:
+                circuit["opened_at"] = time.monotonic()
+                logger.warning(f"Circuit opened for {name} provider after {circuit['failures']} failures")
+        set_gauge("upstream_circuit_open", 1 if circuit["opened_at"] is not None else 0, {"provider": name})
+
+def get_circuit_states() -> dict:
+    """Get circuit breaker state for every provider"""
+    config = get_data_provider_config()
+    now = time.monotonic()
+
+    with _circuit_lock:
+        states = {}
+        for name, circuit in _circuits.items():
+            if circuit["opened_at"] is None:
+                state = "closed"
+            elif now - circuit["opened_at"] >= config["circuit_cooldown"]:
+                state = "half_open"
+            else:
+                state = "open"
+            states[name] = {"state": state, "consecutive_failures": circuit["failures"]}
+        return states
+
+def get_provider_chain(capability: str) -> list:
+    """Get the provider names to try, in order, for a capability"""
+    provider = get_data_provider_config()["provider"]
+    if provider not in CHAINS:
+        logger.warning(f"Unknown DATA_PROVIDER '{provider}', using auto")
+        provider = "auto"
+    return CHAINS[provider][capability]
+
+def _has_value(value) -> bool:
+    if value is None:
+        return False
+    try:
+        return len(value) > 0 or isinstance(value, dict)
+    except TypeError:
+        return True
+
+def _inject_faults(config: dict):
+    """Simulate upstream latency and failures (load testing only)"""
+    if config["inject_latency_ms"]:
+        time.sleep(config["inject_latency_ms"] / 1000.0)
+    if config["inject_error_rate"] and random.random() < config["inject_error_rate"]:
+        raise RuntimeError("Injected provider failure")
+
+def _call(name: str, capability: str, key: str, config: dict, *args) -> Tuple[Optional[Any], float]:
+    """
+    Call one provider with circuit breaking and metrics
+
+    Returns:
+        (value, latency); value is None when skipped, failed or empty
+    """
+    if not _circuit_allows(name, config):
+        inc_counter("upstream_requests_total", {"provider": name, "capability": capability, "outcome": "skipped"})
+        return None, 0.0
+
+    provider = PROVIDERS[name]
+    start = time.monotonic()
+
+    try:
+        _inject_faults(config)
+        value = getattr(provider, _FUNCTIONS[capability])(*args)
+    except Exception as e:
+        logger.warning(f"{name} provider failed for {capability} {key}: {e}")
+        _record_outcome(name, True, config)
+        inc_counter("upstream_requests_total", {"provider": name, "capability": capability, "outcome": "failure"})
+        observe_histogram("upstream_request_duration_seconds", time.monotonic() - start,
+                          {"provider": name, "capability": capability})
+        return None, 0.0
+
+    latency = time.monotonic() - start
+    _record_outcome(name, False, config)
+    observe_histogram("upstream_request_duration_seconds", latency, {"provider": name, "capability": capability})
+
+    if not _has_value(value):
+        inc_counter("upstream_requests_total", {"provider": name, "capability": capability, "outcome": "empty"})
+        return None, latency
+
+    inc_counter("upstream_requests_total", {"provider": name, "capability": capability, "outcome": "success"})
+    return value, latency
+
+def _should_record(name: str, config: dict) -> bool:
+    return config["record"] and name not in (cassette.NAME, synthetic.NAME)
+
+def _fetch(capability: str, key: str, *args) -> Tuple[Optional[Any], Optional[str]]:
+    """Try each provider in the chain, returning (value, provider name)"""
+    config = get_data_provider_config()
+
+    with time_stage("data_fetch"):
+        for name in get_provider_chain(capability):
+            value, latency = _call(name, capability, key, config, *args)
+            if value is None:
+                continue
+
+            if _should_record(name, config):
+                cassette.record(capability, key, value, latency)
+
+            return value, name
+
+    return None, None
+
+def fetch_prices(symbol: str, period_days: int) -> Tuple[Optional[Any], Optional[str]]:
+    """Fetch closing prices from the configured provider chain"""
+    return _fetch("prices", symbol, symbol, period_days)
+
+def fetch_info(symbol: str) -> Tuple[Optional[dict], Optional[str]]:
+    """Fetch fundamentals info from the configured provider chain"""
+    return _fetch("info", symbol, symbol)
+
+def search_quotes(query: str) -> Tuple[Optional[list], Optional[str]]:
+    """Fetch autocomplete quotes from the configured provider chain"""
+    return _fetch("search", query, query)
+
+def fetch_quotes(symbols: list) -> dict:
+    """
+    Fetch latest quotes for many symbols from the configured provider chain
+
+    Providers batch the symbols into multi-symbol requests; symbols a provider
+    cannot price are retried on the next provider in the chain.
+
+    Returns:
+        {symbol: quote dict} for every symbol some provider answered
+    """
+    config = get_data_provider_config()
+    quotes = {}
+    missing = list(symbols)
+
+    with time_stage("data_fetch"):
+        for name in get_provider_chain("quotes"):
+            if not missing:
+                break
+
+            value, latency = _call(name, "quotes", f"{len(missing)} symbols", config, missing)
+            if not value:
+                continue
+
+            for symbol, quote in value.items():
+                if symbol in missing and quote:
+                    quotes[symbol] = quote
+                    if _should_record(name, config):
+                        cassette.record("quotes", symbol, quote, latency)
+
+            missing = [symbol for symbol in missing if symbol not in quotes]
+
+    return quotes
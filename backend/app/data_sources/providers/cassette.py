@@ -0,0 +1,174 @@
+"""
+Record/replay cassette provider: a gzip-compressed JSON capture of real responses
+
+Recording stores each successful upstream response together with the latency
+it took, so replay can optionally reproduce production latency profiles.
+Recorded responses are kept in memory and the tape is written every
+DATA_CASSETTE_FLUSH_INTERVAL seconds and at shutdown, never per response.
+"""
+
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.utils.config import get_data_provider_config
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+NAME = "cassette"
+
+# {"prices": {symbol: [...]}, "info": {symbol: {...}}, "search": {query: [...]},
+#  "quotes": {symbol: {...}}, "latency": {"prices:SYMBOL": seconds, ...}}
+_tape = None
+_lock = threading.Lock()
+# Recorded since the last write; only the flusher writes the file
+_dirty = False
+_flush_lock = threading.Lock()
+_flusher = None
+
+def _empty_tape() -> dict:
+    return {"prices": {}, "info": {}, "search": {}, "quotes": {}, "latency": {}}
+
+def _load() -> dict:
+    """Load the cassette file once (empty tape if it does not exist yet)"""
+    global _tape
+
+    if _tape is None:
+        with _lock:
+            if _tape is None:
+                path = get_data_provider_config()["cassette_path"]
+                if os.path.exists(path):
+                    with gzip.open(path, "rt", encoding="utf-8") as f:
+                        _tape = {**_empty_tape(), **json.load(f)}
+                    logger.info(f"Loaded data cassette {path}")
+                else:
+                    _tape = _empty_tape()
+
+    return _tape
+
+def _save(tape: dict):
+    """Atomically write a tape snapshot to disk"""
+    path = get_data_provider_config()["cassette_path"]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(tape, f, default=str)
+    os.replace(tmp_path, path)
+
+def flush_cassette():
+    """Write responses recorded since the last flush (no-op when nothing changed)"""
+    global _dirty
+
+    with _flush_lock:
+        with _lock:
+            if not _dirty or _tape is None:
+                return
+            # Shallow copies: recording can continue while the snapshot is written
+            snapshot = {name: dict(section) for name, section in _tape.items()}
+            _dirty = False
+
+        try:
+            _save(snapshot)
+        except OSError as e:
+            with _lock:
+                _dirty = True
+            logger.error(f"Failed to write data cassette: {e}")
+
+def _flush_loop():
+    interval = get_data_provider_config()["cassette_flush_interval"]
+    while True:
+        time.sleep(interval)
+        flush_cassette()
+
+def _start_flusher():
+    """Start the periodic writer once, and flush again at interpreter exit"""
+    global _flusher
+
+    if _flusher is None:
+        _flusher = threading.Thread(target=_flush_loop, name="cassette-flush", daemon=True)
+        _flusher.start()
+        atexit.register(flush_cassette)
+
+def _replay_latency(key: str):
+    if get_data_provider_config()["replay_latency"]:
+        latency = _load()["latency"].get(key)
+        if latency:
+            time.sleep(latency)
+
+def record(capability: str, key: str, value, latency: float):
+    """
+    Record one upstream response
+
+    Args:
+        capability: prices, info, search or quotes
+        key: Symbol or query
+        value: Provider response
+        latency: Seconds the upstream call took
+    """
+    global _dirty
+
+    tape = _load()
+
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+
+    with _lock:
+        existing = tape[capability].get(key)
+        # Keep the longest price history so shorter windows can be sliced from it
+        if capability == "prices" and existing is not None and len(existing) > len(value):
+            return
+
+        tape[capability][key] = value
+        tape["latency"][f"{capability}:{key}"] = round(latency, 4)
+        _dirty = True
+        _start_flusher()
+
+def fetch_prices(symbol: str, period_days: int):
+    """Replay recorded prices, sliced to the requested window"""
+    prices = _load()["prices"].get(symbol)
+    if not prices:
+        return None
+
+    _replay_latency(f"prices:{symbol}")
+    return np.array(prices[-period_days:])
+
+def fetch_info(symbol: str):
+    """Replay a recorded fundamentals info dict"""
+    info = _load()["info"].get(symbol)
+    if info is None:
+        return None
+
+    _replay_latency(f"info:{symbol}")
+    return info
+
+def fetch_quotes(symbols: list):
+    """Replay recorded quotes for the symbols that have one"""
+    recorded = _load()["quotes"]
+    quotes = {symbol: recorded[symbol] for symbol in symbols if symbol in recorded}
+    if not quotes:
+        return None
+
+    # One upstream round trip per batch: replay the slowest recorded one
+    if get_data_provider_config()["replay_latency"]:
+        latency = max(_load()["latency"].get(f"quotes:{symbol}", 0) for symbol in quotes)
+        if latency:
+            time.sleep(latency)
+    return quotes
+
+def search_quotes(query: str):
+    """Replay recorded autocomplete results"""
+    quotes = _load()["search"].get(query)
+    if quotes is None:
+        return None
+
+    _replay_latency(f"search:{query}")
+    return quotes
@@ -0,0 +1,97 @@
+"""
+Raw Yahoo Finance HTTP API provider (chart and autocomplete endpoints)
+"""
+
+import numpy as np
+
+from app.data_sources.providers.http import build_quote, get_session, get_request_session, history_period
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+NAME = "chart_api"
+
+def fetch_prices(symbol: str, period_days: int):
+    """Fetch prices using raw Chart API (query2)"""
+    # Use query2 which is often more reliable
+    url = f"https://query2.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range={history_period(period_days)}"
+    
+    session = get_session()
+    response = session.get(url, timeout=10)
+    
+    if response.status_code != 200:
+        logger.warning(f"Raw fetch failed with status {response.status_code} for {symbol}")
+        return None
+        
+    data = response.json()
+    result = data['chart']['result'][0]
+    
+    # Extract quote
+    quote = result['indicators']['quote'][0]
+    closes = quote['close']
+    
+    # Filter None/NaN
+    prices = [x for x in closes if x is not None]
+    
+    if not prices:
+        return None
+        
+    # Return last N days
+    return np.array(prices[-period_days:])
+
+# Yahoo's spark endpoint accepts at most 20 symbols per call
+QUOTE_CHUNK_SIZE = 20
+
+def fetch_quotes(symbols: list):
+    """Fetch latest quotes for many symbols via the multi-symbol spark endpoint"""
+    session = get_request_session()
+    quotes = {}
+    
+    for start in range(0, len(symbols), QUOTE_CHUNK_SIZE):
+        chunk = symbols[start:start + QUOTE_CHUNK_SIZE]
+        response = session.get(
+            "https://query1.finance.yahoo.com/v7/finance/spark",
+            params={"symbols": ",".join(chunk), "range": "5d", "interval": "1d"},
+            timeout=10
+        )
+        if response.status_code != 200:
+            logger.warning(f"Spark fetch failed with status {response.status_code} for {len(chunk)} symbols")
+            continue
+        
+        data = response.json()
+        for result in (data.get("spark") or {}).get("result") or []:
+            for item in result.get("response") or []:
+                meta = item.get("meta", {})
+                closes = item["indicators"]["quote"][0].get("close") or []
+                quote = build_quote(closes, meta.get("regularMarketVolume", 0), meta.get("currency"))
+                if quote:
+                    quotes[result["symbol"]] = quote
+    
+    return quotes
+
+def fetch_info(symbol: str):
+    """The chart API carries no fundamentals; defer to the next provider"""
+    return None
+
+def search_quotes(query: str):
+    """Fetch autocomplete results from Yahoo Finance"""
+    session = get_request_session()
+    # Use query2 which is often more reliable
+    url = "https://query2.finance.yahoo.com/v1/finance/search"
+    
+    params = {
+        'q': query,
+        'quotesCount': 25, # Increased to ensure Indian stocks are found even if buried
+        'newsCount': 0,
+        'enableFuzzyQuery': 'true',
+        'enableCb': 'true'
+    }
+    
+    response = session.get(url, params=params, timeout=5)
+    
+    if response.status_code == 200:
+        data = response.json()
+        if 'quotes' in data:
+            return data['quotes']
+            
+    return None
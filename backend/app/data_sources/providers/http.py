@@ -0,0 +1,86 @@
+"""
+Shared HTTP sessions for Yahoo-backed providers
+"""
+
+import random
+import time
+
+# List of common user agents to rotate
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Safari/605.1.15',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:124.0) Gecko/20100101 Firefox/124.0',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:109.0) Gecko/20100101 Firefox/118.0'
+]
+
+def get_session():
+    """Create a session with rotated headers to avoid bot detection"""
+    import requests
+    
+    session = requests.Session()
+    
+    # Add small random delay to reduce burstiness
+    time.sleep(random.uniform(0.1, 0.5))
+    
+    user_agent = random.choice(USER_AGENTS)
+    
+    session.headers.update({
+        'User-Agent': user_agent,
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Referer': 'https://finance.yahoo.com',
+        'Origin': 'https://finance.yahoo.com',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+        'Sec-Fetch-Dest': 'document',
+        'Sec-Fetch-Mode': 'navigate',
+        'Sec-Fetch-Site': 'none',
+        'Sec-Fetch-User': '?1',
+        'Cache-Control': 'max-age=0'
+    })
+    return session
+
+def get_request_session():
+    """Create a session with custom headers to avoid bot detection"""
+    import requests
+    
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.9',
+    })
+    return session
+
+def build_quote(closes, volume=0, currency: str = None) -> dict:
+    """
+    Build a quote dict from recent daily closes (oldest first)
+    
+    Returns:
+        Quote with price, previous close, change and volume, or None without data
+    """
+    closes = [float(c) for c in closes if c is not None and c == c]
+    if not closes:
+        return None
+    
+    price = closes[-1]
+    previous_close = closes[-2] if len(closes) > 1 else price
+    change = price - previous_close
+    
+    return {
+        "price": price,
+        "previous_close": previous_close,
+        "change": change,
+        "change_percent": change / previous_close * 100.0 if previous_close else 0.0,
+        "volume": int(volume or 0),
+        "currency": currency
+    }
+
+def history_period(period_days: int) -> str:
+    """Map a trading-day count to the smallest Yahoo range that covers it"""
+    for max_days, period in [(5, "5d"), (21, "1mo"), (63, "3mo"), (126, "6mo"),
+                             (252, "1y"), (504, "2y"), (1260, "5y"), (2520, "10y")]:
+        if period_days <= max_days:
+            return period
+    return "max"
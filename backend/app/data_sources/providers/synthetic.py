@@ -0,0 +1,74 @@
+"""
+Synthetic data provider: deterministic, symbol-seeded data with no network access
+
+Backed by the correlated factor-model market in app.data_sources.synthetic_market.
+"""
+
+import hashlib
+
+import numpy as np
+
+from app.data_sources.synthetic_market import generate_fundamentals, generate_index_prices, generate_prices
+
+NAME = "synthetic"
+
+def generate_fallback_prices(symbol: str, period_days: int) -> np.ndarray:
+    """
+    Generate a deterministic price history for a symbol or index (^ prefix)
+    
+    Stocks load on a shared market factor, so Beta/Correlation against the
+    synthetic index look realistic even when the API is down.
+    """
+    if symbol.startswith("^"):
+        return generate_index_prices(symbol, period_days)
+    return generate_prices(symbol, period_days)
+
+def fetch_prices(symbol: str, period_days: int):
+    """Generate a deterministic price history for the symbol"""
+    return generate_fallback_prices(symbol, period_days)
+
+def fetch_info(symbol: str):
+    """Generated fundamentals, named from the symbol master when it lists the symbol"""
+    from app.data_sources.symbol_index import lookup_symbol
+    
+    info = generate_fundamentals(symbol)
+    listing = lookup_symbol(symbol)
+    name = listing["name"] if listing else symbol
+    info.update({
+        "longName": name,
+        "shortName": name,
+        "exchange": listing["market"] if listing else "SYN",
+        "currency": "INR" if symbol.endswith((".NS", ".BO")) else "USD"
+    })
+    if listing and listing["sector"] != "N/A":
+        info["sector"] = listing["sector"]
+    return info
+
+def fetch_quotes(symbols: list):
+    """Quotes from the last two synthetic closes of each symbol"""
+    from app.data_sources.providers.http import build_quote
+    
+    quotes = {}
+    for symbol in symbols:
+        seed = int(hashlib.md5(symbol.encode()).hexdigest(), 16)
+        quotes[symbol] = build_quote(generate_fallback_prices(symbol, 2), 100000 + seed % 5000000)
+    return quotes
+
+def search_quotes(query: str):
+    """Match the static stock database, shaped like Yahoo autocomplete quotes"""
+    from app.data_sources.stock_search import STOCK_DATABASE
+    
+    q = query.strip().lower()
+    exchanges = {'NSE': 'NSI', 'BSE': 'BSI'}
+    
+    return [
+        {
+            'symbol': symbol,
+            'shortname': data['name'],
+            'exchange': exchanges.get(data['market'], data['market']),
+            'quoteType': 'EQUITY',
+            'sector': data['sector']
+        }
+        for symbol, data in STOCK_DATABASE.items()
+        if q in symbol.lower() or q in data['name'].lower()
+    ]
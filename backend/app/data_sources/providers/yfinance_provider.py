@@ -0,0 +1,65 @@
+"""
+yfinance data provider
+
+yfinance (and pandas under it) is imported on first use to keep startup fast.
+"""
+
+from app.data_sources.providers.http import build_quote, get_session, history_period
+from app.utils.logger import get_logger, log_hot
+
+logger = get_logger()
+
+NAME = "yfinance"
+
+def fetch_prices(symbol: str, period_days: int):
+    """Fetch closing prices via yfinance, or None if unavailable"""
+    log_hot("DEBUG", "Fetching prices for {} via yfinance", symbol)
+    import yfinance as yf
+    
+    # Use custom session
+    stock = yf.Ticker(symbol, session=get_session())
+    hist = stock.history(period=history_period(period_days))
+    
+    if hist.empty:
+        return None
+    
+    # Trim to requested length
+    return hist['Close'].values[-period_days:]
+
+def fetch_info(symbol: str):
+    """Fetch the fundamentals info dict via yfinance"""
+    import yfinance as yf
+    
+    stock = yf.Ticker(symbol, session=get_session())
+    return stock.info
+
+# Symbols per yf.download call
+QUOTE_CHUNK_SIZE = 100
+
+def fetch_quotes(symbols: list):
+    """Fetch latest quotes for many symbols with chunked multi-ticker downloads"""
+    import yfinance as yf
+    
+    quotes = {}
+    for start in range(0, len(symbols), QUOTE_CHUNK_SIZE):
+        chunk = symbols[start:start + QUOTE_CHUNK_SIZE]
+        data = yf.download(chunk, period="5d", interval="1d", group_by="ticker",
+                           threads=True, progress=False, session=get_session())
+        if data is None or data.empty:
+            continue
+        
+        for symbol in chunk:
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            frame = data[symbol]
+            closes = frame["Close"].dropna().values
+            volumes = frame["Volume"].dropna().values
+            quote = build_quote(closes, volumes[-1] if len(volumes) else 0)
+            if quote:
+                quotes[symbol] = quote
+    
+    return quotes
+
+def search_quotes(query: str):
+    """yfinance has no autocomplete API; defer to the next provider"""
+    return None
@@ -0,0 +1,69 @@
+"""
+Version tags for the data behind a stock analysis
+
+The snapshot only peeks at cached inputs (prices, benchmark index,
+fundamentals, news) and never fetches, so it is cheap enough to check on
+every request before deciding whether anything has to be recomputed. When
+an input is not cached (or has expired) there is no snapshot, and callers
+run the analysis, which fetches and caches the inputs again.
+"""
+
+from typing import Optional
+
+from app.utils.cache import peek_cache
+from app.utils.config import get_risk_engine_config
+from app.utils.http_cache import fingerprint
+
+# Benchmark used by the market risk metrics
+BENCHMARK_INDEX = "^GSPC"
+
+# Bump when the risk model or response shape changes so old tags stop matching
+ANALYSIS_VERSION = "2"
+
+def price_version(prices) -> dict:
+    """Version of a price series: length, last close and a content digest"""
+    if prices is None or len(prices) == 0:
+        return {"bars": 0}
+    return {"bars": len(prices), "last": round(float(prices[-1]), 6), "digest": fingerprint(prices)}
+
+def news_version(news_context: list) -> str:
+    """Digest of the news items that would be shown and sent to the LLM"""
+    return fingerprint([
+        (item.get("title"), item.get("url"), item.get("source"), item.get("confidence"))
+        for item in news_context
+    ])
+
+def get_analysis_snapshot(symbol: str, include_news: bool = True) -> Optional[dict]:
+    """
+    Versions of every input of a stock analysis, from the cache only
+
+    Args:
+        symbol: Stock ticker symbol
+        include_news: Include the news context version
+
+    Returns:
+        Dictionary of version parts, suitable for make_etag, or None when
+        any input is not in the cache
+    """
+    period = get_risk_engine_config()["history_days"]
+    # Same keys as get_stock_prices, get_index_prices, get_stock_info and build_news_context
+    inputs = {
+        "prices": peek_cache(f"prices_{symbol}_{period}"),
+        "index": peek_cache(f"index_{BENCHMARK_INDEX}_{period}"),
+        "fundamentals": peek_cache(f"info_{symbol}")
+    }
+    if include_news:
+        inputs["news"] = peek_cache(f"news_context_{symbol}")
+    if any(value is None for value in inputs.values()):
+        return None
+
+    snapshot = {
+        "analysis": ANALYSIS_VERSION,
+        "symbol": symbol,
+        "prices": price_version(inputs["prices"]),
+        "index": price_version(inputs["index"]),
+        "fundamentals": fingerprint(inputs["fundamentals"])
+    }
+    if include_news:
+        snapshot["news"] = news_version(inputs["news"])
+    return snapshot
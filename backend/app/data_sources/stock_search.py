@@ -2,9 +2,14 @@
 Stock search and lookup using real APIs with fallback
 """
 
-import yfinance as yf
+from typing import Optional
+
+from app.data_sources import providers
+from app.data_sources.market_data import get_stock_info
+from app.data_sources.symbol_index import search_symbols
+from app.utils.config import get_symbol_search_config
 from app.utils.logger import get_logger
-from app.utils.cache import get_cache, set_cache
+from app.utils.cache import get_cache, peek_cache, set_cache
 
 logger = get_logger()
 
@@ -45,61 +50,45 @@ STOCK_DATABASE = {
     'JNJ': {'name': 'Johnson & Johnson', 'market': 'NYSE', 'sector': 'Healthcare'},
 }
 
-import requests
-
-def get_request_session():
-    """Create a session with custom headers to avoid bot detection"""
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-    })
-    return session
-
 def fetch_yahoo_autocomplete(query: str):
     """
-    Fetch autocomplete results from Yahoo Finance
+    Fetch autocomplete results from the configured provider (Yahoo by default)
     """
     try:
-        session = get_request_session()
-        # Use query2 which is often more reliable
-        url = "https://query2.finance.yahoo.com/v1/finance/search"
-        
-        params = {
-            'q': query,
-            'quotesCount': 25, # Increased to ensure Indian stocks are found even if buried
-            'newsCount': 0,
-            'enableFuzzyQuery': 'true',
-            'enableCb': 'true'
-        }
-        
-        response = session.get(url, params=params, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if 'quotes' in data:
-                return data['quotes']
-                
-        return []
+        quotes, source = providers.search_quotes(query)
+        return quotes or []
     except Exception as e:
         logger.error(f"Error fetching Yahoo autocomplete: {e}")
         return []
 
-def search_stocks_yfinance(query: str, limit: int = 10) -> list:
+def search_stocks_yfinance(query: str, limit: int = 10, markets: Optional[list] = None) -> list:
     """
-    Search for stocks using Yahoo Autocomplete API as primary source
+    Search for stocks in the local symbol index, asking Yahoo Autocomplete only on a miss
+    
+    Args:
+        query: Symbol or company name fragment
+        limit: Maximum results
+        markets: Markets to include (None uses SEARCH_MARKETS, [] means all)
     """
     try:
         logger.info(f"Searching for stocks: {query}")
         
+        # 1. Local symbol index (no network)
+        results = search_symbols(query, limit, markets)
+        if results or not get_symbol_search_config()["yahoo_fallback"]:
+            return results
+        
+        if markets is None:
+            markets = get_symbol_search_config()["markets"]
+        allowed = set(m.upper() for m in markets)
+        
         # Check cache
-        cache_key = f"search_{query}_{limit}"
+        cache_key = f"search_{query}_{limit}_{','.join(sorted(allowed))}"
         cached_result = get_cache(cache_key)
         if cached_result:
             return cached_result
         
-        # 1. Fetch from Yahoo Autocomplete API (Primary Source)
+        # 2. Fetch from Yahoo Autocomplete API
         results = []
         seen_symbols = set()
         
@@ -116,23 +105,26 @@ def search_stocks_yfinance(query: str, limit: int = 10) -> list:
                 
                 market = item.get('exchange', 'Unknown')
                 
-                # Strict Filter: Only allow Indian Markets (NSE/BSE)
-                final_market = None
-                
                 # Check 1: Symbol suffix (Strongest signal)
                 if symbol.endswith('.NS'):
                     final_market = 'NSE'
                 elif symbol.endswith('.BO'):
                     final_market = 'BSE'
                 
-                # Check 2: Exchange code (if suffix missing but valid exchange)
+                # Check 2: Exchange code
                 elif market in ['NSI', 'NSE']:
                     final_market = 'NSE'
                 elif market in ['BSI', 'BSE']:
                     final_market = 'BSE'
+                elif market in ['NMS', 'NGM', 'NCM', 'NASDAQ']:
+                    final_market = 'NASDAQ'
+                elif market in ['NYQ', 'NYSE']:
+                    final_market = 'NYSE'
+                else:
+                    final_market = market
 
-                # Skip if not identified as Indian market
-                if not final_market:
+                # Skip markets outside the filter (NSE/BSE by default)
+                if allowed and final_market not in allowed:
                     continue
                 
                 # Clean up name
@@ -182,41 +174,51 @@ def get_popular_us_stocks() -> list:
         if '.NS' not in symbol and '.BO' not in symbol
     ][:10]
 
+def _static_stock_info(symbol: str) -> dict:
+    data = STOCK_DATABASE[symbol]
+    return {
+        'symbol': symbol,
+        'name': data['name'],
+        'market': data['market'],
+        'sector': data['sector'],
+        'industry': data.get('industry', 'N/A'),
+        'market_cap': 0,
+        'currency': 'USD' if '.NS' not in symbol else 'INR',
+        'current_price': 0,
+        'previous_close': 0,
+        'volume': 0
+    }
+
+def _format_stock_info(symbol: str, info: dict) -> dict:
+    return {
+        'symbol': symbol,
+        'name': info.get('longName', info.get('shortName', symbol)),
+        'market': info.get('exchange', 'Unknown'),
+        'sector': info.get('sector', 'N/A'),
+        'industry': info.get('industry', 'N/A'),
+        'market_cap': info.get('marketCap', 0),
+        'currency': info.get('currency', 'USD'),
+        'current_price': info.get('currentPrice', 0),
+        'previous_close': info.get('previousClose', 0),
+        'volume': info.get('volume', 0)
+    }
+
+def peek_stock_info_api(symbol: str) -> Optional[dict]:
+    """Stock information from the static database or cached fundamentals, or None; never fetches"""
+    if symbol in STOCK_DATABASE:
+        return _static_stock_info(symbol)
+    info = peek_cache(f"info_{symbol}")
+    return _format_stock_info(symbol, info) if info is not None else None
+
 def get_stock_info_api(symbol: str) -> dict:
     """Get detailed stock information"""
     try:
         # Check static database first
         if symbol in STOCK_DATABASE:
-            data = STOCK_DATABASE[symbol]
-            return {
-                'symbol': symbol,
-                'name': data['name'],
-                'market': data['market'],
-                'sector': data['sector'],
-                'industry': data.get('industry', 'N/A'),
-                'market_cap': 0,
-                'currency': 'USD' if '.NS' not in symbol else 'INR',
-                'current_price': 0,
-                'previous_close': 0,
-                'volume': 0
-            }
-        
-        # Try yfinance
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
+            return _static_stock_info(symbol)
         
-        return {
-            'symbol': symbol,
-            'name': info.get('longName', info.get('shortName', symbol)),
-            'market': info.get('exchange', 'Unknown'),
-            'sector': info.get('sector', 'N/A'),
-            'industry': info.get('industry', 'N/A'),
-            'market_cap': info.get('marketCap', 0),
-            'currency': info.get('currency', 'USD'),
-            'current_price': info.get('currentPrice', 0),
-            'previous_close': info.get('previousClose', 0),
-            'volume': info.get('volume', 0)
-        }
+        # Cached fundamentals, shared with the risk engine
+        return _format_stock_info(symbol, get_stock_info(symbol))
     except Exception as e:
         logger.error(f"Error getting stock info for {symbol}: {e}")
         return {
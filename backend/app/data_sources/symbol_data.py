@@ -0,0 +1,94 @@
+"""
+Per-request bundle of everything the risk engines need for one symbol
+
+Prices, benchmark prices and fundamentals are loaded once (concurrently when
+they are not cached) and returns are computed once, then the bundle is passed
+explicitly to the market and financial risk functions.
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.data_sources.indices import get_index_prices
+from app.data_sources.market_data import get_stock_info, get_stock_prices
+from app.utils.cache import is_cached
+from app.utils.config import get_risk_engine_config
+from app.utils.logger import get_logger, log_hot
+
+logger = get_logger()
+
+DEFAULT_INDEX = "^GSPC"
+
+# Shared by all requests; bundle loads never submit to it recursively
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="symbol-data")
+
+def _load(fn, cache_key: str, *args):
+    """Start a load: in the pool when it needs a fetch, inline when it is cached"""
+    if is_cached(cache_key):
+        value = fn(*args)
+        return lambda: value
+    # Carry context variables (quiet_symbol_logs) into the pool thread
+    future = _executor.submit(contextvars.copy_context().run, fn, *args)
+    return future.result
+
+def simple_returns(prices: np.ndarray) -> np.ndarray:
+    """Period-over-period simple returns of a price series"""
+    return np.diff(prices) / prices[:-1]
+
+def has_fundamentals(info: dict) -> bool:
+    """Whether a stock info dict is usable or the fundamentals must be estimated"""
+    return bool(info) and len(info) >= 5
+
+def load_symbol_data(symbol: str, index: str = DEFAULT_INDEX, period: int = None) -> dict:
+    """
+    Load the data bundle for one symbol
+
+    Args:
+        symbol: Stock ticker symbol
+        index: Benchmark index symbol
+        period: Number of trading days (defaults to RISK_HISTORY_DAYS)
+
+    Returns:
+        Dictionary with:
+            symbol, index, period
+            prices: closing prices
+            returns: returns over the full price series
+            aligned_returns / benchmark_returns: stock and index returns over
+                their common (most recent) window
+            info: fundamentals snapshot (may be empty)
+            fundamentals_estimated: True when info is unusable and the
+                financial metrics fall back to estimates
+    """
+    period = period or get_risk_engine_config()["history_days"]
+    
+    # Uncached benchmark and fundamentals load in the pool while this thread
+    # loads prices; warm requests skip the thread handoff entirely
+    index_result = _load(get_index_prices, f"index_{index}_{period}", index, period)
+    info_result = _load(get_stock_info, f"info_{symbol}", symbol)
+
+    prices = get_stock_prices(symbol, period)
+    index_prices = index_result()
+    info = info_result()
+
+    min_len = min(len(prices), len(index_prices))
+    returns = simple_returns(prices)
+
+    data = {
+        "symbol": symbol,
+        "index": index,
+        "period": period,
+        "prices": prices,
+        "returns": returns,
+        # Reuse the stock returns when no trimming is needed
+        "aligned_returns": returns if min_len == len(prices) else simple_returns(prices[-min_len:]),
+        "benchmark_returns": simple_returns(index_prices[-min_len:]),
+        "info": info,
+        "fundamentals_estimated": not has_fundamentals(info)
+    }
+
+    if data["fundamentals_estimated"]:
+        log_hot("WARNING", "Using SMART estimated fundamentals for {} due to missing data", symbol)
+
+    return data
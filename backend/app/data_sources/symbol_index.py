@@ -0,0 +1,243 @@
+"""
+In-memory symbol index for autocomplete, built from a local symbol master
+
+Prefix lookups run on a sorted key array with bisect, so typical queries
+answer in microseconds without touching the network. Name tokens support
+multi-word queries ("tata mot"), and misspellings fall back to fuzzy
+matching over the token vocabulary.
+"""
+
+import bisect
+import csv
+import difflib
+import os
+import re
+import threading
+from typing import Optional
+
+from app.utils.config import get_symbol_search_config
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+DEFAULT_MASTER_PATH = os.path.join(os.path.dirname(__file__), "data", "symbol_master.csv")
+
+# Match kinds, best first
+EXACT_SYMBOL = 0
+SYMBOL_PREFIX = 1
+NAME_PREFIX = 2
+TOKEN_PREFIX = 3
+FUZZY = 4
+
+_KIND_SCORES = {EXACT_SYMBOL: 100, SYMBOL_PREFIX: 80, NAME_PREFIX: 60, TOKEN_PREFIX: 40, FUZZY: 20}
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9&]+")
+
+_index = None
+_index_lock = threading.Lock()
+
+def tokenize(text: str) -> list:
+    """Lowercase alphanumeric tokens of a company name or query"""
+    return _TOKEN_PATTERN.findall((text or "").lower())
+
+def symbol_base(symbol: str) -> str:
+    """Symbol without its exchange suffix, lowercased (RELIANCE.NS -> reliance)"""
+    return symbol.lower().rsplit(".", 1)[0] if "." in symbol else symbol.lower()
+
+def load_symbol_master(path: str) -> list:
+    """
+    Read a symbol master CSV
+
+    Args:
+        path: CSV with symbol, name, market and sector columns
+
+    Returns:
+        List of entry dicts
+    """
+    entries = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            symbol = (row.get("symbol") or "").strip()
+            if not symbol:
+                continue
+            entries.append({
+                "symbol": symbol,
+                "name": (row.get("name") or symbol).strip(),
+                "market": (row.get("market") or "Unknown").strip().upper(),
+                "sector": (row.get("sector") or "N/A").strip()
+            })
+    return entries
+
+def build_symbol_index(entries: list) -> dict:
+    """
+    Build the sorted prefix arrays for a list of master entries
+
+    Symbol keys (base and full symbol) and name token keys live in separate
+    sorted arrays so a prefix scan only visits keys that can match.
+    """
+    symbol_keys = []
+    token_keys = []
+
+    for idx, entry in enumerate(entries):
+        base = symbol_base(entry["symbol"])
+        full = entry["symbol"].lower()
+        symbol_keys.append((base, idx))
+        if full != base:
+            symbol_keys.append((full, idx))
+
+        for position, token in enumerate(dict.fromkeys(tokenize(entry["name"]))):
+            token_keys.append((token, idx, position))
+
+    symbol_keys.sort()
+    token_keys.sort()
+
+    return {
+        "entries": entries,
+        "symbol_keys": [key for key, _ in symbol_keys],
+        "symbol_ids": [idx for _, idx in symbol_keys],
+        "token_keys": [key for key, _, _ in token_keys],
+        "token_ids": [(idx, position) for _, idx, position in token_keys],
+        "vocabulary": sorted(set(key for key, _, _ in token_keys) | set(key for key, _ in symbol_keys))
+    }
+
+def get_symbol_index() -> dict:
+    """Get the symbol index, building it from the master file on first use"""
+    global _index
+
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                path = get_symbol_search_config()["master_path"] or DEFAULT_MASTER_PATH
+                try:
+                    entries = load_symbol_master(path)
+                except OSError as e:
+                    logger.error(f"Could not load symbol master {path}: {e}")
+                    entries = []
+                _index = build_symbol_index(entries)
+                logger.info(f"Built symbol index with {len(entries)} listings from {path}")
+
+    return _index
+
+def reload_symbol_index():
+    """Drop the index so the next search rebuilds it from the master file"""
+    global _index
+    with _index_lock:
+        _index = None
+
+def lookup_symbol(symbol: str) -> Optional[dict]:
+    """Exact symbol lookup in the master (case-insensitive), or None"""
+    index = get_symbol_index()
+    key = symbol.lower()
+    i = bisect.bisect_left(index["symbol_keys"], key)
+    while i < len(index["symbol_keys"]) and index["symbol_keys"][i] == key:
+        entry = index["entries"][index["symbol_ids"][i]]
+        if entry["symbol"].lower() == key:
+            return entry
+        i += 1
+    return None
+
+def _prefix_range(keys: list, prefix: str) -> range:
+    lo = bisect.bisect_left(keys, prefix)
+    hi = bisect.bisect_left(keys, prefix + "\uffff")
+    return range(lo, hi)
+
+def _token_matches(index: dict, token: str) -> dict:
+    """entry idx -> best match kind for one query token against name tokens"""
+    matches = {}
+    for i in _prefix_range(index["token_keys"], token):
+        idx, position = index["token_ids"][i]
+        kind = NAME_PREFIX if position == 0 else TOKEN_PREFIX
+        if kind < matches.get(idx, FUZZY + 1):
+            matches[idx] = kind
+    return matches
+
+def _candidates(index: dict, compact: str, query: str) -> dict:
+    """entry idx -> best match kind for a compact symbol query and a tokenized name query"""
+    matches = {}
+
+    for i in _prefix_range(index["symbol_keys"], compact):
+        idx = index["symbol_ids"][i]
+        kind = EXACT_SYMBOL if index["symbol_keys"][i] == compact else SYMBOL_PREFIX
+        if kind < matches.get(idx, FUZZY + 1):
+            matches[idx] = kind
+
+    tokens = tokenize(query)
+    if tokens:
+        # Every query token must prefix-match a name token
+        token_sets = [_token_matches(index, token) for token in tokens]
+        common = set(token_sets[0]).intersection(*token_sets[1:])
+        for idx in common:
+            kind = token_sets[0][idx] if len(tokens) == 1 else max(s[idx] for s in token_sets)
+            if kind < matches.get(idx, FUZZY + 1):
+                matches[idx] = kind
+
+    return matches
+
+def _fuzzy_candidates(index: dict, query: str, cutoff: float) -> dict:
+    matches = {}
+    for token in tokenize(query):
+        for close in difflib.get_close_matches(token, index["vocabulary"], n=5, cutoff=cutoff):
+            for idx in _token_matches(index, close):
+                matches[idx] = FUZZY
+            for i in _prefix_range(index["symbol_keys"], close):
+                if index["symbol_keys"][i] == close:
+                    matches[index["symbol_ids"][i]] = FUZZY
+    return matches
+
+def search_symbols(query: str, limit: int = 10, markets: Optional[list] = None) -> list:
+    """
+    Search the local symbol index
+
+    Args:
+        query: Symbol or company name fragment
+        limit: Maximum results
+        markets: Markets to include (None uses SEARCH_MARKETS, [] means all)
+
+    Returns:
+        Ranked list of {symbol, name, market, sector, type, score}
+    """
+    compact = re.sub(r"\s+", "", (query or "").lower())
+    normalized = " ".join(tokenize(query))
+    if not compact:
+        return []
+
+    config = get_symbol_search_config()
+    if markets is None:
+        markets = config["markets"]
+    allowed = set(m.upper() for m in markets)
+
+    index = get_symbol_index()
+    entries = index["entries"]
+
+    def in_markets(idx):
+        return not allowed or entries[idx]["market"] in allowed
+
+    matches = {idx: kind for idx, kind in _candidates(index, compact, normalized).items() if in_markets(idx)}
+    if not matches:
+        matches = {idx: kind for idx, kind in _fuzzy_candidates(index, normalized, config["fuzzy_cutoff"]).items()
+                   if in_markets(idx)}
+
+    # Preferred markets first on ties, in configured order
+    market_rank = {market: rank for rank, market in enumerate(markets)}
+
+    ranked = sorted(
+        matches.items(),
+        key=lambda item: (
+            item[1],
+            len(symbol_base(entries[item[0]]["symbol"])),
+            market_rank.get(entries[item[0]]["market"], len(market_rank)),
+            entries[item[0]]["symbol"]
+        )
+    )
+
+    return [
+        {
+            "symbol": entries[idx]["symbol"],
+            "name": entries[idx]["name"],
+            "market": entries[idx]["market"],
+            "sector": entries[idx]["sector"],
+            "type": "stock",
+            "score": _KIND_SCORES[kind]
+        }
+        for idx, kind in ranked[:limit]
+    ]
@@ -0,0 +1,239 @@
+"""
+Synthetic correlated market: prices and fundamentals for any symbol universe
+
+Daily returns follow a factor model:
+
+    r[i, t] = drift[i] + beta[i] * market[t] + loading[i] * sector[s(i), t] + vol[i] * noise[i, t]
+
+The market and sector factors come from fixed seeds. Each symbol's
+parameters and noise come from its own np.random.Generator stream, seeded
+from the symbol name, so results never depend on global random state or on
+which other symbols are generated alongside. Prices are built with a
+vectorized cumprod.
+
+Random draws are made in blocks counted back from the most recent day, and
+each price path ends at the symbol's anchor price. Series of different
+lengths therefore share their most recent bars, and a symbol's prices line
+up with the index prices however much history is asked for.
+"""
+
+import hashlib
+from functools import lru_cache
+
+import numpy as np
+
+# Trading days per random block (about five years)
+BLOCK_DAYS = 1260
+
+MARKET_SEED = 20240101
+NUM_SECTORS = 11
+SECTOR_NAMES = [
+    "Technology", "Financial Services", "Healthcare", "Consumer Cyclical", "Industrials",
+    "Communication Services", "Consumer Defensive", "Energy", "Basic Materials", "Real Estate", "Utilities"
+]
+
+# Daily market factor (about 16% annualized volatility, 7% drift)
+MARKET_DRIFT = 0.00028
+MARKET_VOL = 0.010
+SECTOR_VOL = 0.006
+
+# Stream ids inside a symbol's seed sequence
+_PARAMS_STREAM = 0
+_FUNDAMENTALS_STREAM = 1
+_NOISE_STREAM = 2
+
+def symbol_seed(symbol: str) -> int:
+    """Stable 64-bit seed for a symbol (independent of PYTHONHASHSEED)"""
+    return int.from_bytes(hashlib.blake2b(symbol.encode(), digest_size=8).digest(), "little")
+
+def symbol_rng(symbol: str, stream: int, block: int = 0) -> np.random.Generator:
+    """Independent generator for one (symbol, stream, block)"""
+    return np.random.default_rng(np.random.SeedSequence([symbol_seed(symbol), stream, block]))
+
+def _blocks(period_days: int) -> int:
+    return -(-period_days // BLOCK_DAYS)
+
+def _backward_draws(make_rng, period_days: int, width: int = 1) -> np.ndarray:
+    """
+    period_days x width standard normals in chronological order
+
+    make_rng(block) returns the generator for a block of BLOCK_DAYS draws,
+    where block 0 holds the most recent days. Generator output is prefix
+    stable, so a partial last block matches the start of the full block.
+    """
+    draws = np.concatenate([
+        make_rng(block).standard_normal((min(BLOCK_DAYS, period_days - block * BLOCK_DAYS), width))
+        for block in range(_blocks(period_days))
+    ])
+    return draws[::-1]
+
+@lru_cache(maxsize=8)
+def _factor_draws(blocks: int) -> np.ndarray:
+    # Shared by every symbol, so drawn once per history length bucket
+    draws = _backward_draws(
+        lambda block: np.random.default_rng(np.random.SeedSequence([MARKET_SEED, block])),
+        blocks * BLOCK_DAYS,
+        1 + NUM_SECTORS
+    )
+    draws.flags.writeable = False
+    return draws
+
+def factor_returns(period_days: int) -> dict:
+    """
+    Market and sector factor returns
+
+    Returns:
+        {"market": (period_days,), "sectors": (NUM_SECTORS, period_days)}
+    """
+    draws = _factor_draws(_blocks(period_days))[-period_days:]
+    return {
+        "market": MARKET_DRIFT + MARKET_VOL * draws[:, 0],
+        "sectors": SECTOR_VOL * draws[:, 1:].T
+    }
+
+def sector_index(symbol: str) -> int:
+    """Synthetic sector of a symbol"""
+    return symbol_seed(symbol) % NUM_SECTORS
+
+@lru_cache(maxsize=16384)
+def symbol_params(symbol: str) -> dict:
+    """Factor loadings, volatility and price level of a symbol (cached, do not mutate)"""
+    rng = symbol_rng(symbol, _PARAMS_STREAM)
+    beta, loading, vol, drift, log_price = rng.uniform(
+        [0.5, 0.2, 0.008, -0.0002, np.log(20.0)],
+        [1.6, 0.9, 0.025, 0.0006, np.log(3000.0)]
+    )
+    return {
+        "beta": beta,
+        "sector_loading": loading,
+        "idio_vol": vol,
+        "drift": drift,
+        "anchor_price": round(float(np.exp(log_price)), 2),
+        "sector": sector_index(symbol)
+    }
+
+def prices_from_returns(returns: np.ndarray, anchor: np.ndarray) -> np.ndarray:
+    """
+    Price paths ending at anchor from returns along the last axis
+
+    The first return of each path is not applied, so a path of n prices uses
+    n - 1 returns.
+    """
+    growth = np.cumprod(1.0 + returns[..., 1:], axis=-1)
+    ones = np.ones(returns.shape[:-1] + (1,), dtype=growth.dtype)
+    paths = np.concatenate([ones, growth], axis=-1)
+    return paths * (np.asarray(anchor)[..., None] / paths[..., -1:])
+
+def generate_universe(symbols: list, period_days: int, dtype=np.float64) -> dict:
+    """
+    Generate correlated price histories for many symbols at once
+
+    Args:
+        symbols: Ticker symbols (thousands are fine)
+        period_days: Trading days of history (decades are fine, e.g. 252 * 30)
+        dtype: Result dtype (float32 halves memory for very large universes)
+
+    Returns:
+        Dictionary with symbols, prices (n x period_days), returns
+        (n x period_days) and the shared factor returns
+    """
+    factors = factor_returns(period_days)
+    params = [symbol_params(symbol) for symbol in symbols]
+
+    beta = np.array([p["beta"] for p in params])[:, None]
+    loading = np.array([p["sector_loading"] for p in params])[:, None]
+    vol = np.array([p["idio_vol"] for p in params])[:, None]
+    drift = np.array([p["drift"] for p in params])[:, None]
+    sectors = np.array([p["sector"] for p in params], dtype=int)
+
+    # One noise stream per symbol, so each row matches generate_prices(symbol)
+    noise = np.stack([
+        _backward_draws(lambda block, symbol=symbol: symbol_rng(symbol, _NOISE_STREAM, block), period_days)[:, 0]
+        for symbol in symbols
+    ]) if symbols else np.zeros((0, period_days))
+
+    returns = drift + beta * factors["market"] + loading * factors["sectors"][sectors] + vol * noise
+    prices = prices_from_returns(returns, np.array([p["anchor_price"] for p in params]))
+
+    return {
+        "symbols": list(symbols),
+        "prices": prices.astype(dtype, copy=False),
+        "returns": returns.astype(dtype, copy=False),
+        "factors": factors
+    }
+
+def generate_prices(symbol: str, period_days: int) -> np.ndarray:
+    """Price history of one symbol, identical to its row in generate_universe"""
+    return generate_universe([symbol], period_days)["prices"][0]
+
+def generate_index_prices(index_symbol: str, period_days: int) -> np.ndarray:
+    """
+    Index price history: the market factor plus a little tracking noise
+
+    Every index follows the same market factor, so synthetic stocks have
+    realistic betas and correlations against any benchmark.
+    """
+    noise = _backward_draws(lambda block: symbol_rng(index_symbol, _NOISE_STREAM, block), period_days)[:, 0]
+    returns = factor_returns(period_days)["market"] + 0.001 * noise
+    anchor = symbol_params(index_symbol)["anchor_price"] * 10
+    return prices_from_returns(returns, anchor)
+
+def generate_fundamentals(symbol: str) -> dict:
+    """
+    Deterministic fundamentals shaped like Yahoo quote info
+
+    Returns:
+        Dictionary with balance sheet, income statement and valuation keys
+        (totalDebt, ebit, interestExpense, trailingEps, marketCap, ...), plus
+        earningsVariability, the coefficient of variation used to simulate
+        earnings history
+    """
+    params = symbol_params(symbol)
+    rng = symbol_rng(symbol, _FUNDAMENTALS_STREAM)
+
+    revenue = float(np.exp(rng.normal(np.log(5e9), 1.0)))
+    operating_margin = rng.uniform(0.05, 0.35)
+    debt_to_equity = rng.uniform(0.1, 2.5)
+    interest_rate = rng.uniform(0.03, 0.08)
+    earnings_variability = rng.uniform(0.05, 0.45)
+
+    ebit = revenue * operating_margin
+    equity = revenue * rng.uniform(0.3, 1.5)
+    debt = equity * debt_to_equity
+    interest_expense = max(debt * interest_rate, 1.0)
+    net_income = (ebit - interest_expense) * 0.75
+
+    price = params["anchor_price"]
+    pe_ratio = rng.uniform(10, 40)
+    market_cap = max(net_income, revenue * 0.02) * pe_ratio
+    shares = market_cap / price
+
+    return {
+        "symbol": symbol,
+        "sector": SECTOR_NAMES[params["sector"]],
+        "currentPrice": price,
+        "marketCap": market_cap,
+        "sharesOutstanding": shares,
+        "totalRevenue": revenue,
+        "operatingIncome": ebit,
+        "ebit": ebit,
+        "ebitda": ebit * rng.uniform(1.1, 1.4),
+        "interestExpense": interest_expense,
+        "netIncomeToCommon": net_income,
+        "totalDebt": debt,
+        "totalStockholderEquity": equity,
+        "bookValue": equity / shares,
+        "totalAssets": equity + debt * 1.3,
+        "totalCurrentAssets": revenue * rng.uniform(0.2, 0.6),
+        "totalCurrentLiabilities": revenue * rng.uniform(0.1, 0.4),
+        "trailingEps": net_income / shares,
+        "beta": params["beta"],
+        "earningsVariability": earnings_variability
+    }
+
+def generate_earnings_history(symbol: str, periods: int) -> list:
+    """Quarterly EPS with the symbol's earnings variability, oldest first"""
+    fundamentals = generate_fundamentals(symbol)
+    quarterly_eps = abs(fundamentals["trailingEps"]) / 4 or 0.5
+    noise = symbol_rng(symbol, _FUNDAMENTALS_STREAM, block=1).standard_normal(periods)
+    return (quarterly_eps * (1 + fundamentals["earningsVariability"] * noise)).tolist()
@@ -0,0 +1,160 @@
+"""
+Startup cache warm-up and refresh-ahead for hot symbols
+"""
+
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from app.data_sources.indices import get_index_prices
+from app.data_sources.market_data import get_stock_info, get_stock_prices
+from app.utils.cache import get_expiring_keys
+from app.utils.config import get_risk_engine_config, get_warmup_config
+from app.utils.logger import get_logger, quiet_symbol_logs
+
+logger = get_logger()
+
+# Symbols requested through the API since startup
+_request_counts = Counter()
+_counts_lock = threading.Lock()
+MAX_TRACKED_SYMBOLS = 5000
+
+_status = {"state": "idle", "symbols": 0, "completed": 0, "failed": 0, "started_at": None, "finished_at": None}
+
+_stats = {"refresh_cycles": 0, "refreshed": 0, "refresh_failures": 0}
+
+# Guards _status and _stats, which pool threads update concurrently
+_status_lock = threading.Lock()
+
+def record_symbol_request(symbol: str):
+    """Count a user request for a symbol (feeds the hot symbol list)"""
+    with _counts_lock:
+        _request_counts[symbol] += 1
+        if len(_request_counts) > MAX_TRACKED_SYMBOLS:
+            # Keep the busier half so the counter stays bounded
+            for name, _ in _request_counts.most_common()[MAX_TRACKED_SYMBOLS // 2:]:
+                del _request_counts[name]
+
+def get_hot_symbols(limit: int) -> list:
+    """
+    Symbols worth keeping warm: most requested first, then the configured list
+
+    Args:
+        limit: Maximum number of symbols
+
+    Returns:
+        List of ticker symbols
+    """
+    with _counts_lock:
+        requested = [symbol for symbol, _ in _request_counts.most_common(limit)]
+
+    configured = get_warmup_config()["symbols"]
+    if not configured:
+        from app.data_sources.stock_search import STOCK_DATABASE
+        configured = list(STOCK_DATABASE)
+
+    hot = list(dict.fromkeys(requested + configured))
+    return hot[:limit]
+
+def _quietly(task):
+    # Context variables do not follow work into pool threads, so set it there
+    with quiet_symbol_logs():
+        return task()
+
+def _warm_symbol(symbol: str, force_refresh: bool = False):
+    get_stock_prices(symbol, get_risk_engine_config()["history_days"], force_refresh=force_refresh)
+    get_stock_info(symbol, force_refresh=force_refresh)
+
+def warm_up() -> dict:
+    """
+    Prefetch benchmark indices and hot symbols in parallel (blocking)
+
+    Returns:
+        Warm-up status
+    """
+    config = get_warmup_config()
+    symbols = get_hot_symbols(config["max_symbols"])
+
+    with _status_lock:
+        _status.update({
+            "state": "running",
+            "symbols": len(symbols) + len(config["indices"]),
+            "completed": 0,
+            "failed": 0,
+            "started_at": time.time(),
+            "finished_at": None
+        })
+    logger.info(f"Warming caches for {len(config['indices'])} indices and {len(symbols)} symbols")
+
+    def _run(task):
+        try:
+            _quietly(task)
+            with _status_lock:
+                _status["completed"] += 1
+        except Exception as e:
+            with _status_lock:
+                _status["failed"] += 1
+            logger.warning(f"Warm-up task failed: {e}")
+
+    # Indices first: every beta and correlation calculation needs them
+    period = get_risk_engine_config()["history_days"]
+    tasks = [lambda index=index: get_index_prices(index, period) for index in config["indices"]]
+    tasks += [lambda symbol=symbol: _warm_symbol(symbol) for symbol in symbols]
+
+    with ThreadPoolExecutor(max_workers=config["workers"], thread_name_prefix="warmup") as executor:
+        list(executor.map(_run, tasks))
+
+    with _status_lock:
+        _status.update({"state": "done", "finished_at": time.time()})
+        status = dict(_status)
+    logger.info(f"Cache warm-up finished in {status['finished_at'] - status['started_at']:.1f}s "
+                f"({status['failed']} failed)")
+    return status
+
+def refresh_expiring() -> int:
+    """
+    Refresh hot market data that expires within the refresh-ahead margin
+
+    Returns:
+        Number of entries refreshed
+    """
+    config = get_warmup_config()
+    hot = set(get_hot_symbols(config["max_symbols"])) | set(config["indices"])
+
+    tasks = []
+    for key in get_expiring_keys(config["refresh_margin"]):
+        namespace, _, rest = key.partition("_")
+        if namespace == "info":
+            symbol = rest
+            if symbol in hot:
+                tasks.append(lambda symbol=symbol: get_stock_info(symbol, force_refresh=True))
+        elif namespace in ("prices", "index"):
+            symbol, _, period = rest.rpartition("_")
+            if symbol in hot and period.isdigit():
+                fetch = get_stock_prices if namespace == "prices" else get_index_prices
+                tasks.append(lambda fetch=fetch, symbol=symbol, period=int(period): fetch(symbol, period, force_refresh=True))
+
+    refreshed = 0
+    if tasks:
+        with ThreadPoolExecutor(max_workers=config["workers"], thread_name_prefix="refresh-ahead") as executor:
+            for future in [executor.submit(_quietly, task) for task in tasks]:
+                try:
+                    future.result()
+                    refreshed += 1
+                except Exception as e:
+                    with _status_lock:
+                        _stats["refresh_failures"] += 1
+                    logger.warning(f"Refresh-ahead task failed: {e}")
+
+    with _status_lock:
+        _stats["refresh_cycles"] += 1
+        _stats["refreshed"] += refreshed
+    if refreshed:
+        logger.info(f"Refreshed {refreshed} expiring cache entries ahead of TTL")
+    return refreshed
+
+def get_warmup_status() -> dict:
+    """Warm-up progress and refresh-ahead counters"""
+    with _status_lock:
+        return {**_status, **_stats}
@@ -0,0 +1,132 @@
+"""
+Job handlers - Long-running analyses run in the worker processes
+
+Every handler takes the job parameters and a progress callback
+progress(fraction, message) and returns a JSON-serializable result. The
+callback raises CancelledError once the job has been cancelled, which
+stops the handler at its next report.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from app.data_sources.symbol_index import get_symbol_index
+from app.data_sources.warmup import record_symbol_request
+from app.risk_engine.aggregation import aggregate_stock_risk
+from app.risk_engine.portfolio_risk import calculate_portfolio_risk
+from app.scenarios.future_risk import simulate_portfolio
+from app.scenarios.stress_tests import stress_test_portfolio
+from app.utils.config import get_batch_analysis_config
+from app.utils.logger import get_logger, quiet_symbol_logs
+
+logger = get_logger()
+
+SCREEN_SORT_KEYS = ("risk_score", "volatility", "beta")
+
+def _analyze_symbols(symbols: list, progress, start: float = 0.0, end: float = 1.0) -> dict:
+    """
+    Risk result per symbol, analyzed in parallel with progress reports
+
+    Symbols whose analysis fails map to an {"error": ...} dict.
+    """
+    def analyze(symbol):
+        record_symbol_request(symbol)
+        try:
+            with quiet_symbol_logs():
+                return symbol, aggregate_stock_risk(symbol)
+        except Exception as e:
+            logger.warning(f"Job analysis failed for {symbol}: {e}")
+            return symbol, {"error": str(e)}
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=get_batch_analysis_config()["concurrency"],
+                            thread_name_prefix="job-analysis") as executor:
+        try:
+            for symbol, result in executor.map(analyze, symbols):
+                results[symbol] = result
+                progress(start + (end - start) * len(results) / len(symbols),
+                         f"Analyzed {len(results)}/{len(symbols)} symbols")
+        finally:
+            # On cancellation, do not start the symbols still waiting
+            executor.shutdown(wait=True, cancel_futures=True)
+    return results
+
+def run_portfolio_job(params: dict, progress) -> dict:
+    """Full portfolio analysis; the correlation matrix is summarized, not returned"""
+    holdings = params["holdings"]
+    risks = _analyze_symbols([h["symbol"] for h in holdings], progress, end=0.8)
+
+    portfolio_metrics = calculate_portfolio_risk(holdings, matrix_as_array=True)
+    portfolio_metrics.pop("correlation_matrix")
+    progress(0.95, "Portfolio metrics computed")
+
+    individual_risks = {s: r["overall_score"] for s, r in risks.items() if "error" not in r}
+    weighted = sum(individual_risks.get(h["symbol"], 0.0) * h["weight"] for h in holdings)
+    return {
+        "holdings": holdings,
+        "overall_risk_score": weighted,
+        "metrics": {
+            "portfolio_risk": portfolio_metrics,
+            "individual_risks": individual_risks,
+            "weighted_average_risk": weighted
+        },
+        "errors": {s: r["error"] for s, r in risks.items() if "error" in r}
+    }
+
+def run_screen_job(params: dict, progress) -> dict:
+    """
+    Rank a universe by risk, keeping symbols that pass the filters
+
+    Params: symbols (defaults to the symbol master), max_risk_score,
+    max_volatility, max_beta, sort_by and limit.
+    """
+    symbols = params.get("symbols") or [entry["symbol"] for entry in get_symbol_index()["entries"]]
+    risks = _analyze_symbols(symbols, progress, end=0.95)
+
+    limits = {"risk_score": params.get("max_risk_score"), "volatility": params.get("max_volatility"),
+              "beta": params.get("max_beta")}
+    rows = []
+    for symbol, risk in risks.items():
+        if "error" in risk:
+            continue
+        row = {
+            "symbol": symbol,
+            "risk_score": risk["overall_score"],
+            "volatility": risk["market_risk"]["volatility"],
+            "beta": risk["market_risk"]["beta"],
+            "component_scores": risk["component_scores"]
+        }
+        if all(limit is None or row[key] <= limit for key, limit in limits.items()):
+            rows.append(row)
+
+    sort_by = params.get("sort_by", "risk_score")
+    rows.sort(key=lambda row: row[sort_by])
+    limit = params.get("limit")
+    return {
+        "screened": len(symbols),
+        "matched": len(rows),
+        "sort_by": sort_by,
+        "results": rows[:limit] if limit else rows,
+        "errors": {s: r["error"] for s, r in risks.items() if "error" in r}
+    }
+
+def run_stress_job(params: dict, progress) -> dict:
+    """Stress scenarios for a portfolio"""
+    return stress_test_portfolio(params["holdings"], params.get("scenarios"), params.get("custom"), progress)
+
+def run_simulation_job(params: dict, progress) -> dict:
+    """Monte Carlo simulation of a portfolio"""
+    return simulate_portfolio(
+        params["holdings"],
+        horizon_days=params.get("horizon_days"),
+        paths=params.get("paths"),
+        confidence=params.get("confidence"),
+        seed=params.get("seed"),
+        progress=progress
+    )
+
+JOB_HANDLERS = {
+    "portfolio": run_portfolio_job,
+    "screen": run_screen_job,
+    "stress": run_stress_job,
+    "simulation": run_simulation_job
+}
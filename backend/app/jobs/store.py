@@ -0,0 +1,272 @@
+"""
+SQLite job queue and result store
+
+One table holds every job from submission to result. It is shared by the
+API process and the worker processes: the API submits, polls and cancels,
+the dispatcher claims jobs by priority, and workers write progress and
+results. Each process opens its own connection in WAL mode.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+from app.utils.config import get_job_config
+from app.utils.logger import get_logger
+from app.utils.serialization import dumps_json
+
+logger = get_logger()
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+
+# Lazily opened connection of this process (guarded by _lock)
+_connection = None
+_connection_pid = None
+_lock = threading.Lock()
+
+_STATUS_COLUMNS = ("id, type, status, priority, progress, message, error, cancel_requested, "
+                   "created_at, started_at, finished_at, expires_at")
+
+def _get_connection():
+    """Open (once per process) the SQLite database backing the queue"""
+    global _connection, _connection_pid
+
+    if _connection is None or _connection_pid != os.getpid():
+        path = get_job_config()["path"]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Autocommit; multi-statement changes use explicit BEGIN IMMEDIATE
+        _connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        _connection_pid = os.getpid()
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                result BLOB,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                heartbeat_at REAL,
+                finished_at REAL,
+                expires_at REAL
+            )"""
+        )
+        _connection.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at)")
+
+    return _connection
+
+def _row_to_status(row) -> dict:
+    job = dict(zip(("id", "type", "status", "priority", "progress", "message", "error", "cancel_requested",
+                    "created_at", "started_at", "finished_at", "expires_at"), row))
+    job["cancel_requested"] = bool(job["cancel_requested"])
+    return job
+
+def submit_job(job_type: str, params: dict, priority: int = 5) -> Optional[dict]:
+    """
+    Queue a job
+
+    Args:
+        job_type: Handler name (portfolio, screen, stress, simulation)
+        params: JSON-serializable handler parameters
+        priority: Higher runs first; equal priorities run in submission order
+
+    Returns:
+        Job status, or None when JOB_QUEUE_MAX jobs are already queued
+    """
+    config = get_job_config()
+    job_id = uuid.uuid4().hex
+    now = time.time()
+
+    with _lock:
+        conn = _get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= config["queue_max"]:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute(
+                "INSERT INTO jobs (id, type, params, status, priority, created_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, job_type, json.dumps(params), priority, now)
+            )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+
+    logger.info(f"Queued {job_type} job {job_id} (priority {priority})")
+    return get_job(job_id)
+
+def get_job(job_id: str) -> Optional[dict]:
+    """Job status without the result, or None when unknown or expired"""
+    with _lock:
+        row = _get_connection().execute(f"SELECT {_STATUS_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = _row_to_status(row)
+    if job["expires_at"] is not None and job["expires_at"] < time.time():
+        return None
+    return job
+
+def get_job_result(job_id: str) -> Optional[bytes]:
+    """Stored JSON result of a succeeded job, or None"""
+    with _lock:
+        row = _get_connection().execute(
+            "SELECT result, expires_at FROM jobs WHERE id = ? AND status = 'succeeded'", (job_id,)
+        ).fetchone()
+    if row is None or (row[1] is not None and row[1] < time.time()):
+        return None
+    return row[0]
+
+def claim_next_job() -> Optional[dict]:
+    """
+    Atomically move the highest-priority queued job to running
+
+    Returns:
+        Dictionary with id, type and params, or None when nothing is queued
+    """
+    now = time.time()
+    with _lock:
+        conn = _get_connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, type, params FROM jobs WHERE status = 'queued' "
+                "ORDER BY priority DESC, created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ?, message = NULL "
+                    "WHERE id = ?",
+                    (now, now, row[0])
+                )
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+    if row is None:
+        return None
+    return {"id": row[0], "type": row[1], "params": json.loads(row[2])}
+
+def report_progress(job_id: str, progress: float, message: str = None) -> bool:
+    """
+    Record progress of a running job
+
+    Returns:
+        True when cancellation has been requested
+    """
+    with _lock:
+        conn = _get_connection()
+        conn.execute(
+            "UPDATE jobs SET progress = ?, message = COALESCE(?, message), heartbeat_at = ? "
+            "WHERE id = ? AND status = 'running'",
+            (min(max(progress, 0.0), 1.0), message, time.time(), job_id)
+        )
+        row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return bool(row and row[0])
+
+def heartbeat_jobs(job_ids: list):
+    """Mark running jobs as alive (called by the dispatcher that owns them)"""
+    if not job_ids:
+        return
+    with _lock:
+        _get_connection().execute(
+            f"UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND id IN ({', '.join('?' * len(job_ids))})",
+            (time.time(), *job_ids)
+        )
+
+def finish_job(job_id: str, status: str, result=None, error: str = None):
+    """
+    Store the outcome of a running job
+
+    Args:
+        job_id: Job id
+        status: succeeded, failed or cancelled
+        result: Handler result (stored as JSON)
+        error: Failure message
+    """
+    now = time.time()
+    payload = dumps_json(result) if result is not None else None
+    with _lock:
+        _get_connection().execute(
+            # Success clears the last (throttled) progress message; other outcomes keep it
+            "UPDATE jobs SET status = ?, result = ?, error = ?, "
+            "progress = CASE WHEN ? = 'succeeded' THEN 1 ELSE progress END, "
+            "message = CASE WHEN ? = 'succeeded' THEN NULL ELSE message END, "
+            "finished_at = ?, expires_at = ? WHERE id = ? AND status = 'running'",
+            (status, payload, error, status, status, now, now + get_job_config()["result_ttl"], job_id)
+        )
+
+def cancel_job(job_id: str) -> Optional[dict]:
+    """
+    Cancel a job: queued jobs stop at once, running jobs at their next progress report
+
+    Returns:
+        Updated job status, or None when unknown or expired
+    """
+    now = time.time()
+    with _lock:
+        conn = _get_connection()
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, expires_at = ? WHERE id = ? AND status = 'queued'",
+            (now, now + get_job_config()["result_ttl"], job_id)
+        )
+        conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'", (job_id,))
+    return get_job(job_id)
+
+def requeue_stale_jobs() -> int:
+    """Put running jobs whose worker stopped heart-beating back in the queue"""
+    now = time.time()
+    cutoff = now - get_job_config()["stale_after"]
+    with _lock:
+        conn = _get_connection()
+        # Jobs already asked to stop are not worth rerunning
+        conn.execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, expires_at = ? "
+            "WHERE status = 'running' AND heartbeat_at < ? AND cancel_requested = 1",
+            (now, now + get_job_config()["result_ttl"], cutoff)
+        )
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, progress = 0, "
+            "message = 'Requeued after worker loss' WHERE status = 'running' AND heartbeat_at < ?",
+            (cutoff,)
+        )
+    if cursor.rowcount:
+        logger.warning(f"Requeued {cursor.rowcount} jobs whose workers stopped responding")
+    return cursor.rowcount
+
+def requeue_job(job_id: str, message: str = None):
+    """Put a running job back in the queue, e.g. when it could not be handed to a worker"""
+    with _lock:
+        _get_connection().execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL, progress = 0, message = ? "
+            "WHERE id = ? AND status = 'running'",
+            (message, job_id)
+        )
+
+def purge_expired_jobs() -> int:
+    """Delete finished jobs past their result TTL, returning the number removed"""
+    with _lock:
+        cursor = _get_connection().execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),))
+    return cursor.rowcount
+
+def get_queue_stats() -> dict:
+    """Job counts by status"""
+    with _lock:
+        rows = _get_connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+    counts = dict.fromkeys(JOB_STATUSES, 0)
+    counts.update(dict(rows))
+    return counts
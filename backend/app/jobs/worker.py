@@ -0,0 +1,217 @@
+"""
+Job worker pool - Runs queued jobs in separate processes
+
+A dispatcher thread in the API process claims the highest-priority queued
+job whenever a pool slot is free and hands it to a process pool, so heavy
+analyses never block the event loop or the API's thread pool. Workers
+report progress and store results straight into the SQLite queue. The
+dispatcher heartbeats the jobs it owns, and jobs whose owner disappeared
+are requeued.
+"""
+
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from app.jobs.store import (
+    claim_next_job, finish_job, get_job, heartbeat_jobs, purge_expired_jobs, report_progress, requeue_job,
+    requeue_stale_jobs
+)
+from app.utils.config import get_job_config
+from app.utils.logger import get_logger
+from app.utils.metrics import inc_counter
+
+logger = get_logger()
+
+# Seconds between purges of expired results and stale-job checks
+_MAINTENANCE_INTERVAL = 60
+
+_executor = None
+_executor_lock = threading.Lock()
+_running = {}  # job_id -> job type
+_running_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+_dispatcher = None
+
+def _init_worker():
+    from app.utils.logger import setup_logger
+    setup_logger()
+
+def make_progress_callback(job_id: str, interval: float):
+    """
+    progress(fraction, message) for a handler, throttled to one write per interval
+
+    Raises CancelledError from the handler once the job has been cancelled.
+    """
+    last = [0.0]
+
+    def progress(fraction: float, message: str = None):
+        now = time.monotonic()
+        if now - last[0] < interval and fraction < 1.0:
+            return
+        last[0] = now
+        if report_progress(job_id, fraction, message):
+            raise CancelledError(f"Job {job_id} was cancelled")
+
+    return progress
+
+def run_job(job_id: str, job_type: str, params: dict):
+    """Entry point in the worker process: run a handler and store its outcome"""
+    from app.jobs.handlers import JOB_HANDLERS
+
+    progress = make_progress_callback(job_id, get_job_config()["progress_interval"])
+    started = time.perf_counter()
+    try:
+        result = JOB_HANDLERS[job_type](params, progress)
+    except CancelledError:
+        finish_job(job_id, "cancelled")
+        logger.info(f"{job_type} job {job_id} cancelled")
+        return
+    except Exception as e:
+        finish_job(job_id, "failed", error=str(e))
+        logger.error(f"{job_type} job {job_id} failed: {e}")
+        return
+
+    finish_job(job_id, "succeeded", result=result)
+    logger.info(f"{job_type} job {job_id} finished in {time.perf_counter() - started:.1f}s")
+
+def _new_executor(config: dict) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=config["workers"],
+        mp_context=get_context(config["start_method"]),
+        initializer=_init_worker
+    )
+
+def _replace_broken_executor(broken: ProcessPoolExecutor):
+    """
+    Swap a broken pool for a new one and shut the broken one down
+
+    Every future of a broken pool fails at once, so this runs once per
+    pool: only the caller still holding the current pool replaces it.
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is not broken or _stop.is_set():
+            return
+        _executor = _new_executor(get_job_config())
+    broken.shutdown(wait=False, cancel_futures=True)
+    logger.warning("Replaced the broken job worker pool")
+
+def _job_done(job_id: str, job_type: str, executor: ProcessPoolExecutor, future):
+    with _running_lock:
+        _running.pop(job_id, None)
+    error = future.exception() if not future.cancelled() else None
+    if error is not None:
+        # The worker process died (or the job could not be sent to it)
+        finish_job(job_id, "failed", error=f"Worker error: {error}")
+        logger.error(f"{job_type} job {job_id} lost its worker: {error}")
+        if isinstance(error, BrokenProcessPool):
+            _replace_broken_executor(executor)
+
+    job = get_job(job_id)
+    if job is not None:
+        inc_counter("jobs_finished_total", {"type": job_type, "status": job["status"]})
+    _wake.set()
+
+def _submit(job: dict) -> bool:
+    """
+    Hand a claimed job to the pool
+
+    If the pool refuses it, the job leaves _running and is requeued (broken
+    pool or shutdown) or marked failed, so neither it nor its slot is lost.
+
+    Returns:
+        Whether the job was submitted
+    """
+    with _executor_lock:
+        executor = _executor
+    with _running_lock:
+        _running[job["id"]] = job["type"]
+    try:
+        future = executor.submit(run_job, job["id"], job["type"], job["params"])
+    except Exception as e:
+        with _running_lock:
+            _running.pop(job["id"], None)
+        if isinstance(e, BrokenProcessPool) or _stop.is_set():
+            requeue_job(job["id"], "Requeued: worker pool unavailable")
+            logger.warning(f"Requeued {job['type']} job {job['id']}: {e}")
+            if isinstance(e, BrokenProcessPool):
+                _replace_broken_executor(executor)
+        else:
+            finish_job(job["id"], "failed", error=f"Could not start job: {e}")
+            logger.error(f"Could not start {job['type']} job {job['id']}: {e}")
+        return False
+
+    future.add_done_callback(
+        lambda f, job_id=job["id"], job_type=job["type"]: _job_done(job_id, job_type, executor, f)
+    )
+    return True
+
+def _dispatch_loop(config: dict):
+    last_maintenance = 0.0
+    while not _stop.is_set():
+        try:
+            now = time.monotonic()
+            with _running_lock:
+                owned = list(_running)
+            heartbeat_jobs(owned)
+            if now - last_maintenance >= _MAINTENANCE_INTERVAL:
+                requeue_stale_jobs()
+                purge_expired_jobs()
+                last_maintenance = now
+
+            while len(_running) < config["workers"] and not _stop.is_set():
+                job = claim_next_job()
+                if job is None:
+                    break
+                if not _submit(job):
+                    break
+        except Exception as e:
+            logger.error(f"Job dispatcher error: {e}")
+
+        _wake.wait(config["poll_interval"])
+        _wake.clear()
+
+def notify_job_submitted():
+    """Wake the dispatcher so a new job starts without waiting for the next poll"""
+    _wake.set()
+
+def start_job_workers():
+    """Start the process pool and the dispatcher thread (idempotent)"""
+    global _executor, _dispatcher
+
+    config = get_job_config()
+    if not config["enabled"] or _dispatcher is not None:
+        return
+
+    _stop.clear()
+    with _executor_lock:
+        _executor = _new_executor(config)
+    _dispatcher = threading.Thread(target=_dispatch_loop, args=(config,), name="job-dispatcher", daemon=True)
+    _dispatcher.start()
+    logger.info(f"Started job workers: {config['workers']} processes, queue at {config['path']}")
+
+def stop_job_workers():
+    """
+    Stop dispatching and shut the pool down
+
+    Jobs already running finish in their worker processes; queued jobs stay
+    in the queue for the next start. If the process is killed instead, its
+    running jobs stop heart-beating and are requeued after JOB_STALE_SECONDS.
+    """
+    global _executor, _dispatcher
+
+    if _dispatcher is None:
+        return
+    _stop.set()
+    _wake.set()
+    _dispatcher.join(timeout=5)
+    with _executor_lock:
+        executor, _executor = _executor, None
+    executor.shutdown(wait=False, cancel_futures=True)
+    _dispatcher = None
+    logger.info("Stopped job workers")
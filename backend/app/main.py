@@ -1,14 +1,65 @@
+import asyncio
+import hmac
+import random
+import time
+import uuid
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.routing import Match
 
-from app.api import stock, portfolio, health, search
+from app.api import stock, portfolio, health, search, metrics, admin, jobs
+from app.data_sources.providers.cassette import flush_cassette
+from app.data_sources.warmup import refresh_expiring, warm_up
+from app.jobs.worker import start_job_workers, stop_job_workers
+from app.risk_engine.factor_model import refresh_factor_model
+from app.utils.config import get_factor_model_config, get_profiling_config, get_warmup_config
 from app.utils.logger import setup_logger, get_logger
+from app.utils.metrics import inc_counter, observe_histogram
+from app.utils.profiler import (
+    build_speedscope, reserve_profile_id, sanitize_request_id, save_profile, start_sampler, stop_sampler
+)
 
 # Setup logger
 setup_logger()
 logger = get_logger()
 
+async def refresh_factors():
+    """Fit the universe factor model in a worker thread when it is missing or stale"""
+    try:
+        await asyncio.to_thread(refresh_factor_model)
+    except Exception as e:
+        logger.error(f"Factor model fit failed: {e}")
+
+async def run_cache_maintenance():
+    """Warm the market data caches, then keep hot entries refreshed ahead of expiry"""
+    config = get_warmup_config()
+    fit_factors = get_factor_model_config()["fit_on_startup"]
+    
+    try:
+        if config["enabled"]:
+            await asyncio.to_thread(warm_up)
+        
+        if fit_factors:
+            await refresh_factors()
+        
+        if not config["refresh_enabled"]:
+            return
+        
+        while True:
+            await asyncio.sleep(config["refresh_interval"])
+            try:
+                await asyncio.to_thread(refresh_expiring)
+            except Exception as e:
+                logger.error(f"Refresh-ahead cycle failed: {e}")
+            if fit_factors:
+                # No-op until the saved model is older than FACTOR_MODEL_MAX_AGE_HOURS
+                await refresh_factors()
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        logger.error(f"Cache warm-up failed: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
@@ -17,10 +68,21 @@ async def lifespan(app: FastAPI):
     logger.info("AI Stock Risk Analysis Platform Starting...")
     logger.info("="*60)
     
+    background_tasks = [asyncio.create_task(run_cache_maintenance())]
+    start_job_workers()
+    
     yield
     
     # Shutdown
     logger.info("AI Stock Risk Analysis Platform Shutting Down...")
+    stop_job_workers()
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    # Responses recorded since the last periodic write
+    flush_cassette()
+    # Flush records still queued for the enqueued sinks
+    await logger.complete()
 
 # Create FastAPI app with lifespan
 app = FastAPI(
@@ -39,11 +101,92 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def resolve_handler(request: Request) -> str:
+    """Route path template for a request, keeping metric label cardinality bounded"""
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """Count requests and time them until the response headers are ready"""
+    handler = resolve_handler(request)
+    inc_counter("http_requests_in_flight", {"handler": handler})
+    start = time.perf_counter()
+    status = 500
+
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        inc_counter("http_requests_in_flight", {"handler": handler}, -1)
+        inc_counter("http_requests_total", {"method": request.method, "handler": handler, "status": status})
+        observe_histogram("http_request_duration_seconds", time.perf_counter() - start,
+                          {"method": request.method, "handler": handler})
+
+profiling_config = get_profiling_config()
+
+def should_profile(request: Request) -> bool:
+    """Profile when the admin header matches or the request is sampled"""
+    token = request.headers.get("x-profile")
+    if token and profiling_config["admin_token"] and hmac.compare_digest(token, profiling_config["admin_token"]):
+        return True
+    return profiling_config["sample_rate"] > 0 and random.random() < profiling_config["sample_rate"]
+
+if profiling_config["enabled"]:
+    # Only installed when enabled, so requests pay nothing otherwise
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        """Sample stacks for the whole request, including streamed bodies"""
+        if not should_profile(request):
+            return await call_next(request)
+
+        request_id = sanitize_request_id(request.headers.get("x-request-id", "")) or uuid.uuid4().hex
+        # A repeated request ID gets a suffixed profile instead of replacing the earlier one
+        profile_id = reserve_profile_id(profiling_config["directory"], request_id)
+
+        session = start_sampler(profiling_config["interval_ms"])
+
+        def finish():
+            stop_sampler(session)
+            document = build_speedscope(session, f"{request.method} {request.url.path} ({profile_id})")
+            try:
+                save_profile(profiling_config["directory"], profile_id, document, profiling_config["max_files"])
+                logger.info(f"Saved profile for {request.method} {request.url.path} as {profile_id}")
+            except OSError as e:
+                logger.error(f"Could not save profile {profile_id}: {e}")
+
+        try:
+            response = await call_next(request)
+        except Exception:
+            finish()
+            raise
+
+        body_iterator = response.body_iterator
+
+        async def profiled_body():
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                finish()
+
+        response.body_iterator = profiled_body()
+        response.headers["X-Request-ID"] = request_id
+        response.headers["X-Profile-ID"] = profile_id
+        return response
+
 # Include routers
 app.include_router(health.router, prefix="/api", tags=["health"])
 app.include_router(search.router, prefix="/api", tags=["search"])
 app.include_router(stock.router, prefix="/api", tags=["stock"])
 app.include_router(portfolio.router, prefix="/api", tags=["portfolio"])
+app.include_router(metrics.router, prefix="/api", tags=["metrics"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
 
 @app.get("/")
 async def root():
@@ -3,7 +3,7 @@ Pydantic models for API requests
 """
 
 from pydantic import BaseModel, Field, field_validator
-from typing import List
+from typing import Any, Dict, List, Literal, Optional
 
 class StockAnalysisRequest(BaseModel):
     """Request model for single stock analysis"""
@@ -14,6 +14,20 @@ class StockAnalysisRequest(BaseModel):
     def symbol_must_be_uppercase(cls, v: str) -> str:
         return v.upper().strip()
 
+class BatchStockAnalysisRequest(BaseModel):
+    """Request model for streaming batch stock analysis"""
+    symbols: List[str] = Field(..., description="Stock ticker symbols", min_length=1)
+    include_news: bool = Field(False, description="Attach verified news to each record")
+    include_explanation: bool = Field(False, description="Attach an AI explanation to each record (implies news)")
+    
+    @field_validator('symbols')
+    @classmethod
+    def normalize_symbols(cls, v: List[str]) -> List[str]:
+        symbols = list(dict.fromkeys(s.upper().strip() for s in v if s and s.strip()))
+        if not symbols:
+            raise ValueError("At least one symbol is required")
+        return symbols
+
 class PortfolioHolding(BaseModel):
     """Individual portfolio holding"""
     symbol: str = Field(..., description="Stock ticker symbol")
@@ -35,3 +49,109 @@ class PortfolioAnalysisRequest(BaseModel):
         if not (0.99 <= total_weight <= 1.01):  # Allow small floating point errors
             raise ValueError(f"Portfolio weights must sum to 1.0, got {total_weight}")
         return v
+    
+    @field_validator('holdings')
+    @classmethod
+    def reject_duplicate_symbols(cls, v: List[PortfolioHolding]) -> List[PortfolioHolding]:
+        symbols = [h.symbol for h in v]
+        duplicates = sorted({s for s in symbols if symbols.count(s) > 1})
+        if duplicates:
+            raise ValueError(f"Each symbol may appear only once, repeated: {', '.join(duplicates)}")
+        return v
+
+class PortfolioSessionRequest(BaseModel):
+    """Request model for creating a what-if portfolio session"""
+    holdings: List[PortfolioHolding] = Field(..., description="Initial holdings (weights need not sum to 1)", min_length=1)
+
+class PortfolioSessionUpdate(BaseModel):
+    """What-if edits applied to a portfolio session"""
+    weights: Dict[str, float] = Field(default_factory=dict, description="New weights for existing holdings")
+    add: List[PortfolioHolding] = Field(default_factory=list, description="Holdings to add")
+    remove: List[str] = Field(default_factory=list, description="Symbols to remove")
+    
+    @field_validator('weights')
+    @classmethod
+    def normalize_weights(cls, v: Dict[str, float]) -> Dict[str, float]:
+        if any(not (0 <= w <= 1) for w in v.values()):
+            raise ValueError("Weights must be between 0 and 1")
+        return {s.upper().strip(): w for s, w in v.items()}
+    
+    @field_validator('remove')
+    @classmethod
+    def normalize_remove(cls, v: List[str]) -> List[str]:
+        return list(dict.fromkeys(s.upper().strip() for s in v))
+
+class OptimizationSettings(BaseModel):
+    """Optimization method and constraints"""
+    method: Literal["min_variance", "risk_parity", "max_diversification"] = Field("min_variance", description="Optimization objective")
+    min_weight: float = Field(0.0, description="Minimum weight per holding", ge=0, le=1)
+    max_weight: float = Field(1.0, description="Maximum weight per holding", gt=0, le=1)
+    sector_caps: Dict[str, float] = Field(default_factory=dict, description="Maximum total weight per sector")
+    
+    @field_validator('sector_caps')
+    @classmethod
+    def validate_sector_caps(cls, v: Dict[str, float]) -> Dict[str, float]:
+        if any(not (0 <= cap <= 1) for cap in v.values()):
+            raise ValueError("Sector caps must be between 0 and 1")
+        return v
+
+class PortfolioOptimizationRequest(OptimizationSettings):
+    """Request model for optimizing a list of symbols"""
+    symbols: List[str] = Field(..., description="Stock ticker symbols", min_length=2)
+    
+    @field_validator('symbols')
+    @classmethod
+    def normalize_symbols(cls, v: List[str]) -> List[str]:
+        symbols = list(dict.fromkeys(s.upper().strip() for s in v if s and s.strip()))
+        if len(symbols) < 2:
+            raise ValueError("At least two distinct symbols are required")
+        return symbols
+
+class SessionOptimizationRequest(OptimizationSettings):
+    """Request model for optimizing a portfolio session's holdings"""
+    apply: bool = Field(False, description="Re-weight the session to the optimal weights")
+
+class ScreenJobParams(BaseModel):
+    """Parameters of a universe screen job"""
+    symbols: List[str] = Field(default_factory=list, description="Symbols to screen (defaults to the symbol master)")
+    max_risk_score: Optional[float] = Field(None, description="Keep symbols at or below this risk score", ge=0, le=10)
+    max_volatility: Optional[float] = Field(None, description="Keep symbols at or below this annualized volatility", ge=0)
+    max_beta: Optional[float] = Field(None, description="Keep symbols at or below this beta")
+    sort_by: Literal["risk_score", "volatility", "beta"] = Field("risk_score", description="Ascending sort key")
+    limit: Optional[int] = Field(None, description="Return at most this many matches", ge=1)
+    
+    @field_validator('symbols')
+    @classmethod
+    def normalize_symbols(cls, v: List[str]) -> List[str]:
+        return list(dict.fromkeys(s.upper().strip() for s in v if s and s.strip()))
+
+class StressJobParams(BaseModel):
+    """Parameters of a stress test job"""
+    holdings: List[PortfolioHolding] = Field(..., description="Portfolio holdings", min_length=1)
+    scenarios: Optional[List[str]] = Field(None, description="Built-in scenarios to run (all when omitted)")
+    custom: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        description='Extra scenarios: {name: {"market": shock, "sectors": {sector: shock}}}'
+    )
+
+class SimulationJobParams(BaseModel):
+    """Parameters of a Monte Carlo simulation job"""
+    holdings: List[PortfolioHolding] = Field(..., description="Portfolio holdings", min_length=1)
+    horizon_days: Optional[int] = Field(None, description="Trading days ahead", ge=1, le=1260)
+    paths: Optional[int] = Field(None, description="Number of simulated paths", ge=100, le=1000000)
+    confidence: Optional[float] = Field(None, description="VaR / CVaR confidence level", gt=0.5, lt=1)
+    seed: Optional[int] = Field(None, description="Random seed for reproducible runs")
+
+# Parameter model of each job type
+JOB_PARAM_MODELS = {
+    "portfolio": PortfolioAnalysisRequest,
+    "screen": ScreenJobParams,
+    "stress": StressJobParams,
+    "simulation": SimulationJobParams
+}
+
+class JobRequest(BaseModel):
+    """Request model for submitting a background job"""
+    type: Literal["portfolio", "screen", "stress", "simulation"] = Field(..., description="Job type")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Job parameters (see the job type)")
+    priority: int = Field(5, description="Higher priorities run first", ge=0, le=9)
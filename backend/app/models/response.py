@@ -20,9 +20,11 @@ class FinancialRiskMetrics(BaseModel):
 class PortfolioRiskMetrics(BaseModel):
     """Portfolio-specific risk metrics"""
     correlation_matrix: List[List[float]] = Field(..., description="Correlation matrix")
+    correlation_summary: Optional[Dict[str, Any]] = Field(None, description="Pairwise correlation statistics")
     concentration_index: float = Field(..., description="HHI concentration index")
     diversification_score: float = Field(..., description="Diversification score")
     num_holdings: int = Field(..., description="Number of holdings")
+    factor_risk: Optional[Dict[str, Any]] = Field(None, description="Factor model volatility decomposition")
 
 class NewsItem(BaseModel):
     """Individual news item"""
@@ -42,6 +44,16 @@ class StockAnalysisResponse(BaseModel):
     explanation: Optional[str] = None
     timestamp: str
 
+class PortfolioSessionResponse(BaseModel):
+    """Response model for a what-if portfolio session"""
+    session_id: str
+    version: int = Field(..., description="Incremented on every edit")
+    holdings: List[Dict[str, Any]]
+    overall_risk_score: float = Field(..., ge=0, le=10)
+    metrics: Dict[str, Any]
+    explanation: Optional[str] = None
+    timestamp: str
+
 class PortfolioAnalysisResponse(BaseModel):
     """Response model for portfolio analysis"""
     holdings: List[Dict[str, Any]]
@@ -49,3 +61,18 @@ class PortfolioAnalysisResponse(BaseModel):
     metrics: Dict[str, Any]
     explanation: Optional[str] = None
     timestamp: str
+
+class JobStatusResponse(BaseModel):
+    """Status and progress of a background job"""
+    job_id: str
+    type: str
+    status: str = Field(..., description="queued, running, succeeded, failed or cancelled")
+    priority: int
+    progress: float = Field(..., ge=0, le=1)
+    message: Optional[str] = None
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    expires_at: Optional[str] = Field(None, description="When the stored result is deleted")
@@ -2,12 +2,15 @@
 Build verified context using LangChain RAG with DuckDuckGo
 """
 
+from app.ai.llm_gateway import is_llm_available
 from app.news_rag.langchain_rag import verify_news_with_rag
 from app.news_rag.retriever import retrieve_news
 from app.news_rag.verifier import verify_news
 from app.news_rag.confidence import score_news_confidence
+from app.utils.cache import get_cache, set_cache
+from app.utils.config import get_news_search_config
 from app.utils.logger import get_logger
-import os
+from app.utils.metrics import time_stage
 
 logger = get_logger()
 
@@ -21,10 +24,25 @@ def build_news_context(symbol: str) -> list:
     Returns:
         List of verified and scored news items
     """
+    cache_key = f"news_context_{symbol}"
+    cached = get_cache(cache_key)
+    if cached is not None:
+        logger.info(f"News context cache hit for {symbol}")
+        return cached
+    
+    news_context = _build_news_context(symbol)
+    
+    # Empty results are not cached so a failed search is retried next time
+    if news_context:
+        set_cache(cache_key, news_context, ttl_seconds=get_news_search_config()["context_ttl"])
+    
+    return news_context
+
+def _build_news_context(symbol: str) -> list:
     logger.info(f"Building news context for {symbol}")
     
-    # Check if we should use LangChain RAG (if GROQ_API_KEY is set)
-    use_langchain = bool(os.getenv("GROQ_API_KEY"))
+    # Check if we should use LangChain RAG (if an LLM backend is configured)
+    use_langchain = is_llm_available()
     
     if use_langchain:
         logger.info("Using LangChain RAG pipeline with DuckDuckGo")
@@ -39,7 +57,8 @@ def build_news_context(symbol: str) -> list:
     
     # Fallback to basic retrieval
     logger.info("Using basic news retrieval")
-    news_items = retrieve_news(symbol)
+    with time_stage("news_retrieval"):
+        news_items = retrieve_news(symbol)
     verified_news = verify_news(news_items)
     scored_news = score_news_confidence(verified_news)
     filtered_news = [n for n in scored_news if n.get("confidence", 0) >= 0.5]
@@ -1,13 +1,52 @@
 """
 LangChain-powered search using DuckDuckGo
+
+LangChain is imported on first search so that importing the app (and the
+stub search backend) does not pay for it.
 """
 
-from langchain_community.tools import DuckDuckGoSearchResults
-from langchain.agents import Tool
+import random
+import time
+from app.utils.config import get_news_search_config
 from app.utils.logger import get_logger
 
 logger = get_logger()
 
+def search_stock_news_stub(symbol: str, max_results: int = 5) -> list:
+    """
+    Canned news results standing in for DuckDuckGo in offline load tests
+    
+    Args:
+        symbol: Stock ticker symbol
+        max_results: Maximum number of results
+        
+    Returns:
+        List of search results
+    """
+    config = get_news_search_config()
+    
+    if config["stub_latency_ms"]:
+        time.sleep(config["stub_latency_ms"] / 1000.0)
+    if config["stub_error_rate"] and random.random() < config["stub_error_rate"]:
+        raise RuntimeError("Injected news search failure")
+    
+    templates = [
+        "{symbol} shares move as investors weigh quarterly results",
+        "Analysts revisit {symbol} price targets after sector update",
+        "{symbol} announces management commentary on outlook",
+        "Market wrap: {symbol} among most active names today",
+        "{symbol} trading volume rises ahead of earnings",
+    ]
+    
+    return [
+        {
+            "snippet": template.format(symbol=symbol),
+            "source": "Stub News",
+            "link": f"https://example.com/news/{symbol}/{i}"
+        }
+        for i, template in enumerate(templates[:max_results])
+    ]
+
 def create_duckduckgo_search_tool():
     """
     Create DuckDuckGo search tool for LangChain
@@ -15,6 +54,9 @@ def create_duckduckgo_search_tool():
     Returns:
         LangChain Tool for DuckDuckGo search
     """
+    from langchain_community.tools import DuckDuckGoSearchResults
+    from langchain.agents import Tool
+    
     search = DuckDuckGoSearchResults(num_results=5)
     
     tool = Tool(
@@ -37,8 +79,12 @@ def search_stock_news_ddg(symbol: str, max_results: int = 5) -> list:
         List of search results
     """
     try:
+        if get_news_search_config()["backend"] == "stub":
+            return search_stock_news_stub(symbol, max_results)
+        
         logger.info(f"Searching DuckDuckGo for {symbol} news")
         
+        from langchain_community.tools import DuckDuckGoSearchResults
         search = DuckDuckGoSearchResults(num_results=max_results)
         query = f"{symbol} stock news latest"
         
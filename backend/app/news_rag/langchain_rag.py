@@ -2,44 +2,23 @@
 LangChain RAG pipeline for news verification
 """
 
-from langchain_groq import ChatGroq
-from langchain.chains import LLMChain
-from langchain.prompts import PromptTemplate
-from langchain.schema import HumanMessage
-
+from app.ai.llm_gateway import complete, is_llm_available
 from app.news_rag.duckduckgo_search import search_stock_news_ddg
+from app.news_rag.verdict_cache import get_cached_verdict, set_cached_verdict, parse_verdict, get_verdict_cache_stats
 from app.utils.logger import get_logger
+from app.utils.metrics import time_stage
 import os
 
 logger = get_logger()
 
-def create_news_verification_chain():
-    """
-    Create LangChain chain for news verification
-    
-    Returns:
-        LLMChain for news verification
-    """
-    api_key = os.getenv("GROQ_API_KEY")
-    
-    if not api_key:
-        logger.warning("GROQ_API_KEY not set, news verification will use rule-based approach")
-        return None
-    
-    try:
-        model_name = os.getenv("GROQ_MODEL", "groq/compound")
-        if "groq/compound" in model_name:
-            model_name = "groq/compound"
-            
-        llm = ChatGroq(
-            groq_api_key=api_key,
-            model_name=model_name,
-            temperature=0.1  # Low temperature for factual verification
-        )
-        
-        prompt = PromptTemplate(
-            input_variables=["news_text", "symbol"],
-            template="""Analyze the following news snippet about {symbol} and determine:
+def get_verification_model_name() -> str:
+    """Resolve the Groq model used for news verification"""
+    model_name = os.getenv("GROQ_MODEL", "groq/compound")
+    if "groq/compound" in model_name:
+        model_name = "groq/compound"
+    return model_name
+
+VERIFICATION_TEMPLATE = """Analyze the following news snippet about {symbol} and determine:
 1. Is this news credible? (yes/no)
 2. What is the sentiment? (positive/negative/neutral)
 3. Is there any indication this might be fake news? (yes/no)
@@ -48,14 +27,46 @@ News: {news_text}
 
 Respond in JSON format:
 {{"credible": true/false, "sentiment": "positive/negative/neutral", "fake_indicator": true/false}}"""
+
+_verification_prompt = None
+
+def get_verification_prompt():
+    """Build the LangChain prompt template on first use (langchain is slow to import)"""
+    global _verification_prompt
+    
+    if _verification_prompt is None:
+        from langchain.prompts import PromptTemplate
+        _verification_prompt = PromptTemplate(
+            input_variables=["news_text", "symbol"],
+            template=VERIFICATION_TEMPLATE
         )
-        
-        chain = LLMChain(llm=llm, prompt=prompt)
-        return chain
     
-    except Exception as e:
-        logger.error(f"Error creating news verification chain: {e}")
+    return _verification_prompt
+
+def create_news_verification_chain():
+    """
+    Create the news verification chain (prompt template -> shared LLM gateway)
+    
+    Returns:
+        Callable taking news_text and symbol and returning the raw LLM verdict,
+        or None when no LLM backend is available
+    """
+    if not is_llm_available():
+        logger.warning("GROQ_API_KEY not set, news verification will use rule-based approach")
         return None
+    
+    model_name = get_verification_model_name()
+    prompt_template = get_verification_prompt()
+    
+    def run_chain(news_text: str, symbol: str) -> str:
+        prompt = prompt_template.format(news_text=news_text, symbol=symbol)
+        return complete(
+            [{"role": "user", "content": prompt}],
+            model=model_name,
+            temperature=0.1  # Low temperature for factual verification
+        )
+    
+    return run_chain
 
 def verify_news_with_rag(symbol: str) -> list:
     """
@@ -73,14 +84,18 @@ def verify_news_with_rag(symbol: str) -> list:
     logger.info(f"Starting RAG pipeline for {symbol}")
     
     # Step 1: Retrieve from DuckDuckGo
-    search_results = search_stock_news_ddg(symbol, max_results=5)
+    with time_stage("news_retrieval"):
+        search_results = search_stock_news_ddg(symbol, max_results=5)
     
     if not search_results:
         logger.warning(f"No search results for {symbol}")
         return []
     
-    # Step 2: Verify with LangChain
-    verification_chain = create_news_verification_chain()
+    # Step 2: Verify with LangChain (chain is only built on the first cache miss)
+    model_name = get_verification_model_name()
+    verification_chain = None
+    chain_created = False
+    llm_calls = 0
     
     verified_news = []
     
@@ -101,32 +116,44 @@ def verify_news_with_rag(symbol: str) -> list:
             "rag_verified": False
         }
         
-        # Try LLM verification if chain available
-        if verification_chain:
-            try:
-                verification = verification_chain.run(
-                    news_text=news_text,
-                    symbol=symbol
-                )
-                
-                # Parse verification result
-                import json
+        ver_result = get_cached_verdict(news_text, model_name)
+        
+        # Try LLM verification if the verdict is not cached
+        if ver_result is None:
+            if not chain_created:
+                verification_chain = create_news_verification_chain()
+                chain_created = True
+            
+            if verification_chain:
                 try:
-                    ver_result = json.loads(verification)
-                    if ver_result.get("credible") and not ver_result.get("fake_indicator"):
-                        verified_item["confidence"] = 0.9
-                        verified_item["sentiment"] = ver_result.get("sentiment", "neutral")
-                        verified_item["rag_verified"] = True
-                    else:
-                        verified_item["confidence"] = 0.4
-                except:
-                    pass
-                
-            except Exception as e:
-                logger.error(f"Error in LLM verification: {e}")
+                    with time_stage("llm_verification"):
+                        verification = verification_chain(
+                            news_text=news_text,
+                            symbol=symbol
+                        )
+                    llm_calls += 1
+                    
+                    # Parse verification result; only well-formed verdicts are cached
+                    ver_result = parse_verdict(verification)
+                    if ver_result is not None:
+                        set_cached_verdict(news_text, model_name, ver_result)
+                    
+                except Exception as e:
+                    logger.error(f"Error in LLM verification: {e}")
+        
+        if ver_result is not None:
+            if ver_result.get("credible") and not ver_result.get("fake_indicator"):
+                verified_item["confidence"] = 0.9
+                verified_item["sentiment"] = ver_result.get("sentiment", "neutral")
+                verified_item["rag_verified"] = True
+            else:
+                verified_item["confidence"] = 0.4
         
         verified_news.append(verified_item)
     
+    stats = get_verdict_cache_stats()
+    logger.info(f"Verdict cache: {llm_calls} LLM calls for {len(verified_news)} items, lifetime hit rate {stats['hit_rate']:.1%}")
+    
     logger.info(f"RAG pipeline complete: {len(verified_news)} verified news items")
     
     return verified_news
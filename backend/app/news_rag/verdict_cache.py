@@ -0,0 +1,199 @@
+"""
+Persistent SQLite cache for LLM news verification verdicts
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from app.utils.config import get_verdict_cache_config
+from app.utils.logger import get_logger
+from app.utils.metrics import record_cache_lookup
+
+logger = get_logger()
+
+# Lazily opened shared connection (sqlite3 objects are guarded by _lock)
+_connection = None
+_lock = threading.Lock()
+
+# Hit/miss counters since process start
+_stats = {"hits": 0, "misses": 0, "writes": 0, "expired": 0}
+
+def normalize_snippet(text: str) -> str:
+    """Normalize a news snippet so trivially different copies share a key"""
+    return re.sub(r"\s+", " ", text or "").strip().lower()
+
+def make_verdict_key(news_text: str, model_name: str) -> str:
+    """Build the cache key from the normalized snippet hash and model name"""
+    digest = hashlib.sha256(normalize_snippet(news_text).encode("utf-8")).hexdigest()
+    return f"{model_name}:{digest}"
+
+def _get_connection():
+    """Open (once) the SQLite database backing the cache"""
+    global _connection
+
+    if _connection is None:
+        path = get_verdict_cache_config()["path"]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        _connection = sqlite3.connect(path, check_same_thread=False)
+        _connection.execute(
+            """CREATE TABLE IF NOT EXISTS news_verdicts (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                credible INTEGER NOT NULL,
+                sentiment TEXT,
+                fake_indicator INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )"""
+        )
+        _connection.commit()
+
+    return _connection
+
+def get_cached_verdict(news_text: str, model_name: str) -> Optional[dict]:
+    """
+    Look up a stored verdict for a news snippet
+
+    Args:
+        news_text: Raw news snippet
+        model_name: LLM model that produced the verdict
+
+    Returns:
+        Verdict dict (credible, sentiment, fake_indicator) or None on miss
+    """
+    config = get_verdict_cache_config()
+    if not config["enabled"]:
+        return None
+
+    key = make_verdict_key(news_text, model_name)
+
+    try:
+        with _lock:
+            conn = _get_connection()
+            row = conn.execute(
+                "SELECT credible, sentiment, fake_indicator, expires_at FROM news_verdicts WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is not None and row[3] < time.time():
+                conn.execute("DELETE FROM news_verdicts WHERE key = ?", (key,))
+                conn.commit()
+                _stats["expired"] += 1
+                row = None
+
+            if row is None:
+                _stats["misses"] += 1
+                record_cache_lookup("news_verdicts", False)
+                return None
+
+            _stats["hits"] += 1
+            record_cache_lookup("news_verdicts", True)
+    except sqlite3.Error as e:
+        logger.error(f"Verdict cache read failed: {e}")
+        return None
+
+    return {
+        "credible": bool(row[0]),
+        "sentiment": row[1],
+        "fake_indicator": bool(row[2])
+    }
+
+def set_cached_verdict(news_text: str, model_name: str, verdict: dict, ttl_seconds: int = None):
+    """
+    Store a verdict for a news snippet
+
+    Args:
+        news_text: Raw news snippet
+        model_name: LLM model that produced the verdict
+        verdict: Parsed LLM result with credible, sentiment and fake_indicator
+        ttl_seconds: Override for the configured TTL
+    """
+    config = get_verdict_cache_config()
+    if not config["enabled"]:
+        return
+
+    ttl = ttl_seconds if ttl_seconds is not None else config["ttl"]
+    now = time.time()
+
+    try:
+        with _lock:
+            conn = _get_connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO news_verdicts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    make_verdict_key(news_text, model_name),
+                    model_name,
+                    int(bool(verdict.get("credible"))),
+                    verdict.get("sentiment", "neutral"),
+                    int(bool(verdict.get("fake_indicator"))),
+                    now,
+                    now + ttl
+                )
+            )
+            conn.commit()
+            _stats["writes"] += 1
+    except sqlite3.Error as e:
+        logger.error(f"Verdict cache write failed: {e}")
+
+def purge_expired_verdicts() -> int:
+    """Delete expired verdicts, returning the number of rows removed"""
+    try:
+        with _lock:
+            conn = _get_connection()
+            cursor = conn.execute("DELETE FROM news_verdicts WHERE expires_at < ?", (time.time(),))
+            conn.commit()
+            return cursor.rowcount
+    except sqlite3.Error as e:
+        logger.error(f"Verdict cache purge failed: {e}")
+        return 0
+
+def get_verdict_cache_stats() -> dict:
+    """Get hit-rate statistics for the verdict cache"""
+    lookups = _stats["hits"] + _stats["misses"]
+
+    entries = 0
+    try:
+        with _lock:
+            entries = _get_connection().execute("SELECT COUNT(*) FROM news_verdicts").fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error(f"Verdict cache stats failed: {e}")
+
+    return {
+        **_stats,
+        "lookups": lookups,
+        "hit_rate": _stats["hits"] / lookups if lookups else 0.0,
+        "entries": entries,
+        "enabled": get_verdict_cache_config()["enabled"]
+    }
+
+def parse_verdict(raw: str) -> Optional[dict]:
+    """Parse the JSON verdict returned by the LLM, or None if malformed"""
+    try:
+        result = json.loads(raw)
+    except (TypeError, ValueError):
+        # Models sometimes wrap the JSON in prose; retry on the first {...} block
+        match = re.search(r"\{.*?\}", raw or "", re.DOTALL)
+        if not match:
+            return None
+        try:
+            result = json.loads(match.group(0))
+        except ValueError:
+            return None
+
+    if not isinstance(result, dict):
+        return None
+
+    return {
+        "credible": bool(result.get("credible")),
+        "sentiment": result.get("sentiment", "neutral"),
+        "fake_indicator": bool(result.get("fake_indicator"))
+    }
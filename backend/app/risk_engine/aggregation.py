@@ -2,10 +2,12 @@
 Risk aggregation and overall score calculation
 """
 
+from app.data_sources.symbol_data import load_symbol_data
 from app.risk_engine.market_risk import get_market_risk_metrics
 from app.risk_engine.financial_risk import get_financial_risk_metrics
 from app.utils.config import get_risk_thresholds
-from app.utils.logger import get_logger
+from app.utils.logger import get_logger, log_hot
+from app.utils.metrics import time_stage
 
 logger = get_logger()
 
@@ -79,21 +81,33 @@ def calculate_financial_risk_score(financial_metrics: dict) -> float:
     
     return min(10.0, max(0.0, total_score))
 
-def aggregate_stock_risk(symbol: str) -> dict:
+def aggregate_stock_risk(symbol: str, data: dict = None) -> dict:
     """
     Aggregate all risk metrics for a stock and calculate overall score
     
     Args:
         symbol: Stock ticker symbol
+        data: Preloaded symbol data bundle (loaded here if omitted)
         
     Returns:
         Dictionary with all metrics and overall score
     """
-    logger.info(f"Aggregating risk for {symbol}")
+    log_hot("INFO", "Aggregating risk for {}", symbol)
+    
+    load_error = None
+    if data is None:
+        try:
+            with time_stage("symbol_data"):
+                data = load_symbol_data(symbol)
+        except Exception as e:
+            load_error = e
     
     try:
+        if load_error:
+            raise load_error
         # Get all metrics
-        market_metrics = get_market_risk_metrics(symbol)
+        with time_stage("market_metrics"):
+            market_metrics = get_market_risk_metrics(data)
     except Exception as e:
         logger.error(f"Error getting market metrics: {e}")
         # Default to neutral values yielding market_score ~5.0
@@ -101,7 +115,10 @@ def aggregate_stock_risk(symbol: str) -> dict:
         market_metrics = {"beta": 1.0, "volatility": 0.12, "correlation": 0.5}
         
     try:
-        financial_metrics = get_financial_risk_metrics(symbol)
+        if load_error:
+            raise load_error
+        with time_stage("financial_metrics"):
+            financial_metrics = get_financial_risk_metrics(data)
     except Exception as e:
         logger.error(f"Error getting financial metrics: {e}")
         # Default to neutral values yielding financial_score ~5.0
@@ -119,7 +136,7 @@ def aggregate_stock_risk(symbol: str) -> dict:
     # Overall score (weighted average)
     overall_score = (market_score * 0.6) + (financial_score * 0.4)
     
-    logger.info(f"Overall risk score for {symbol}: {overall_score:.2f}")
+    log_hot("INFO", "Overall risk score for {}: {:.2f}", symbol, overall_score)
     
     return {
         "overall_score": overall_score,
@@ -0,0 +1,232 @@
+"""
+Incremental pairwise correlation store for portfolios and watchlists
+
+Correlations are kept per (window, as-of date) in one growing float32
+matrix indexed by symbol, so a pair is computed once per day and reused by
+every portfolio that contains it. Adding a symbol computes only its new row
+against the symbols already stored, in blocked float32 matrix products.
+
+Correlations are pairwise-complete: each pair uses the returns both series
+have, so symbols with shorter or gappy histories no longer break the whole
+matrix. Pairs with less than CORRELATION_MIN_OVERLAP common returns are
+reported as uncorrelated.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.data_sources.market_data import get_stock_prices
+from app.utils.config import get_correlation_store_config, get_risk_engine_config
+from app.utils.logger import get_logger, log_hot, quiet_symbol_logs
+
+logger = get_logger()
+
+# (period, as_of) -> store
+_stores = {}
+_stores_lock = threading.Lock()
+
+def _new_store(width: int) -> dict:
+    return {
+        "symbols": [],
+        "index": {},
+        "size": 0,
+        # Per symbol: returns centered on their mean (0 where missing), squares and validity mask
+        "values": np.zeros((0, width), dtype=np.float32),
+        "squares": np.zeros((0, width), dtype=np.float32),
+        "mask": np.zeros((0, width), dtype=np.float32),
+        "corr": np.zeros((0, 0), dtype=np.float32),
+        "lock": threading.Lock()
+    }
+
+def _get_store(period: int, reset: bool = False) -> dict:
+    """Store for today's as-of date; stores of earlier dates for the period are dropped"""
+    as_of = datetime.now(timezone.utc).date().isoformat()
+    key = (period, as_of)
+    with _stores_lock:
+        if reset or key not in _stores:
+            for stale in [k for k in _stores if k[0] == period and k != key]:
+                del _stores[stale]
+            _stores[key] = _new_store(period - 1)
+        return _stores[key]
+
+def returns_window(prices: np.ndarray, width: int) -> np.ndarray:
+    """Most recent returns right-aligned in a NaN-padded row of the given width"""
+    row = np.full(width, np.nan)
+    prices = np.asarray(prices, dtype=float)
+    if len(prices) > 1:
+        returns = np.diff(prices) / prices[:-1]
+        returns = returns[-width:]
+        row[width - len(returns):] = returns
+    return row
+
+def _load_returns(symbols: list, period: int, workers: int) -> np.ndarray:
+    def load(symbol):
+        with quiet_symbol_logs():
+            return returns_window(get_stock_prices(symbol, period), period - 1)
+
+    if len(symbols) == 1:
+        return load(symbols[0])[None, :]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="correlation") as executor:
+        return np.array(list(executor.map(load, symbols)))
+
+def pairwise_correlation_block(values: np.ndarray, squares: np.ndarray, mask: np.ndarray,
+                               all_values: np.ndarray, all_squares: np.ndarray, all_mask: np.ndarray,
+                               min_overlap: int) -> np.ndarray:
+    """
+    Pairwise-complete correlations of a block of rows against all rows
+
+    Inputs are centered returns with zeros where missing, their squares and
+    0/1 validity masks, all float32. Every overlap sum is one matrix product.
+
+    Returns:
+        (block x all) float32 correlations, NaN where the overlap is too short
+        or a series is constant over it
+    """
+    count = mask @ all_mask.T
+    sum_x = values @ all_mask.T
+    sum_y = mask @ all_values.T
+    sum_xx = squares @ all_mask.T
+    sum_yy = mask @ all_squares.T
+    sum_xy = values @ all_values.T
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sum_xy - sum_x * sum_y / count
+        var_x = sum_xx - sum_x * sum_x / count
+        var_y = sum_yy - sum_y * sum_y / count
+        corr = cov / np.sqrt(var_x * var_y)
+
+    valid = (count >= min_overlap) & (var_x > 0) & (var_y > 0)
+    return np.where(valid, np.clip(corr, -1.0, 1.0), np.nan).astype(np.float32, copy=False)
+
+def _grow(store: dict, capacity: int):
+    for name in ("values", "squares", "mask"):
+        grown = np.zeros((capacity, store[name].shape[1]), dtype=np.float32)
+        grown[:store["size"]] = store[name][:store["size"]]
+        store[name] = grown
+    corr = np.full((capacity, capacity), np.nan, dtype=np.float32)
+    corr[:store["size"], :store["size"]] = store["corr"][:store["size"], :store["size"]]
+    store["corr"] = corr
+
+def _extend(store: dict, symbols: list, rows: np.ndarray, chunk_size: int, min_overlap: int):
+    """Append symbols and compute only their rows of the correlation matrix"""
+    start = store["size"]
+    total = start + len(symbols)
+    if total > len(store["corr"]):
+        _grow(store, max(total, 2 * len(store["corr"]), 64))
+
+    valid = np.isfinite(rows)
+    counts = valid.sum(axis=1, keepdims=True)
+    means = np.where(valid, rows, 0.0).sum(axis=1, keepdims=True) / np.maximum(counts, 1)
+    centered = np.where(valid, rows - means, 0.0)
+
+    store["values"][start:total] = centered
+    store["squares"][start:total] = centered * centered
+    store["mask"][start:total] = valid
+
+    values, squares, mask = store["values"][:total], store["squares"][:total], store["mask"][:total]
+    for lo in range(start, total, chunk_size):
+        hi = min(lo + chunk_size, total)
+        block = pairwise_correlation_block(
+            values[lo:hi], squares[lo:hi], mask[lo:hi], values, squares, mask, min_overlap
+        )
+        store["corr"][lo:hi, :total] = block
+        store["corr"][:total, lo:hi] = block.T
+
+    diagonal = np.arange(start, total)
+    store["corr"][diagonal, diagonal] = 1.0
+
+    for offset, symbol in enumerate(symbols):
+        store["index"][symbol] = start + offset
+    store["symbols"].extend(symbols)
+    store["size"] = total
+
+def _read_store(symbols: list, period: int, with_moments: bool = False) -> tuple:
+    """
+    Correlation matrix (and optionally per-symbol moments) from one store
+
+    Missing symbols are appended first. Everything is then read from that
+    same store object under one lock, so a date roll-over, rebuild or clear
+    in between cannot leave symbols unindexed.
+
+    Returns:
+        (n x n float64 correlations, sums of squared centered returns or
+        None, valid return counts or None)
+    """
+    config = get_correlation_store_config()
+    store = _get_store(period)
+
+    unique = list(dict.fromkeys(symbols))
+    missing = [s for s in unique if s not in store["index"]]
+    if missing and store["size"] + len(missing) > config["max_symbols"]:
+        logger.info(f"Correlation store for {period}d is full ({store['size']} symbols), rebuilding")
+        store = _get_store(period, reset=True)
+        missing = unique
+
+    if missing:
+        rows = _load_returns(missing, period, config["workers"])
+        with store["lock"]:
+            fresh = [i for i, s in enumerate(missing) if s not in store["index"]]
+            if fresh:
+                _extend(store, [missing[i] for i in fresh], rows[fresh], config["chunk_size"], config["min_overlap"])
+        log_hot("DEBUG", "Added {} symbols to the correlation store ({} stored)", len(missing), store["size"])
+
+    sum_squares = counts = None
+    with store["lock"]:
+        idx = np.array([store["index"][s] for s in symbols], dtype=int)
+        if len(idx) > 1 and np.all(np.diff(idx) == 1):
+            # Holdings added in order: a plain slice, no gather
+            matrix = store["corr"][idx[0]:idx[-1] + 1, idx[0]:idx[-1] + 1].astype(np.float64)
+        else:
+            matrix = store["corr"].take(idx, axis=0).take(idx, axis=1).astype(np.float64)
+        if with_moments:
+            sum_squares = store["squares"][idx].sum(axis=1, dtype=np.float64)
+            counts = store["mask"][idx].sum(axis=1, dtype=np.float64)
+
+    np.nan_to_num(matrix, copy=False, nan=0.0)
+    np.fill_diagonal(matrix, 1.0)
+    return matrix, sum_squares, counts
+
+def get_correlation_matrix(symbols: list, period: int = None) -> np.ndarray:
+    """
+    Correlation matrix for a list of symbols from the store
+
+    Symbols not stored yet are loaded and appended (one new row each); all
+    other pairs are reused.
+
+    Args:
+        symbols: Ticker symbols (duplicates allowed)
+        period: Trading days of prices (defaults to RISK_HISTORY_DAYS)
+
+    Returns:
+        n x n float64 correlation matrix, 0 for pairs without enough overlap
+    """
+    period = period or get_risk_engine_config()["history_days"]
+    return _read_store(symbols, period)[0]
+
+def get_covariance_matrix(symbols: list, period: int = None, periods_per_year: int = 252) -> np.ndarray:
+    """
+    Annualized covariance matrix from the store's correlations and volatilities
+
+    Volatilities come from the stored centered returns, so nothing is
+    refetched for symbols the store has already seen.
+
+    Args:
+        symbols: Ticker symbols (duplicates allowed)
+        period: Trading days of prices (defaults to RISK_HISTORY_DAYS)
+        periods_per_year: Annualization factor
+
+    Returns:
+        n x n float64 covariance matrix
+    """
+    period = period or get_risk_engine_config()["history_days"]
+    corr, sum_squares, counts = _read_store(symbols, period, with_moments=True)
+    vols = np.sqrt(sum_squares / np.maximum(counts - 1, 1) * periods_per_year)
+    return corr * np.outer(vols, vols)
+
+def clear_correlation_store():
+    """Drop every stored correlation"""
+    with _stores_lock:
+        _stores.clear()
@@ -0,0 +1,427 @@
+"""
+Universe factor model - Market, Sector and Style exposures
+
+Every symbol's daily returns are regressed on the market, its own sector and
+a set of style factors (size, value, momentum, volatility). The regressions
+for the whole universe are one batched least-squares solve over stacked
+normal equations. The fitted model (exposures, R², idiosyncratic volatility
+and the factor covariance) is saved to disk, so portfolio factor risk at
+request time is a couple of small matrix products.
+
+Sector factors are equal-weighted sector returns in excess of the market.
+Style factors are long/short returns: the top third of the universe by a
+characteristic minus the bottom third.
+"""
+
+import argparse
+import csv
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from app.data_sources.indices import get_index_prices
+from app.data_sources.market_data import get_stock_info, get_stock_prices
+from app.data_sources.symbol_data import simple_returns
+from app.data_sources.symbol_index import get_symbol_index, lookup_symbol
+from app.utils.config import get_factor_model_config
+from app.utils.logger import get_logger, quiet_symbol_logs
+from app.utils.metrics import time_stage
+
+logger = get_logger()
+
+PERIODS_PER_YEAR = 252
+
+STYLE_FACTORS = ("size", "value", "momentum", "volatility")
+
+# Momentum skips the most recent month (short-term reversal)
+MOMENTUM_SKIP_DAYS = 21
+
+# Sector labels that mean "unclassified"
+_NO_SECTOR = {"", "N/A", "UNKNOWN", "OTHER"}
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+def load_sector_map(symbols: list, path: str = "") -> dict:
+    """
+    Sector of each symbol
+
+    Args:
+        symbols: Ticker symbols
+        path: Optional CSV with symbol and sector columns (takes precedence)
+
+    Returns:
+        {symbol: sector}, "" for unclassified symbols
+    """
+    from app.data_sources.stock_search import STOCK_DATABASE
+
+    overrides = {}
+    if path:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                symbol = (row.get("symbol") or "").strip().upper()
+                if symbol:
+                    overrides[symbol] = (row.get("sector") or "").strip()
+
+    sectors = {}
+    for symbol in symbols:
+        sector = overrides.get(symbol.upper())
+        if sector is None:
+            entry = lookup_symbol(symbol) or STOCK_DATABASE.get(symbol) or {}
+            sector = entry.get("sector", "")
+        sectors[symbol] = "" if sector.upper() in _NO_SECTOR else sector
+    return sectors
+
+def style_characteristics(returns: np.ndarray, infos: list) -> dict:
+    """
+    Per-symbol style characteristics (NaN when unknown)
+
+    Args:
+        returns: n x T daily returns
+        infos: Fundamentals dict per symbol
+
+    Returns:
+        {style: (n,) array}
+    """
+    def info_values(key):
+        return np.array([float(info.get(key) or np.nan) for info in infos])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        market_cap = info_values("marketCap")
+        book_to_price = info_values("bookValue") / info_values("currentPrice")
+        lookback = returns[:, :-MOMENTUM_SKIP_DAYS] if returns.shape[1] > MOMENTUM_SKIP_DAYS else returns
+        return {
+            "size": np.where(market_cap > 0, np.log(market_cap), np.nan),
+            "value": np.where(np.isfinite(book_to_price), book_to_price, np.nan),
+            "momentum": np.prod(1.0 + lookback, axis=1) - 1.0,
+            "volatility": returns.std(axis=1)
+        }
+
+def long_short_returns(returns: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """
+    Top-third minus bottom-third equal-weighted returns by score
+
+    Returns zeros when fewer than six symbols have a score.
+    """
+    valid = np.flatnonzero(np.isfinite(scores))
+    if len(valid) < 6:
+        return np.zeros(returns.shape[1])
+
+    ranked = valid[np.argsort(scores[valid], kind="stable")]
+    k = len(ranked) // 3
+    return returns[ranked[-k:]].mean(axis=0) - returns[ranked[:k]].mean(axis=0)
+
+def fit_factor_model(symbols: list, returns: np.ndarray, market_returns: np.ndarray, sectors: list,
+                     characteristics: dict, min_sector_size: int = 3,
+                     periods_per_year: int = PERIODS_PER_YEAR) -> dict:
+    """
+    Fit factor exposures for a whole universe in one batched solve
+
+    Each symbol's design matrix is [1, market, own sector, styles...]. The
+    normal equations of all symbols are stacked and solved together with a
+    batched pseudo-inverse, so symbols without a sector factor simply get a
+    zero sector exposure.
+
+    Args:
+        symbols: Ticker symbols (n)
+        returns: n x T daily returns aligned on the same dates
+        market_returns: Benchmark returns over the same T dates
+        sectors: Sector per symbol ("" for unclassified)
+        characteristics: {style: (n,) array} from style_characteristics
+        min_sector_size: Sectors with fewer symbols get no factor
+        periods_per_year: Annualization factor
+
+    Returns:
+        Model dictionary: symbols, sectors, factors, exposures (n x F),
+        alpha, r_squared, idio_vol, factor_cov (F x F), factor_returns
+        (T x F), fitted_at, observations
+    """
+    n, t = returns.shape
+    styles = [name for name in STYLE_FACTORS if name in characteristics]
+    k = 3 + len(styles)
+    if n == 0 or t <= k + 1:
+        raise ValueError(f"Need more than {k + 1} observations for {n} symbols, got {t}")
+
+    counts = Counter(sectors)
+    factor_sectors = sorted(s for s, c in counts.items() if s and c >= min_sector_size)
+    sector_slot = {s: i for i, s in enumerate(factor_sectors)}
+    sector_ids = np.array([sector_slot.get(s, -1) for s in sectors])
+
+    membership = np.zeros((len(factor_sectors), n))
+    membership[sector_ids[sector_ids >= 0], np.flatnonzero(sector_ids >= 0)] = 1.0
+    membership /= np.maximum(membership.sum(axis=1, keepdims=True), 1.0)
+    sector_returns = membership @ returns - market_returns
+    style_returns = np.array([long_short_returns(returns, characteristics[name]) for name in styles]).reshape(len(styles), t)
+
+    # Design (n, T, K): shared columns plus each symbol's own sector column
+    design = np.empty((n, t, k))
+    design[:, :, 0] = 1.0
+    design[:, :, 1] = market_returns
+    design[:, :, 2] = 0.0
+    if factor_sectors:
+        design[:, :, 2] = np.where(sector_ids[:, None] >= 0, sector_returns[np.maximum(sector_ids, 0)], 0.0)
+    design[:, :, 3:] = style_returns.T
+
+    xtx = np.einsum("ntk,ntj->nkj", design, design)
+    xty = np.einsum("ntk,nt->nk", design, returns)
+    coefs = np.einsum("nkj,nj->nk", np.linalg.pinv(xtx), xty)
+
+    residuals = returns - np.einsum("ntk,nk->nt", design, coefs)
+    ssr = (residuals ** 2).sum(axis=1)
+    sst = ((returns - returns.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_squared = np.where(sst > 0, 1.0 - ssr / sst, 0.0)
+
+    factors = ["market"] + [f"sector:{s}" for s in factor_sectors] + list(styles)
+    exposures = np.zeros((n, len(factors)))
+    exposures[:, 0] = coefs[:, 1]
+    has_sector = sector_ids >= 0
+    exposures[np.flatnonzero(has_sector), 1 + sector_ids[has_sector]] = coefs[has_sector, 2]
+    exposures[:, 1 + len(factor_sectors):] = coefs[:, 3:]
+
+    factor_returns = np.column_stack([market_returns, sector_returns.T, style_returns.T])
+
+    return {
+        "symbols": list(symbols),
+        "sectors": list(sectors),
+        "factors": factors,
+        "exposures": exposures,
+        "alpha": coefs[:, 0] * periods_per_year,
+        "r_squared": r_squared,
+        "idio_vol": np.sqrt(ssr / (t - k) * periods_per_year),
+        "factor_cov": np.atleast_2d(np.cov(factor_returns, rowvar=False)) * periods_per_year,
+        "factor_returns": factor_returns,
+        "fitted_at": time.time(),
+        "observations": t
+    }
+
+def load_universe(symbols: list, benchmark: str, period: int, workers: int = 8) -> dict:
+    """
+    Prices and fundamentals for a universe, aligned on the common trailing window
+
+    Symbols with less than three quarters of the requested history are dropped.
+
+    Returns:
+        Dictionary with symbols, returns (n x T), market_returns (T) and infos
+    """
+    def load(symbol):
+        with quiet_symbol_logs():
+            return get_stock_prices(symbol, period), get_stock_info(symbol)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="factor-fit") as executor:
+        futures = {symbol: executor.submit(load, symbol) for symbol in symbols}
+        index_prices = get_index_prices(benchmark, period)
+        loaded = {}
+        for symbol, future in futures.items():
+            try:
+                loaded[symbol] = future.result()
+            except Exception as e:
+                logger.warning(f"Skipping {symbol} in factor model: {e}")
+
+    min_history = max(period * 3 // 4, 2)
+    kept = [s for s, (prices, _) in loaded.items() if len(prices) >= min_history]
+    if not kept:
+        raise ValueError("No symbol in the factor universe has enough price history")
+
+    window = min([len(loaded[s][0]) for s in kept] + [len(index_prices)])
+    return {
+        "symbols": kept,
+        "returns": np.array([simple_returns(loaded[s][0][-window:]) for s in kept]),
+        "market_returns": simple_returns(index_prices[-window:]),
+        "infos": [loaded[s][1] or {} for s in kept]
+    }
+
+def save_factor_model(model: dict, path: str):
+    """Write a fitted model to an .npz file (atomically replaced)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(
+            f,
+            symbols=np.array(model["symbols"], dtype=str),
+            sectors=np.array(model["sectors"], dtype=str),
+            factors=np.array(model["factors"], dtype=str),
+            exposures=model["exposures"],
+            alpha=model["alpha"],
+            r_squared=model["r_squared"],
+            idio_vol=model["idio_vol"],
+            factor_cov=model["factor_cov"],
+            factor_returns=model["factor_returns"],
+            fitted_at=np.array(model["fitted_at"]),
+            observations=np.array(model["observations"])
+        )
+    os.replace(tmp_path, path)
+
+def load_factor_model(path: str) -> dict:
+    """Read a model written by save_factor_model and index it by symbol"""
+    with np.load(path, allow_pickle=False) as data:
+        model = {name: data[name] for name in data.files}
+
+    for name in ("symbols", "sectors", "factors"):
+        model[name] = model[name].tolist()
+    model["fitted_at"] = float(model["fitted_at"])
+    model["observations"] = int(model["observations"])
+    model["index"] = {symbol: i for i, symbol in enumerate(model["symbols"])}
+    return model
+
+def get_factor_model() -> Optional[dict]:
+    """
+    The current fitted model, reloaded when the file on disk changes
+
+    Never fits; returns None until a model has been saved.
+    """
+    global _model, _model_mtime
+
+    path = get_factor_model_config()["path"]
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return _model
+
+    if _model is None or mtime != _model_mtime:
+        with _model_lock:
+            if _model is None or mtime != _model_mtime:
+                try:
+                    _model = load_factor_model(path)
+                    _model_mtime = mtime
+                except Exception as e:
+                    logger.error(f"Error loading factor model from {path}: {e}")
+    return _model
+
+def refresh_factor_model(force: bool = False, universe: list = None) -> Optional[dict]:
+    """
+    Fit and save the universe model when it is missing or older than FACTOR_MODEL_MAX_AGE_HOURS
+
+    Args:
+        force: Refit even if the saved model is fresh
+        universe: Symbols to fit (defaults to FACTOR_UNIVERSE, then the symbol master)
+
+    Returns:
+        The current model
+    """
+    global _model, _model_mtime
+
+    config = get_factor_model_config()
+    model = get_factor_model()
+    if not force and model is not None and time.time() - model["fitted_at"] < config["max_age"]:
+        return model
+
+    symbols = universe or config["universe"] or [e["symbol"] for e in get_symbol_index()["entries"]]
+    logger.info(f"Fitting factor model for {len(symbols)} symbols")
+
+    with time_stage("factor_model_fit"):
+        data = load_universe(symbols, config["benchmark"], config["history_days"], config["workers"])
+        sector_map = load_sector_map(data["symbols"], config["sector_path"])
+        fitted = fit_factor_model(
+            data["symbols"],
+            data["returns"],
+            data["market_returns"],
+            [sector_map[s] for s in data["symbols"]],
+            style_characteristics(data["returns"], data["infos"]),
+            config["min_sector_size"]
+        )
+        save_factor_model(fitted, config["path"])
+
+    with _model_lock:
+        _model = load_factor_model(config["path"])
+        _model_mtime = os.path.getmtime(config["path"])
+
+    logger.info(f"Factor model fitted: {len(fitted['symbols'])} symbols, {len(fitted['factors'])} factors, "
+                f"median R² {float(np.median(fitted['r_squared'])):.2f}")
+    return _model
+
+def get_symbol_factors(symbol: str, model: dict = None) -> Optional[dict]:
+    """
+    Exposures, R² and idiosyncratic volatility of one symbol
+
+    Returns:
+        Profile dictionary, or None when the symbol is not in the model
+    """
+    model = model or get_factor_model()
+    i = model["index"].get(symbol) if model else None
+    if i is None:
+        return None
+
+    exposures = model["exposures"][i]
+    return {
+        "symbol": symbol,
+        "sector": model["sectors"][i] or None,
+        "exposures": {name: float(value) for name, value in zip(model["factors"], exposures) if value != 0.0},
+        "alpha": float(model["alpha"][i]),
+        "r_squared": float(model["r_squared"][i]),
+        "idiosyncratic_volatility": float(model["idio_vol"][i]),
+        "fitted_at": datetime.fromtimestamp(model["fitted_at"]).isoformat()
+    }
+
+def portfolio_factor_risk(holdings: list, model: dict = None) -> Optional[dict]:
+    """
+    Factor decomposition of portfolio variance from the fitted model
+
+    variance = b' F b + sum(w_i² s_i²), with b = w' B the portfolio exposures,
+    F the factor covariance and s_i the idiosyncratic volatilities. Holdings
+    outside the model are reported and left out.
+
+    Args:
+        holdings: List of dicts with 'symbol' and 'weight' keys
+        model: Fitted model (defaults to the saved one)
+
+    Returns:
+        Dictionary with volatility split, exposures and factor risk
+        contributions, or None when no model is available or no holding
+        is in it
+    """
+    model = model or get_factor_model()
+    if model is None:
+        return None
+
+    rows = [model["index"].get(h["symbol"]) for h in holdings]
+    covered = [(row, h["weight"]) for row, h in zip(rows, holdings) if row is not None]
+    uncovered = [h["symbol"] for row, h in zip(rows, holdings) if row is None]
+    if not covered:
+        return None
+
+    idx = np.array([row for row, _ in covered], dtype=int)
+    weights = np.array([weight for _, weight in covered], dtype=float)
+
+    exposures = weights @ model["exposures"][idx]
+    factor_cov_exposures = model["factor_cov"] @ exposures
+    factor_var = float(exposures @ factor_cov_exposures)
+    specific_var = float(np.sum((weights * model["idio_vol"][idx]) ** 2))
+    total_var = factor_var + specific_var
+
+    contributions = exposures * factor_cov_exposures / total_var if total_var > 0 else np.zeros_like(exposures)
+    order = np.argsort(-np.abs(contributions))
+
+    return {
+        "volatility": float(np.sqrt(total_var)),
+        "factor_volatility": float(np.sqrt(max(factor_var, 0.0))),
+        "specific_volatility": float(np.sqrt(specific_var)),
+        "systematic_share": factor_var / total_var if total_var > 0 else 0.0,
+        "exposures": {model["factors"][j]: float(exposures[j]) for j in range(len(exposures)) if exposures[j] != 0.0},
+        "risk_contributions": {model["factors"][j]: float(contributions[j]) for j in order if contributions[j] != 0.0},
+        "covered_weight": float(weights.sum()),
+        "uncovered_symbols": uncovered,
+        "fitted_at": datetime.fromtimestamp(model["fitted_at"]).isoformat()
+    }
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Fit and save the universe factor model")
+    parser.add_argument("--universe", help="Comma-separated symbols (defaults to FACTOR_UNIVERSE or the symbol master)")
+    parser.add_argument("--force", action="store_true", help="Refit even if the saved model is fresh")
+    args = parser.parse_args(argv)
+
+    universe = [s.strip() for s in args.universe.split(",") if s.strip()] if args.universe else None
+    model = refresh_factor_model(force=args.force or bool(universe), universe=universe)
+    print(f"{len(model['symbols'])} symbols, {len(model['factors'])} factors, "
+          f"median R² {float(np.median(model['r_squared'])):.3f}, saved to {get_factor_model_config()['path']}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,25 +1,31 @@
 """
 Financial risk calculation - Debt-to-Equity, Interest Coverage, Earnings Variability
+
+All functions take a symbol data bundle from
+app.data_sources.symbol_data.load_symbol_data, so fundamentals are looked up
+once per analysis.
 """
 
 import numpy as np
 from app.data_sources.fundamentals import get_balance_sheet, get_income_statement, get_earnings_history
-from app.utils.logger import get_logger
+from app.data_sources.symbol_data import load_symbol_data
+from app.utils.logger import get_logger, log_hot
 
 logger = get_logger()
 
-def calculate_debt_to_equity(symbol: str) -> float:
+def calculate_debt_to_equity(data: dict) -> float:
     """
     Calculate debt-to-equity ratio from balance sheet
     
     Args:
-        symbol: Stock ticker symbol
+        data: Symbol data bundle
         
     Returns:
         Debt-to-equity ratio
     """
+    symbol = data["symbol"]
     try:
-        balance_sheet = get_balance_sheet(symbol)
+        balance_sheet = get_balance_sheet(symbol, data["info"])
         total_debt = balance_sheet.get("total_debt", 0)
         total_equity = balance_sheet.get("total_equity", 1)
         
@@ -27,7 +33,7 @@ def calculate_debt_to_equity(symbol: str) -> float:
             return float('inf')
         
         ratio = total_debt / total_equity
-        logger.info(f"Debt-to-Equity for {symbol}: {ratio:.2f}")
+        log_hot("DEBUG", "Debt-to-Equity for {}: {:.2f}", symbol, ratio)
         
         return float(ratio)
     
@@ -35,18 +41,19 @@ def calculate_debt_to_equity(symbol: str) -> float:
         logger.error(f"Error calculating debt-to-equity for {symbol}: {e}")
         return 1.0  # Default moderate leverage
 
-def calculate_interest_coverage(symbol: str) -> float:
+def calculate_interest_coverage(data: dict) -> float:
     """
     Calculate interest coverage ratio from income statement
     
     Args:
-        symbol: Stock ticker symbol
+        data: Symbol data bundle
         
     Returns:
         Interest coverage ratio
     """
+    symbol = data["symbol"]
     try:
-        income_statement = get_income_statement(symbol)
+        income_statement = get_income_statement(symbol, data["info"])
         ebit = income_statement.get("ebit", 0)
         interest_expense = income_statement.get("interest_expense", 1)
         
@@ -54,7 +61,7 @@ def calculate_interest_coverage(symbol: str) -> float:
             return float('inf')
         
         coverage = ebit / interest_expense
-        logger.info(f"Interest Coverage for {symbol}: {coverage:.2f}")
+        log_hot("DEBUG", "Interest Coverage for {}: {:.2f}", symbol, coverage)
         
         return float(coverage)
     
@@ -62,25 +69,26 @@ def calculate_interest_coverage(symbol: str) -> float:
         logger.error(f"Error calculating interest coverage for {symbol}: {e}")
         return 5.0  # Default moderate coverage
 
-def calculate_earnings_variability(symbol: str, periods: int = 12) -> float:
+def calculate_earnings_variability(data: dict, periods: int = 12) -> float:
     """
     Calculate coefficient of variation for earnings
     
     Args:
-        symbol: Stock ticker symbol
+        data: Symbol data bundle
         periods: Number of periods to analyze
         
     Returns:
         Earnings variability coefficient
     """
+    symbol = data["symbol"]
     try:
-        earnings = get_earnings_history(symbol, periods)
+        earnings = get_earnings_history(symbol, periods, data["info"])
         
         if len(earnings) == 0 or np.mean(earnings) == 0:
             return 0.5
         
         coefficient = np.std(earnings) / np.mean(earnings)
-        logger.info(f"Earnings Variability for {symbol}: {coefficient:.4f}")
+        log_hot("DEBUG", "Earnings Variability for {}: {:.4f}", symbol, coefficient)
         
         return float(coefficient)
     
@@ -88,18 +96,21 @@ def calculate_earnings_variability(symbol: str, periods: int = 12) -> float:
         logger.error(f"Error calculating earnings variability for {symbol}: {e}")
         return 0.5  # Default moderate variability
 
-def get_financial_risk_metrics(symbol: str) -> dict:
+def get_financial_risk_metrics(data) -> dict:
     """
     Aggregate all financial risk metrics
     
     Args:
-        symbol: Stock ticker symbol
+        data: Symbol data bundle (or a ticker symbol, loaded on the spot)
         
     Returns:
         Dictionary with all financial risk metrics
     """
+    if isinstance(data, str):
+        data = load_symbol_data(data)
+    
     return {
-        "debt_to_equity": calculate_debt_to_equity(symbol),
-        "interest_coverage": calculate_interest_coverage(symbol),
-        "earnings_variability": calculate_earnings_variability(symbol)
+        "debt_to_equity": calculate_debt_to_equity(data),
+        "interest_coverage": calculate_interest_coverage(data),
+        "earnings_variability": calculate_earnings_variability(data)
     }
@@ -0,0 +1,169 @@
+"""
+Multi-horizon risk metrics from one shared returns array
+
+One cumulative-sum pass over stacked return powers and cross products gives
+every trailing window's sums in O(1). Volatility, beta, correlation, downside
+deviation, Sortino, skew and kurtosis for all horizons then cost a handful of
+array operations. Drawdowns need the path, so they take a running maximum
+per horizon (one shared pass for a single series).
+
+Works on a single series (1-D) or a panel of symbols (n x T) aligned on the
+same trailing dates, with the most recent return last. All horizons are
+evaluated together as one (metric x symbol x horizon) array computation.
+"""
+
+import math
+
+import numpy as np
+
+# Horizon label -> trading days of prices (a window of d prices has d - 1 returns)
+HORIZONS = {"1m": 21, "3m": 63, "6m": 126, "1y": 252, "3y": 756}
+
+PERIODS_PER_YEAR = 252
+
+METRICS = (
+    "volatility", "beta", "correlation", "downside_deviation", "sortino",
+    "max_drawdown", "drawdown_duration", "skew", "kurtosis"
+)
+
+def _prefix_sums(returns: np.ndarray, benchmark: np.ndarray = None) -> np.ndarray:
+    """
+    Stacked prefix sums along time, shape (k, n, T + 1)
+
+    Moments use returns centered on their full-sample mean, which leaves
+    central moments unchanged and avoids cancellation in the power sums.
+    Downside sums use raw returns (target return 0).
+    """
+    center = returns.mean(axis=1, keepdims=True)
+    x = returns - center
+    x2 = x * x
+    terms = [returns, x, x2, x2 * x, x2 * x2, np.minimum(returns, 0.0) ** 2]
+
+    if benchmark is not None:
+        y = np.broadcast_to(benchmark - benchmark.mean(axis=-1, keepdims=True), returns.shape)
+        terms += [y, y * y, x * y]
+
+    stacked = np.stack(terms)
+    sums = np.zeros(stacked.shape[:-1] + (stacked.shape[-1] + 1,))
+    np.cumsum(stacked, axis=-1, out=sums[..., 1:])
+    return sums
+
+def _window_sums(sums: np.ndarray, windows: np.ndarray) -> np.ndarray:
+    """Sums over the trailing windows, shape (k, n, H)"""
+    return sums[..., -1:] - sums[..., -1 - windows]
+
+def _underwater(wealth: np.ndarray, steps: np.ndarray) -> tuple:
+    peaks = np.maximum.accumulate(wealth, axis=-1)
+    max_drawdown = (wealth / peaks - 1.0).min(axis=-1)
+    last_peak = np.maximum.accumulate(np.where(wealth >= peaks, steps, 0), axis=-1)
+    return max_drawdown, (steps - last_peak).max(axis=-1)
+
+def _drawdowns(returns: np.ndarray, windows: np.ndarray) -> tuple:
+    """
+    Max drawdown (negative fraction) and longest underwater stretch (days), shape (n, H)
+
+    A single series runs all horizons through one running maximum over the
+    longest window: before a horizon's start its wealth is held at the start
+    level, which can neither deepen a drawdown nor end one early. Panels take
+    one pass per horizon instead, which keeps the work proportional to the
+    window lengths.
+    """
+    longest = int(windows.max())
+    growth = np.cumprod(1.0 + returns[:, -longest:], axis=1)
+    # Start at wealth 1 so a loss on the first day of the longest window counts
+    wealth = np.concatenate([np.ones((growth.shape[0], 1)), growth], axis=1)
+    steps = np.arange(longest + 1)
+    starts = longest - windows
+
+    if returns.shape[0] == 1:
+        before = steps[None, :] < starts[:, None]
+        paths = np.where(before, wealth[0, starts][:, None], wealth[0])
+        max_drawdown, duration = _underwater(paths, steps)
+        return max_drawdown[None, :], duration[None, :]
+
+    per_horizon = [_underwater(wealth[:, start:], steps[start:]) for start in starts]
+    return (np.stack([dd for dd, _ in per_horizon], axis=1),
+            np.stack([duration for _, duration in per_horizon], axis=1))
+
+def _fused_metrics(sums: np.ndarray, returns: np.ndarray, windows: np.ndarray, has_benchmark: bool,
+                   periods_per_year: int) -> dict:
+    """Every metric for every horizon at once, each of shape (n, H)"""
+    s = _window_sums(sums, windows)
+    n = windows.astype(float)
+    raw_sum, s1, s2, s3, s4, down2 = s[:6]
+
+    mean = s1 / n
+    m2 = np.maximum(s2 / n - mean ** 2, 0.0)
+    m3 = s3 / n - 3 * mean * s2 / n + 2 * mean ** 3
+    m4 = s4 / n - 4 * mean * s3 / n + 6 * mean ** 2 * s2 / n - 3 * mean ** 4
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annual_factor = np.sqrt(periods_per_year)
+        downside = np.sqrt(down2 / n) * annual_factor
+        metrics = {
+            "volatility": np.sqrt(m2) * annual_factor,
+            "downside_deviation": downside,
+            "sortino": np.where(downside > 0, (raw_sum / n) * periods_per_year / downside, np.nan),
+            "skew": np.where(m2 > 0, m3 / m2 ** 1.5, np.nan),
+            "kurtosis": np.where(m2 > 0, m4 / m2 ** 2 - 3.0, np.nan)
+        }
+
+        if has_benchmark:
+            y1, y2, xy = s[6:9]
+            y_mean = y1 / n
+            cov = xy / n - mean * y_mean
+            var_y = y2 / n - y_mean ** 2
+            metrics["beta"] = np.where(var_y > 0, cov / var_y, np.nan)
+            metrics["correlation"] = np.where((var_y > 0) & (m2 > 0), cov / np.sqrt(var_y * m2), np.nan)
+
+    metrics["max_drawdown"], metrics["drawdown_duration"] = _drawdowns(returns, windows)
+    return metrics
+
+def compute_horizon_metrics(returns: np.ndarray, benchmark_returns: np.ndarray = None,
+                            horizons: dict = None, periods_per_year: int = PERIODS_PER_YEAR) -> dict:
+    """
+    Risk metrics over several trailing horizons in one pass
+
+    Args:
+        returns: Daily returns, 1-D (one symbol) or n x T (panel), most recent last
+        benchmark_returns: Benchmark returns over the same T dates (optional;
+            beta and correlation are left out without it)
+        horizons: Label -> trading days (defaults to HORIZONS)
+        periods_per_year: Annualization factor
+
+    Returns:
+        {label: {metric: value}}. For 1-D input values are floats (None when
+        undefined), for panels they are arrays of length n (NaN when
+        undefined). Horizons longer than the history are None.
+    """
+    horizons = horizons or HORIZONS
+    single = np.ndim(returns) == 1
+    panel = np.atleast_2d(np.asarray(returns, dtype=float))
+    benchmark = None if benchmark_returns is None else np.asarray(benchmark_returns, dtype=float)
+
+    if benchmark is not None and benchmark.shape[-1] != panel.shape[-1]:
+        raise ValueError(f"benchmark has {benchmark.shape[-1]} returns, expected {panel.shape[-1]}")
+
+    available = panel.shape[-1]
+    labels = [label for label, days in horizons.items() if 2 <= days - 1 <= available]
+    results = {label: None for label in horizons}
+    if not labels:
+        return results
+
+    windows = np.array([horizons[label] - 1 for label in labels])
+    sums = _prefix_sums(panel, benchmark)
+    metrics = _fused_metrics(sums, panel, windows, benchmark is not None, periods_per_year)
+
+    if single:
+        # One conversion to Python scalars for the whole (metric x horizon) table
+        table = {name: values[0].tolist() for name, values in metrics.items()}
+        for h, label in enumerate(labels):
+            results[label] = {
+                name: values[h] if math.isfinite(values[h]) else None
+                for name, values in table.items()
+            }
+    else:
+        for h, label in enumerate(labels):
+            results[label] = {name: values[:, h] for name, values in metrics.items()}
+
+    return results
@@ -1,48 +1,42 @@
 """
 Market risk calculation - Beta, Volatility, Correlation
+
+All functions take a symbol data bundle from
+app.data_sources.symbol_data.load_symbol_data, so prices are fetched and
+returns computed once per analysis.
 """
 
 import numpy as np
-from app.data_sources.market_data import get_stock_prices
-from app.data_sources.indices import get_index_prices
-from app.utils.logger import get_logger
+from app.data_sources.symbol_data import load_symbol_data
+from app.risk_engine.horizon_metrics import HORIZONS, compute_horizon_metrics
+from app.utils.logger import get_logger, log_hot
 
 logger = get_logger()
 
-def calculate_beta(symbol: str, index: str = "^GSPC", period: int = 252) -> float:
+def calculate_beta(data: dict) -> float:
     """
     Calculate stock beta relative to market index
     
     Args:
-        symbol: Stock ticker symbol
-        index: Market index symbol
-        period: Number of trading days
+        data: Symbol data bundle
         
     Returns:
         Beta value
     """
+    symbol = data["symbol"]
     try:
-        stock_prices = get_stock_prices(symbol, period)
-        index_prices = get_index_prices(index, period)
-        
-        # Ensure same length
-        min_len = min(len(stock_prices), len(index_prices))
-        stock_prices = stock_prices[-min_len:]
-        index_prices = index_prices[-min_len:]
+        stock_returns = data["aligned_returns"]
+        index_returns = data["benchmark_returns"]
         
-        # Calculate returns
-        stock_returns = np.diff(stock_prices) / stock_prices[:-1]
-        index_returns = np.diff(index_prices) / index_prices[:-1]
-        
-        # Calculate covariance and variance
-        covariance = np.cov(stock_returns, index_returns)[0, 1]
+        # Population (ddof=0) moments on both sides, as in the horizon kernel
+        covariance = np.cov(stock_returns, index_returns, ddof=0)[0, 1]
         index_variance = np.var(index_returns)
         
         if index_variance == 0:
             return 1.0
         
         beta = covariance / index_variance
-        logger.info(f"Beta for {symbol}: {beta:.2f}")
+        log_hot("DEBUG", "Beta for {}: {:.2f}", symbol, beta)
         
         return float(beta)
     
@@ -50,24 +44,21 @@ def calculate_beta(symbol: str, index: str = "^GSPC", period: int = 252) -> floa
         logger.error(f"Error calculating beta for {symbol}: {e}")
         return 1.0  # Market beta as default
 
-def calculate_volatility(symbol: str, period: int = 252) -> float:
+def calculate_volatility(data: dict) -> float:
     """
     Calculate stock volatility (annualized standard deviation)
     
     Args:
-        symbol: Stock ticker symbol
-        period: Number of trading days
+        data: Symbol data bundle
         
     Returns:
         Annualized volatility
     """
+    symbol = data["symbol"]
     try:
-        stock_prices = get_stock_prices(symbol, period)
-        stock_returns = np.diff(stock_prices) / stock_prices[:-1]
-        
         # Annualized volatility (252 trading days)
-        volatility = np.std(stock_returns) * np.sqrt(252)
-        logger.info(f"Volatility for {symbol}: {volatility:.4f}")
+        volatility = np.std(data["returns"]) * np.sqrt(252)
+        log_hot("DEBUG", "Volatility for {}: {:.4f}", symbol, volatility)
         
         return float(volatility)
     
@@ -75,32 +66,20 @@ def calculate_volatility(symbol: str, period: int = 252) -> float:
         logger.error(f"Error calculating volatility for {symbol}: {e}")
         return 0.2  # Default moderate volatility
 
-def calculate_correlation(symbol: str, index: str = "^GSPC", period: int = 252) -> float:
+def calculate_correlation(data: dict) -> float:
     """
     Calculate correlation coefficient with market index
     
     Args:
-        symbol: Stock ticker symbol
-        index: Market index symbol
-        period: Number of trading days
+        data: Symbol data bundle
         
     Returns:
         Correlation coefficient
     """
+    symbol = data["symbol"]
     try:
-        stock_prices = get_stock_prices(symbol, period)
-        index_prices = get_index_prices(index, period)
-        
-        # Ensure same length
-        min_len = min(len(stock_prices), len(index_prices))
-        stock_prices = stock_prices[-min_len:]
-        index_prices = index_prices[-min_len:]
-        
-        stock_returns = np.diff(stock_prices) / stock_prices[:-1]
-        index_returns = np.diff(index_prices) / index_prices[:-1]
-        
-        correlation = np.corrcoef(stock_returns, index_returns)[0, 1]
-        logger.info(f"Correlation for {symbol}: {correlation:.4f}")
+        correlation = np.corrcoef(data["aligned_returns"], data["benchmark_returns"])[0, 1]
+        log_hot("DEBUG", "Correlation for {}: {:.4f}", symbol, correlation)
         
         return float(correlation)
     
@@ -108,18 +87,49 @@ def calculate_correlation(symbol: str, index: str = "^GSPC", period: int = 252)
         logger.error(f"Error calculating correlation for {symbol}: {e}")
         return 0.5  # Default moderate correlation
 
-def get_market_risk_metrics(symbol: str) -> dict:
+def get_market_risk_metrics(data) -> dict:
     """
     Aggregate all market risk metrics
     
+    Beta, volatility and correlation are the 1y values (the longest horizon
+    the history covers, up to 1y). "horizons" adds every horizon from the
+    fused kernel, including downside deviation, Sortino, drawdowns, skew and
+    kurtosis.
+    
     Args:
-        symbol: Stock ticker symbol
+        data: Symbol data bundle (or a ticker symbol, loaded on the spot)
         
     Returns:
         Dictionary with all market risk metrics
     """
+    if isinstance(data, str):
+        data = load_symbol_data(data)
+    
+    symbol = data["symbol"]
+    try:
+        horizons = compute_horizon_metrics(data["aligned_returns"], data["benchmark_returns"])
+    except Exception as e:
+        logger.error(f"Error calculating horizon metrics for {symbol}: {e}")
+        horizons = {}
+    
+    headline = next(
+        (horizons[label] for label in reversed(list(HORIZONS)) if HORIZONS[label] <= 252 and horizons.get(label)),
+        None
+    )
+    if headline is None:
+        # Too little history for any horizon: single-window calculations
+        return {
+            "beta": calculate_beta(data),
+            "volatility": calculate_volatility(data),
+            "correlation": calculate_correlation(data),
+            "horizons": horizons
+        }
+    
+    log_hot("DEBUG", "Beta {:.2f}, volatility {:.4f} for {}", headline["beta"] or 0.0, headline["volatility"] or 0.0, symbol)
+    
     return {
-        "beta": calculate_beta(symbol),
-        "volatility": calculate_volatility(symbol),
-        "correlation": calculate_correlation(symbol)
+        "beta": headline["beta"] if headline["beta"] is not None else 1.0,
+        "volatility": headline["volatility"] if headline["volatility"] is not None else 0.2,
+        "correlation": headline["correlation"] if headline["correlation"] is not None else 0.5,
+        "horizons": horizons
     }
@@ -0,0 +1,365 @@
+"""
+Portfolio optimizer - Minimum Variance, Risk Parity, Maximum Diversification
+
+All solvers work on a covariance matrix that is already cached (the
+correlation store or a portfolio session), under long-only box constraints,
+a full-investment budget and optional per-sector caps.
+
+- Minimum variance: accelerated projected gradient (FISTA with restarts)
+- Risk parity (equal risk contribution): cyclical coordinate descent on the
+  log-barrier formulation; when constraints bind, projected gradient on the
+  constrained risk budgeting problem
+- Maximum diversification: projected gradient with backtracking on
+  -log(diversification ratio)
+
+Every step is a matrix-vector product plus an exact projection onto the
+constraint set (a few vectorized Newton steps), so 1,000+ assets solve in
+well under a second.
+"""
+
+import numpy as np
+
+from app.risk_engine.correlation_store import get_covariance_matrix
+from app.risk_engine.factor_model import load_sector_map
+from app.utils.config import get_factor_model_config, get_optimizer_config
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+METHODS = ("min_variance", "risk_parity", "max_diversification")
+
+_BISECTION_STEPS = 60
+
+def shrink_covariance(cov: np.ndarray, shrinkage: float) -> np.ndarray:
+    """Blend a covariance matrix with its diagonal (keeps it well conditioned)"""
+    if shrinkage <= 0:
+        return cov
+    shrunk = (1.0 - shrinkage) * cov
+    shrunk[np.diag_indices_from(shrunk)] = np.diag(cov)
+    return shrunk
+
+def build_constraints(n: int, min_weight: float = 0.0, max_weight: float = 1.0,
+                      sectors: list = None, sector_caps: dict = None) -> dict:
+    """
+    Constraint set: lower <= w <= upper, sum(w) = 1, sector sums <= caps
+
+    Args:
+        n: Number of assets
+        min_weight / max_weight: Box bounds for every asset
+        sectors: Sector per asset (None or "" for unclassified)
+        sector_caps: {sector: maximum total weight}
+
+    Returns:
+        Constraints dictionary for optimize_portfolio
+
+    Raises:
+        ValueError: When no portfolio satisfies the constraints
+    """
+    lower = np.full(n, float(min_weight))
+    upper = np.full(n, float(max_weight))
+    if np.any(lower > upper):
+        raise ValueError("min_weight must not exceed max_weight")
+    if lower.sum() > 1.0 + 1e-9:
+        raise ValueError(f"min_weight {min_weight} is infeasible for {n} assets")
+
+    sector_caps = {s: float(cap) for s, cap in (sector_caps or {}).items()}
+    names = sorted({s for s in (sectors or []) if s and s in sector_caps})
+    slot = {s: i for i, s in enumerate(names)}
+    # Unclassified or uncapped assets share a last slot with no cap
+    sector_ids = np.array([slot.get(s, len(names)) for s in (sectors or [None] * n)], dtype=int)
+    caps = np.array([sector_caps[s] for s in names] + [np.inf])
+
+    sector_lower = np.bincount(sector_ids, lower, minlength=len(caps))
+    sector_upper = np.bincount(sector_ids, upper, minlength=len(caps))
+    if np.any(sector_lower > caps + 1e-9):
+        raise ValueError("Sector caps are below the minimum weights of their assets")
+    if np.minimum(sector_upper, caps).sum() < 1.0 - 1e-9:
+        raise ValueError("max_weight and sector caps leave less than 100% to allocate")
+
+    return {"lower": lower, "upper": upper, "sector_ids": sector_ids, "caps": caps, "sectors": names,
+            "sector_upper": sector_upper}
+
+def _thresholds(v: np.ndarray, lower: np.ndarray, upper: np.ndarray, ids: np.ndarray, targets: np.ndarray,
+                lo_t: float, hi_t: float, floor: np.ndarray = None, active: np.ndarray = None) -> np.ndarray:
+    """
+    Per-group t with sum over the group of clip(v - max(t, floor), lower, upper) = target
+
+    Safeguarded Newton inside a bisection bracket, vectorized over groups.
+    The sums are piecewise linear in t, so Newton lands exactly once the
+    set of free assets is right, usually within a few steps. Groups outside
+    the active mask are not solved.
+    """
+    m = len(targets)
+    a = np.full(m, lo_t)
+    b = np.full(m, hi_t)
+    # Start from the solution with nothing clipped, exact when no bound binds
+    counts = np.bincount(ids, minlength=m)
+    t = np.clip((np.bincount(ids, v, minlength=m) - targets) / np.maximum(counts, 1), lo_t, hi_t)
+    for _ in range(_BISECTION_STEPS):
+        level = t[ids] if floor is None else np.maximum(t[ids], floor)
+        x = v - level
+        excess = np.bincount(ids, np.clip(x, lower, upper), minlength=m) - targets
+        if active is not None:
+            excess[~active] = 0.0
+        done = np.abs(excess) <= 1e-13
+        if done.all():
+            break
+        a = np.where(excess > 0, t, a)
+        b = np.where(excess > 0, b, t)
+        free = (x > lower) & (x < upper)
+        if floor is not None:
+            free &= t[ids] > floor
+        slope = np.bincount(ids, free, minlength=m)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = t + excess / slope
+        step = np.where((slope > 0) & (newton > a) & (newton < b), newton, 0.5 * (a + b))
+        t = np.where(done, t, step)
+    return t
+
+def project(v: np.ndarray, constraints: dict) -> np.ndarray:
+    """
+    Euclidean projection onto the constraint set
+
+    The KKT point is w = clip(v - max(lambda, t_s), lower, upper), where t_s
+    makes a capped sector s sum exactly to its cap (-inf for sectors that
+    do not bind). The sector thresholds, then lambda, are found by
+    safeguarded Newton steps on piecewise-linear sums.
+    """
+    lower, upper = constraints["lower"], constraints["upper"]
+    ids, caps = constraints["sector_ids"], constraints["caps"]
+    single = np.zeros(len(v), dtype=int)
+
+    lo_t = float(np.min(v - upper)) - 1.0
+    hi_t = float(np.max(v - lower)) + 1.0
+
+    # Sectors whose assets cannot reach their cap never bind
+    binding = np.isfinite(caps) & (constraints["sector_upper"] > caps)
+    if not binding.any():
+        lam = _thresholds(v, lower, upper, single, np.ones(1), lo_t, hi_t)[0]
+        return np.clip(v - lam, lower, upper)
+
+    sector_t = _thresholds(v, lower, upper, ids, np.where(binding, caps, 0.0), lo_t, hi_t, active=binding)
+    floor = np.where(binding, sector_t, -np.inf)[ids]
+    lam = _thresholds(v, lower, upper, single, np.ones(1), lo_t, hi_t, floor)[0]
+    return np.clip(v - np.maximum(lam, floor), lower, upper)
+
+def _largest_eigenvalue(cov: np.ndarray, steps: int = 50) -> float:
+    x = np.full(len(cov), 1.0 / np.sqrt(len(cov)))
+    value = 0.0
+    for _ in range(steps):
+        y = cov @ x
+        value = float(np.linalg.norm(y))
+        if value == 0:
+            return 0.0
+        x = y / value
+    return value
+
+def _min_variance(cov: np.ndarray, constraints: dict, w0: np.ndarray, max_iter: int, tol: float) -> tuple:
+    """FISTA on w'Cw with gradient-based restarts"""
+    step = 1.0 / (2.0 * max(_largest_eigenvalue(cov), 1e-12))
+    w = project(w0, constraints)
+    y, t = w, 1.0
+    for iteration in range(1, max_iter + 1):
+        w_next = project(y - step * 2.0 * (cov @ y), constraints)
+        if np.max(np.abs(w_next - w)) < tol:
+            return w_next, iteration, True
+        t_next = 0.5 * (1.0 + np.sqrt(1.0 + 4.0 * t * t))
+        if np.dot(y - w_next, w_next - w) > 0:
+            # Momentum points uphill: restart
+            y, t = w_next, 1.0
+        else:
+            y, t = w_next + ((t - 1.0) / t_next) * (w_next - w), t_next
+        w = w_next
+    return w, max_iter, False
+
+def _projected_gradient(objective, gradient, constraints: dict, w0: np.ndarray, step: float,
+                        max_iter: int, tol: float) -> tuple:
+    """Projected gradient with backtracking (sufficient decrease along the projection arc)"""
+    w = project(w0, constraints)
+    value = objective(w)
+    for iteration in range(1, max_iter + 1):
+        g = gradient(w)
+        while True:
+            w_next = project(w - step * g, constraints)
+            d = w_next - w
+            next_value = objective(w_next)
+            if next_value <= value + g @ d + 0.5 / step * (d @ d) or step < 1e-16:
+                break
+            step *= 0.5
+        if np.max(np.abs(d)) < tol:
+            return w_next, iteration, True
+        w, value = w_next, next_value
+        step *= 1.25
+    return w, max_iter, False
+
+def _risk_parity_ccd(cov: np.ndarray, budgets: np.ndarray, max_iter: int, tol: float) -> tuple:
+    """
+    Cyclical coordinate descent for min 1/2 y'Cy - sum(b log y)
+
+    Each coordinate has a closed-form update; Cy is kept up to date with one
+    column update per coordinate. w = y / sum(y) has risk contributions
+    proportional to b.
+    """
+    diag = np.diag(cov).copy()
+    y = budgets / np.sqrt(np.maximum(diag, 1e-16))
+    cy = cov @ y
+    for sweep in range(1, max_iter + 1):
+        largest_change = 0.0
+        for i in range(len(y)):
+            c = cy[i] - diag[i] * y[i]
+            new = (-c + np.sqrt(c * c + 4.0 * diag[i] * budgets[i])) / (2.0 * diag[i])
+            delta = new - y[i]
+            if delta != 0.0:
+                cy += cov[i] * delta
+                y[i] = new
+                largest_change = max(largest_change, abs(delta) / new)
+        if largest_change < tol:
+            return y / y.sum(), sweep, True
+    return y / y.sum(), max_iter, False
+
+def _feasible(w: np.ndarray, constraints: dict, tol: float = 1e-9) -> bool:
+    sums = np.bincount(constraints["sector_ids"], w, minlength=len(constraints["caps"]))
+    return bool(np.all(w >= constraints["lower"] - tol) and np.all(w <= constraints["upper"] + tol)
+                and np.all(sums <= constraints["caps"] + tol))
+
+def portfolio_statistics(weights: np.ndarray, cov: np.ndarray) -> dict:
+    """Volatility, diversification ratio and risk contributions (fractions of variance)"""
+    cov_w = cov @ weights
+    variance = float(weights @ cov_w)
+    volatility = float(np.sqrt(max(variance, 0.0)))
+    vols = np.sqrt(np.maximum(np.diag(cov), 0.0))
+    return {
+        "volatility": volatility,
+        "diversification_ratio": float(weights @ vols) / volatility if volatility > 0 else 1.0,
+        "risk_contributions": weights * cov_w / variance if variance > 0 else np.zeros_like(weights)
+    }
+
+def optimize_portfolio(cov: np.ndarray, method: str, constraints: dict = None, budgets: np.ndarray = None,
+                       w0: np.ndarray = None) -> dict:
+    """
+    Optimal weights for a covariance matrix
+
+    Args:
+        cov: n x n annualized covariance (already cached; nothing is fetched)
+        method: min_variance, risk_parity or max_diversification
+        constraints: From build_constraints (long-only, fully invested by default)
+        budgets: Risk budgets for risk_parity (equal when omitted)
+        w0: Starting weights (equal weights when omitted)
+
+    Returns:
+        Dictionary with weights, volatility, diversification_ratio,
+        risk_contributions, iterations and converged
+
+    Raises:
+        ValueError: Unknown method, or assets without positive variance
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of: {', '.join(METHODS)}")
+
+    # A riskless (or undefined) asset has no risk budget to balance and
+    # sends the risk-parity and diversification updates to NaN
+    flat = np.flatnonzero(~(np.diag(cov) > 0))
+    if len(flat):
+        raise ValueError(f"Assets at positions {flat.tolist()} have zero or undefined variance")
+
+    config = get_optimizer_config()
+    n = len(cov)
+    constraints = constraints or build_constraints(n)
+    cov = shrink_covariance(np.asarray(cov, dtype=float), config["shrinkage"])
+    w0 = np.full(n, 1.0 / n) if w0 is None else np.asarray(w0, dtype=float)
+    max_iter, tol = config["max_iter"], config["tolerance"]
+
+    if method == "min_variance":
+        weights, iterations, converged = _min_variance(cov, constraints, w0, max_iter, tol)
+
+    elif method == "max_diversification":
+        vols = np.sqrt(np.maximum(np.diag(cov), 1e-16))
+
+        def objective(w):
+            return 0.5 * np.log(w @ cov @ w) - np.log(w @ vols)
+
+        def gradient(w):
+            return (cov @ w) / (w @ cov @ w) - vols / (w @ vols)
+
+        step = 1.0 / max(_largest_eigenvalue(cov) / float(w0 @ cov @ w0), 1e-12)
+        weights, iterations, converged = _projected_gradient(objective, gradient, constraints, w0, step, max_iter, tol)
+
+    else:
+        budgets = np.full(n, 1.0 / n) if budgets is None else np.asarray(budgets, dtype=float) / np.sum(budgets)
+        weights, iterations, converged = _risk_parity_ccd(cov, budgets, max_iter, tol)
+
+        if not _feasible(weights, constraints):
+            # Constrained risk budgeting: same barrier, scaled so an
+            # unconstrained optimum would be the ERC portfolio
+            scale = float(weights @ cov @ weights)
+            floor = np.maximum(constraints["lower"], 1e-8)
+            bounded = dict(constraints, lower=floor)
+
+            def objective(w):
+                return 0.5 * (w @ cov @ w) - scale * (budgets @ np.log(w))
+
+            def gradient(w):
+                return cov @ w - scale * budgets / w
+
+            step = 1.0 / max(_largest_eigenvalue(cov), 1e-12)
+            weights, more, converged = _projected_gradient(objective, gradient, bounded, weights, step, max_iter, tol)
+            iterations += more
+
+    if not converged:
+        logger.warning(f"{method} optimizer stopped after {iterations} iterations without converging")
+
+    return dict(portfolio_statistics(weights, cov), weights=weights, iterations=iterations, converged=converged,
+                method=method)
+
+def optimize_symbols(symbols: list, method: str, min_weight: float = 0.0, max_weight: float = 1.0,
+                     sector_caps: dict = None, cov: np.ndarray = None) -> dict:
+    """
+    Optimize a list of symbols under box and sector constraints
+
+    Args:
+        symbols: Ticker symbols (unique)
+        method: min_variance, risk_parity or max_diversification
+        min_weight / max_weight: Box bounds for every asset
+        sector_caps: {sector: maximum total weight}
+        cov: Covariance to reuse (a session's); taken from the correlation
+            store when omitted
+
+    Returns:
+        Dictionary with weights and risk_contributions per symbol, sector
+        weights, volatility, diversification_ratio, iterations and converged
+
+    Raises:
+        ValueError: Too many symbols, unknown method, infeasible constraints
+            or symbols without return history
+    """
+    max_assets = get_optimizer_config()["max_assets"]
+    if len(symbols) > max_assets:
+        raise ValueError(f"At most {max_assets} symbols can be optimized at once")
+
+    sector_map = load_sector_map(symbols, get_factor_model_config()["sector_path"])
+    sectors = [sector_map.get(s, "") for s in symbols]
+    constraints = build_constraints(len(symbols), min_weight, max_weight, sectors, sector_caps)
+    if cov is None:
+        cov = get_covariance_matrix(symbols)
+
+    flat = [symbol for symbol, variance in zip(symbols, np.diag(cov)) if not variance > 0]
+    if flat:
+        raise ValueError(f"Not enough return history to estimate the risk of: {', '.join(flat)}")
+
+    result = optimize_portfolio(cov, method, constraints)
+    weights = result["weights"]
+    sector_weights = {}
+    for sector, weight in zip(sectors, weights.tolist()):
+        sector_weights[sector or "Unclassified"] = sector_weights.get(sector or "Unclassified", 0.0) + weight
+
+    logger.info(f"Optimized {len(symbols)} symbols with {method} in {result['iterations']} iterations")
+    return {
+        "method": method,
+        "weights": dict(zip(symbols, weights.tolist())),
+        "risk_contributions": dict(zip(symbols, result["risk_contributions"].tolist())),
+        "sector_weights": sector_weights,
+        "volatility": result["volatility"],
+        "diversification_ratio": result["diversification_ratio"],
+        "iterations": result["iterations"],
+        "converged": result["converged"]
+    }
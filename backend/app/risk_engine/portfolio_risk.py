@@ -3,8 +3,10 @@ Portfolio risk calculation - Correlation Matrix, Concentration, Diversification
 """
 
 import numpy as np
-from app.data_sources.market_data import get_stock_prices
-from app.utils.logger import get_logger
+from app.risk_engine.correlation_store import get_correlation_matrix
+from app.risk_engine.factor_model import portfolio_factor_risk
+from app.utils.logger import get_logger, log_hot
+from app.utils.serialization import summarize_matrix
 
 logger = get_logger()
 
@@ -18,31 +20,38 @@ def calculate_correlation_matrix(holdings: list) -> list:
     Returns:
         Correlation matrix as list of lists
     """
+    return calculate_correlation_array(holdings).tolist()
+
+def calculate_correlation_array(holdings: list) -> np.ndarray:
+    """
+    Calculate correlation matrix for portfolio holdings as a numpy array
+    
+    Pairs come from the incremental correlation store, so only holdings
+    that are new to the store cost any computation. Large portfolios should
+    keep the array and encode it directly instead of going through n*n
+    Python floats.
+    
+    Args:
+        holdings: List of dicts with 'symbol' and 'weight' keys
+        
+    Returns:
+        n x n correlation matrix (identity on failure)
+    """
     try:
         symbols = [h["symbol"] for h in holdings]
         
-        # Get returns for all stocks
-        returns_list = []
-        for symbol in symbols:
-            prices = get_stock_prices(symbol, 252)
-            returns = np.diff(prices) / prices[:-1]
-            returns_list.append(returns)
+        # Pairwise-complete correlations, tolerant of uneven history lengths
+        corr_matrix = get_correlation_matrix(symbols)
         
-        # Stack returns into matrix
-        returns_matrix = np.array(returns_list)
+        log_hot("DEBUG", "Calculated correlation matrix for {} stocks", len(symbols))
         
-        # Calculate correlation matrix
-        corr_matrix = np.corrcoef(returns_matrix)
-        
-        logger.info(f"Calculated correlation matrix for {len(symbols)} stocks")
-        
-        return corr_matrix.tolist()
+        return corr_matrix
     
     except Exception as e:
         logger.error(f"Error calculating correlation matrix: {e}")
         n = len(holdings)
         # Return identity matrix as fallback
-        return np.eye(n).tolist()
+        return np.eye(n)
 
 def calculate_concentration_index(holdings: list) -> float:
     """
@@ -58,7 +67,7 @@ def calculate_concentration_index(holdings: list) -> float:
         weights = [h["weight"] for h in holdings]
         hhi = sum(w**2 for w in weights)
         
-        logger.info(f"Portfolio concentration index (HHI): {hhi:.4f}")
+        log_hot("DEBUG", "Portfolio concentration index (HHI): {:.4f}", hhi)
         
         return float(hhi)
     
@@ -83,7 +92,7 @@ def calculate_diversification_score(holdings: list) -> float:
             return len(holdings)
         
         score = 1 / concentration
-        logger.info(f"Portfolio diversification score: {score:.2f}")
+        log_hot("DEBUG", "Portfolio diversification score: {:.2f}", score)
         
         return float(score)
     
@@ -91,19 +100,25 @@ def calculate_diversification_score(holdings: list) -> float:
         logger.error(f"Error calculating diversification score: {e}")
         return float(len(holdings))
 
-def calculate_portfolio_risk(holdings: list) -> dict:
+def calculate_portfolio_risk(holdings: list, matrix_as_array: bool = False) -> dict:
     """
     Aggregate all portfolio risk metrics
     
     Args:
         holdings: List of dicts with 'symbol' and 'weight' keys
+        matrix_as_array: Return the correlation matrix as a numpy array
         
     Returns:
         Dictionary with all portfolio risk metrics
     """
+    corr_matrix = calculate_correlation_array(holdings)
+    
     return {
-        "correlation_matrix": calculate_correlation_matrix(holdings),
+        "correlation_matrix": corr_matrix if matrix_as_array else corr_matrix.tolist(),
+        "correlation_summary": summarize_matrix(corr_matrix, [h["symbol"] for h in holdings]),
         "concentration_index": calculate_concentration_index(holdings),
         "diversification_score": calculate_diversification_score(holdings),
-        "num_holdings": len(holdings)
+        "num_holdings": len(holdings),
+        # None until a factor model has been fitted
+        "factor_risk": portfolio_factor_risk(holdings)
     }
@@ -0,0 +1,276 @@
+"""
+Stateful what-if portfolio sessions
+
+A session keeps each holding's risk result and the holdings' correlation
+matrix. Re-weighting only recomputes the weight-dependent metrics
+(concentration, weighted risk, covariance-based volatility and risk
+contributions) from those cached arrays. Adding a holding analyzes just that
+symbol and takes its correlation row from the correlation store; removing
+one drops its row and column. Explanations are generated only on request
+and cached per session version.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from app.ai.explanation import generate_risk_explanation
+from app.data_sources.warmup import record_symbol_request
+from app.risk_engine.aggregation import aggregate_stock_risk
+from app.risk_engine.correlation_store import get_correlation_matrix
+from app.risk_engine.factor_model import portfolio_factor_risk
+from app.risk_engine.portfolio_risk import calculate_concentration_index, calculate_diversification_score
+from app.utils.config import get_portfolio_session_config
+from app.utils.logger import get_logger, quiet_symbol_logs
+from app.utils.serialization import summarize_matrix
+
+logger = get_logger()
+
+# session_id -> session, least recently used first
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+def _analyze_holdings(symbols: list) -> dict:
+    """Risk result per symbol, analyzed in parallel"""
+    def analyze(symbol):
+        record_symbol_request(symbol)
+        with quiet_symbol_logs():
+            return aggregate_stock_risk(symbol)
+
+    if len(symbols) <= 1:
+        return {symbol: analyze(symbol) for symbol in symbols}
+    workers = get_portfolio_session_config()["workers"]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="portfolio-session") as executor:
+        return dict(zip(symbols, executor.map(analyze, symbols)))
+
+def _prune(now: float):
+    config = get_portfolio_session_config()
+    expired = [sid for sid, session in _sessions.items() if now - session["updated_at"] > config["ttl"]]
+    for sid in expired:
+        del _sessions[sid]
+    while len(_sessions) > config["max_sessions"]:
+        _sessions.popitem(last=False)
+
+def create_session(holdings: list) -> dict:
+    """
+    Create a session from holdings, analyzing every holding once
+
+    Args:
+        holdings: List of dicts with 'symbol' and 'weight' keys (repeated
+            symbols are merged)
+
+    Returns:
+        The session
+    """
+    weights = {}
+    for h in holdings:
+        weights[h["symbol"]] = weights.get(h["symbol"], 0.0) + h["weight"]
+
+    symbols = list(weights)
+    correlation = get_correlation_matrix(symbols)
+    now = time.time()
+    session = {
+        "id": uuid.uuid4().hex,
+        "weights": weights,
+        "symbols": symbols,
+        "risk": _analyze_holdings(symbols),
+        "correlation": correlation,
+        # Weight-independent, so only recomputed when the holdings change
+        "correlation_summary": summarize_matrix(correlation, symbols),
+        "version": 1,
+        "explanation": None,
+        "created_at": now,
+        "updated_at": now,
+        "lock": threading.Lock()
+    }
+
+    with _sessions_lock:
+        _prune(now)
+        _sessions[session["id"]] = session
+    logger.info(f"Created portfolio session {session['id']} with {len(symbols)} holdings")
+    return session
+
+def get_session(session_id: str) -> Optional[dict]:
+    """Live session by id, or None when unknown or expired"""
+    now = time.time()
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session is None:
+            return None
+        if now - session["updated_at"] > get_portfolio_session_config()["ttl"]:
+            del _sessions[session_id]
+            return None
+        session["updated_at"] = now
+        _sessions.move_to_end(session_id)
+        return session
+
+def delete_session(session_id: str) -> bool:
+    """Drop a session; False when it did not exist"""
+    with _sessions_lock:
+        return _sessions.pop(session_id, None) is not None
+
+def _edited_weights(session: dict, weights: dict, add: list, remove: list) -> dict:
+    """Session weights after the edits; call with the session lock held"""
+    unknown = [s for s in list(weights) + list(remove) if s not in session["weights"]]
+    if unknown:
+        raise ValueError(f"Not in the portfolio: {', '.join(unknown)}")
+
+    new_weights = dict(session["weights"])
+    for symbol in remove:
+        del new_weights[symbol]
+    new_weights.update(weights)
+    for h in add:
+        new_weights[h["symbol"]] = h["weight"]
+    if not new_weights:
+        raise ValueError("A portfolio needs at least one holding")
+    return new_weights
+
+def update_session(session: dict, weights: dict = None, add: list = None, remove: list = None) -> dict:
+    """
+    Apply what-if edits to a session
+
+    New symbols are analyzed without holding the session lock, so reads of
+    the session are not blocked by their data fetches. If another edit lands
+    meanwhile, the edits are applied again on top of it.
+
+    Args:
+        session: Session from get_session
+        weights: {symbol: new weight} for existing holdings
+        add: Holdings to add ({'symbol', 'weight'}); existing symbols are re-weighted
+        remove: Symbols to remove
+
+    Returns:
+        The updated session
+
+    Raises:
+        ValueError: Unknown symbols or an edit that leaves the portfolio empty
+    """
+    weights = weights or {}
+    add = add or []
+    remove = remove or []
+    fetched = {}
+
+    while True:
+        with session["lock"]:
+            new_weights = _edited_weights(session, weights, add, remove)
+            version = session["version"]
+            added = [s for s in new_weights if s not in session["risk"]]
+
+        missing = [s for s in added if s not in fetched]
+        if missing:
+            fetched.update(_analyze_holdings(missing))
+        symbols = list(new_weights)
+        # Only the new symbols' rows are computed by the store
+        correlation = get_correlation_matrix(symbols) if added else None
+
+        with session["lock"]:
+            if session["version"] != version:
+                continue
+
+            if symbols != session["symbols"]:
+                if correlation is None:
+                    keep = [session["symbols"].index(s) for s in symbols]
+                    correlation = session["correlation"][np.ix_(keep, keep)]
+                session["correlation"] = correlation
+                session["correlation_summary"] = summarize_matrix(correlation, symbols)
+                session["risk"] = {s: session["risk"].get(s) or fetched[s] for s in symbols}
+
+            session["weights"] = new_weights
+            session["symbols"] = symbols
+            session["version"] += 1
+            session["explanation"] = None
+            session["updated_at"] = time.time()
+            return session
+
+def session_covariance(session: dict) -> tuple:
+    """
+    Symbols and annualized covariance of the holdings from the session's cached arrays
+
+    Returns:
+        (symbols, covariance)
+    """
+    with session["lock"]:
+        symbols = list(session["symbols"])
+        vols = np.array([session["risk"][s]["market_risk"]["volatility"] for s in symbols])
+        return symbols, session["correlation"] * np.outer(vols, vols)
+
+def session_metrics(session: dict) -> dict:
+    """
+    Weight-dependent portfolio metrics from the session's cached results
+
+    Weights are normalized to sum to 1, so partial what-if edits still give
+    comparable numbers; total_weight reports the raw sum.
+
+    Returns:
+        Dictionary with holdings, overall_risk_score and metrics
+    """
+    with session["lock"]:
+        symbols = list(session["symbols"])
+        raw = np.array([session["weights"][s] for s in symbols], dtype=float)
+        scores = np.array([session["risk"][s]["overall_score"] for s in symbols])
+        vols = np.array([session["risk"][s]["market_risk"]["volatility"] for s in symbols])
+        corr = session["correlation"]
+        correlation_summary = session["correlation_summary"]
+        version = session["version"]
+
+    total_weight = float(raw.sum())
+    w = raw / total_weight if total_weight > 0 else np.full(len(symbols), 1.0 / len(symbols))
+    holdings = [{"symbol": s, "weight": float(weight)} for s, weight in zip(symbols, w)]
+
+    covariance = corr * np.outer(vols, vols)
+    cov_w = covariance @ w
+    variance = float(w @ cov_w)
+    volatility = float(np.sqrt(max(variance, 0.0)))
+    contributions = w * cov_w / variance if variance > 0 else np.zeros(len(symbols))
+    weighted_risk = float(w @ scores)
+
+    portfolio_risk = {
+        "volatility": volatility,
+        "diversification_ratio": float(w @ vols) / volatility if volatility > 0 else 1.0,
+        "risk_contributions": dict(zip(symbols, contributions.tolist())),
+        "correlation_summary": correlation_summary,
+        "concentration_index": calculate_concentration_index(holdings),
+        "diversification_score": calculate_diversification_score(holdings),
+        "num_holdings": len(symbols),
+        "factor_risk": portfolio_factor_risk(holdings)
+    }
+
+    return {
+        "session_id": session["id"],
+        "version": version,
+        "holdings": [{"symbol": s, "weight": float(weight)} for s, weight in zip(symbols, raw)],
+        "overall_risk_score": weighted_risk,
+        "metrics": {
+            "portfolio_risk": portfolio_risk,
+            "individual_risks": dict(zip(symbols, scores.tolist())),
+            "weighted_average_risk": weighted_risk,
+            "total_weight": total_weight
+        },
+        "explanation": session["explanation"][1] if session["explanation"] else None,
+        "timestamp": datetime.now().isoformat()
+    }
+
+def session_explanation(session: dict) -> str:
+    """AI explanation of the current session state, generated once per version"""
+    metrics = session_metrics(session)
+    cached = session["explanation"]
+    if cached and cached[0] == metrics["version"]:
+        return cached[1]
+
+    total_weight = metrics["metrics"]["total_weight"] or 1.0
+    holdings = [{"symbol": h["symbol"], "weight": h["weight"] / total_weight} for h in metrics["holdings"]]
+    explanation = generate_risk_explanation(
+        {"overall_score": metrics["overall_risk_score"], "portfolio_risk": metrics["metrics"]["portfolio_risk"]},
+        holdings,
+        None
+    )
+    with session["lock"]:
+        if session["version"] == metrics["version"]:
+            session["explanation"] = (metrics["version"], explanation)
+    return explanation
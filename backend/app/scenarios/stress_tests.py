@@ -0,0 +1,141 @@
+"""
+Stress tests - Historical and hypothetical shock scenarios
+
+A scenario is a market move plus optional sector moves in excess of the
+market. Each holding's shocked return is
+
+    market beta * market shock + sector exposure * sector shock
+
+with the exposures taken from the fitted factor model. Holdings the model
+does not cover fall back to their own market beta and a sector exposure
+of 1.
+"""
+
+import numpy as np
+
+from app.data_sources.symbol_data import load_symbol_data
+from app.risk_engine.factor_model import get_factor_model, load_sector_map
+from app.risk_engine.market_risk import calculate_beta
+from app.utils.config import get_factor_model_config
+from app.utils.logger import get_logger, quiet_symbol_logs
+
+logger = get_logger()
+
+# Shocks are total-period returns; sector shocks are in excess of the market
+SCENARIOS = {
+    "global_financial_crisis": {
+        "description": "2008-style credit crisis: broad sell-off led by financials",
+        "market": -0.40,
+        "sectors": {"Banking": -0.20, "Financial Services": -0.20, "Insurance": -0.15, "Real Estate": -0.20,
+                    "Metals": -0.10, "FMCG": 0.10, "Consumer Staples": 0.10, "Pharma": 0.10, "Healthcare": 0.10}
+    },
+    "pandemic_crash": {
+        "description": "2020-style pandemic shock: travel and energy hit hardest",
+        "market": -0.30,
+        "sectors": {"Travel": -0.30, "Energy": -0.15, "Banking": -0.10, "Automotive": -0.10,
+                    "Pharma": 0.15, "Healthcare": 0.10, "E-commerce": 0.15, "IT": 0.05, "Technology": 0.05}
+    },
+    "tech_selloff": {
+        "description": "Growth and technology de-rating",
+        "market": -0.10,
+        "sectors": {"Technology": -0.20, "IT": -0.15, "Semiconductors": -0.25, "Social Media": -0.20,
+                    "E-commerce": -0.20, "Financial Technology": -0.15}
+    },
+    "rate_shock": {
+        "description": "Sharp rise in interest rates",
+        "market": -0.08,
+        "sectors": {"Real Estate": -0.15, "Financial Services": -0.05, "Technology": -0.08, "Power": -0.05,
+                    "Banking": 0.03, "Insurance": 0.02}
+    },
+    "oil_spike": {
+        "description": "Oil price spike",
+        "market": -0.05,
+        "sectors": {"Energy": 0.15, "Mining": 0.05, "Travel": -0.20, "Automotive": -0.08, "Chemicals": -0.08,
+                    "Paints": -0.10, "Logistics": -0.08}
+    }
+}
+
+def _holding_exposures(symbols: list) -> tuple:
+    """Market beta, sector exposure and sector of each holding"""
+    model = get_factor_model()
+    sectors = load_sector_map(symbols, get_factor_model_config()["sector_path"])
+
+    betas = np.ones(len(symbols))
+    sector_betas = np.ones(len(symbols))
+    names = [sectors.get(s, "") for s in symbols]
+
+    for i, symbol in enumerate(symbols):
+        row = model["index"].get(symbol) if model else None
+        if row is not None:
+            exposures = dict(zip(model["factors"], model["exposures"][row]))
+            betas[i] = exposures.get("market", 1.0)
+            sector = model["sectors"][row]
+            if sector:
+                names[i] = sector
+                sector_betas[i] = exposures.get(f"sector:{sector}", 1.0)
+        else:
+            with quiet_symbol_logs():
+                betas[i] = calculate_beta(load_symbol_data(symbol))
+
+    return betas, sector_betas, names
+
+def stress_test_portfolio(holdings: list, scenarios: list = None, custom: dict = None,
+                          progress=None) -> dict:
+    """
+    Portfolio return under each shock scenario
+
+    Args:
+        holdings: List of dicts with 'symbol' and 'weight' keys
+        scenarios: Names from SCENARIOS (all when omitted)
+        custom: Extra scenarios, {name: {"market": shock, "sectors": {sector: shock}}}
+        progress: Optional callback(fraction, message)
+
+    Returns:
+        Dictionary with one result per scenario: portfolio return, the
+        return of each holding and the worst holdings
+
+    Raises:
+        ValueError: Unknown scenario names
+    """
+    names = scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(unknown)}")
+    selected = {name: SCENARIOS[name] for name in names}
+    selected.update(custom or {})
+
+    symbols = [h["symbol"] for h in holdings]
+    weights = np.array([h["weight"] for h in holdings], dtype=float)
+    weights = weights / weights.sum() if weights.sum() > 0 else np.full(len(symbols), 1.0 / len(symbols))
+
+    betas, sector_betas, sectors = _holding_exposures(symbols)
+    if progress:
+        progress(0.5, "Exposures loaded")
+
+    results = {}
+    for name, scenario in selected.items():
+        sector_shocks = scenario.get("sectors") or {}
+        shocks = np.array([sector_shocks.get(sector, 0.0) for sector in sectors])
+        returns = betas * float(scenario.get("market", 0.0)) + sector_betas * shocks
+        # A long position cannot lose more than its value
+        returns = np.maximum(returns, -1.0)
+        worst = np.argsort(weights * returns)[:5]
+        results[name] = {
+            "description": scenario.get("description", "Custom scenario"),
+            "market_shock": float(scenario.get("market", 0.0)),
+            "portfolio_return": float(weights @ returns),
+            "holding_returns": dict(zip(symbols, returns.tolist())),
+            "worst_contributors": [
+                {"symbol": symbols[i], "return": float(returns[i]), "contribution": float(weights[i] * returns[i])}
+                for i in worst if weights[i] * returns[i] < 0
+            ]
+        }
+
+    worst_name = min(results, key=lambda n: results[n]["portfolio_return"]) if results else None
+    logger.info(f"Stress tested {len(symbols)} holdings under {len(results)} scenarios")
+    return {
+        "holdings": [{"symbol": s, "weight": float(w), "beta": float(b), "sector": sector or None}
+                     for s, w, b, sector in zip(symbols, weights, betas, sectors)],
+        "scenarios": results,
+        "worst_scenario": worst_name
+    }
@@ -0,0 +1,489 @@
+"""
+Performance benchmarks for the risk engine and data paths
+
+Runs on synthetic market data (DATA_PROVIDER=synthetic, no network) and writes
+machine-readable JSON. Exits non-zero when a benchmark exceeds its threshold in
+benchmark_thresholds.json or regresses against a baseline results file.
+
+Usage (from backend/):
+    python -m app.tests.benchmarks --output bench.json
+    python -m app.tests.benchmarks --baseline bench.json --tolerance 0.25
+    python -m app.tests.benchmarks --quick --only correlation_matrix
+    python -m app.tests.benchmarks --only import_time
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Benchmarks must never touch the network
+os.environ.setdefault("DATA_PROVIDER", "synthetic")
+
+import numpy as np
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "benchmark_thresholds.json")
+
+# Modules that must only be imported on first use, never by `import app.main`
+LAZY_MODULES = ["yfinance", "pandas", "langchain", "langchain_community", "groq", "requests", "msgpack", "pyarrow"]
+
+def synthetic_symbols(n: int) -> list:
+    """Deterministic symbol names for an n-holding universe"""
+    return [f"SYN{i:04d}" for i in range(n)]
+
+def summarize(samples: list, rounds: int, inner: int = 1) -> dict:
+    """Timing statistics for per-call samples in milliseconds"""
+    samples = sorted(samples)
+    median = statistics.median(samples)
+    return {
+        "rounds": rounds,
+        "calls_per_round": inner,
+        "min_ms": samples[0],
+        "median_ms": median,
+        "mean_ms": statistics.fmean(samples),
+        "p95_ms": samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))],
+        "max_ms": samples[-1],
+        "ops_per_sec": 1000.0 / median if median > 0 else float("inf")
+    }
+
+def measure(func, rounds: int, warmup: int = 1, inner: int = 1) -> dict:
+    """
+    Time a zero-argument callable
+
+    Args:
+        func: Callable to benchmark
+        rounds: Number of timed rounds
+        warmup: Untimed calls before measuring
+        inner: Calls per round (for very fast functions)
+
+    Returns:
+        Timing statistics in milliseconds per call
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(inner):
+            func()
+        samples.append((time.perf_counter() - start) * 1000.0 / inner)
+
+    return summarize(samples, rounds, inner)
+
+def bench_market_metrics(rounds: int) -> dict:
+    from app.data_sources.symbol_data import load_symbol_data
+    from app.risk_engine.market_risk import calculate_beta, calculate_volatility, calculate_correlation
+
+    symbol = "AAPL"
+    data = load_symbol_data(symbol)
+    return {
+        "load_symbol_data": measure(lambda: load_symbol_data(symbol), rounds, inner=10),
+        "calculate_beta": measure(lambda: calculate_beta(data), rounds, inner=10),
+        "calculate_volatility": measure(lambda: calculate_volatility(data), rounds, inner=10),
+        "calculate_correlation": measure(lambda: calculate_correlation(data), rounds, inner=10)
+    }
+
+def bench_correlation_matrix(rounds: int, sizes: list) -> dict:
+    from app.data_sources.market_data import get_stock_prices
+    from app.risk_engine.portfolio_risk import calculate_correlation_matrix
+
+    results = {}
+    for n in sizes:
+        symbols = synthetic_symbols(n)
+        holdings = [{"symbol": s, "weight": 1.0 / n} for s in symbols]
+
+        # Warm the price cache so the benchmark measures the computation
+        for symbol in symbols:
+            get_stock_prices(symbol, 252)
+
+        results[f"calculate_correlation_matrix[n={n}]"] = measure(
+            lambda: calculate_correlation_matrix(holdings),
+            max(3, rounds // (1 if n <= 100 else 4))
+        )
+    return results
+
+def bench_correlation_store(rounds: int, quick: bool) -> dict:
+    from app.data_sources.market_data import get_stock_prices
+    from app.risk_engine.correlation_store import clear_correlation_store, get_correlation_matrix
+
+    n = 200 if quick else 2000
+    symbols = synthetic_symbols(n + rounds + 1)
+    for symbol in symbols:
+        get_stock_prices(symbol, 252)
+
+    # Previous path: full corrcoef of every holding on each request
+    def full_corrcoef():
+        returns = [np.diff(p) / p[:-1] for p in (get_stock_prices(s, 252) for s in symbols[:n])]
+        return np.corrcoef(np.array(returns))
+
+    clear_correlation_store()
+    get_correlation_matrix(symbols[:n], 252)
+    portfolio = list(symbols[:n])
+    added = iter(symbols[n:])
+
+    def add_holding():
+        portfolio.append(next(added))
+        return get_correlation_matrix(portfolio, 252)
+
+    return {
+        f"np.corrcoef[n={n}]": measure(full_corrcoef, max(3, rounds // 4)),
+        f"correlation_store[add 1,n={n}]": measure(add_holding, rounds, warmup=0),
+        f"correlation_store[cached,n={n}]": measure(lambda: get_correlation_matrix(portfolio, 252), rounds)
+    }
+
+def bench_matrix_encoding(rounds: int, sizes: list) -> dict:
+    from app.utils.serialization import encode_matrix_response
+
+    results = {}
+    rng = np.random.default_rng(7)
+    for n in sizes:
+        labels = synthetic_symbols(n)
+        matrix = np.corrcoef(rng.standard_normal((n, 252)))
+        # What the endpoint did before: nested lists through the stdlib encoder
+        results[f"encode_matrix[legacy,n={n}]"] = measure(
+            lambda: json.dumps({"metrics": {"portfolio_risk": {"correlation_matrix": matrix.tolist()}}}),
+            max(3, rounds // (1 if n <= 100 else 4))
+        )
+        for mode in ("full", "triangle"):
+            results[f"encode_matrix[{mode},n={n}]"] = measure(
+                lambda: encode_matrix_response({"metrics": {"portfolio_risk": {}}},
+                                               ("metrics", "portfolio_risk", "correlation_matrix"),
+                                               matrix, labels, "json", mode),
+                max(3, rounds // (1 if n <= 100 else 4))
+            )
+    return results
+
+def bench_synthetic_market(rounds: int, quick: bool) -> dict:
+    from app.data_sources.synthetic_market import generate_prices, generate_universe
+
+    # Previous generator: global-seeded normals and a Python loop over days
+    def loop_prices(seed: int, period_days: int) -> np.ndarray:
+        np.random.seed(seed)
+        returns = np.random.normal(0.0005, 0.02, period_days)
+        prices = np.zeros(period_days)
+        prices[0] = 100.0
+        for i in range(1, period_days):
+            prices[i] = prices[i - 1] * (1 + returns[i])
+        return prices
+
+    symbols = synthetic_symbols(100 if quick else 1000)
+    decade = 252 * 10
+
+    results = {
+        "generate_prices[loop,252d]": measure(lambda: loop_prices(7, 252), rounds, inner=10),
+        "generate_prices[252d]": measure(lambda: generate_prices("AAPL", 252), rounds, inner=10),
+        f"generate_universe[n={len(symbols)},252d]": measure(lambda: generate_universe(symbols, 252), max(3, rounds // 4)),
+        f"generate_universe[n={len(symbols)},10y]": measure(
+            lambda: generate_universe(symbols, decade, dtype=np.float32), max(3, rounds // 4)
+        )
+    }
+    return results
+
+def bench_horizon_metrics(rounds: int, quick: bool) -> dict:
+    from app.data_sources.symbol_data import load_symbol_data
+    from app.data_sources.synthetic_market import generate_universe, generate_index_prices
+    from app.risk_engine.horizon_metrics import HORIZONS, compute_horizon_metrics
+    from app.risk_engine.market_risk import calculate_beta, calculate_volatility, calculate_correlation
+
+    data = load_symbol_data("AAPL")
+
+    # Previous path: three separate single-window passes per symbol
+    def legacy(data):
+        return calculate_beta(data), calculate_volatility(data), calculate_correlation(data)
+
+    days = HORIZONS["3y"]
+    symbols = synthetic_symbols(100 if quick else 1000)
+    panel = generate_universe(symbols, days)["returns"][:, 1:]
+    index_prices = generate_index_prices("^GSPC", days)
+    benchmark = np.diff(index_prices) / index_prices[:-1]
+
+    return {
+        "market_metrics[legacy]": measure(lambda: legacy(data), rounds, inner=10),
+        "compute_horizon_metrics[1 symbol]": measure(
+            lambda: compute_horizon_metrics(data["aligned_returns"], data["benchmark_returns"]), rounds, inner=10
+        ),
+        f"compute_horizon_metrics[n={len(symbols)},3y]": measure(
+            lambda: compute_horizon_metrics(panel, benchmark), max(3, rounds // 4)
+        )
+    }
+
+def bench_factor_model(rounds: int, quick: bool) -> dict:
+    from app.data_sources.synthetic_market import SECTOR_NAMES, generate_index_prices, generate_universe, sector_index
+    from app.risk_engine.factor_model import fit_factor_model, portfolio_factor_risk, style_characteristics
+
+    symbols = synthetic_symbols(100 if quick else 1000)
+    returns = generate_universe(symbols, 252)["returns"][:, 1:]
+    index_prices = generate_index_prices("^GSPC", 252)
+    market = np.diff(index_prices) / index_prices[:-1]
+    sectors = [SECTOR_NAMES[sector_index(symbol)] for symbol in symbols]
+    characteristics = style_characteristics(returns, [{} for _ in symbols])
+
+    def fit():
+        return fit_factor_model(symbols, returns, market, sectors, characteristics)
+
+    model = fit()
+    model["index"] = {symbol: i for i, symbol in enumerate(symbols)}
+    holdings = [{"symbol": symbol, "weight": 1.0 / 50} for symbol in symbols[:50]]
+
+    return {
+        f"fit_factor_model[n={len(symbols)}]": measure(fit, max(3, rounds // 4)),
+        "portfolio_factor_risk[50 holdings]": measure(lambda: portfolio_factor_risk(holdings, model), rounds, inner=10)
+    }
+
+def bench_portfolio_session(rounds: int, quick: bool) -> dict:
+    from app.risk_engine.portfolio_session import create_session, session_metrics, update_session
+
+    n = 50 if quick else 500
+    symbols = synthetic_symbols(n)
+    session = create_session([{"symbol": s, "weight": 1.0 / n} for s in symbols])
+    rng = np.random.default_rng(11)
+
+    def reweight():
+        update_session(session, weights={symbols[rng.integers(n)]: float(rng.uniform(0, 2.0 / n))})
+        return session_metrics(session)
+
+    return {
+        f"portfolio_session[reweight,n={n}]": measure(reweight, rounds, inner=5)
+    }
+
+def bench_optimizer(rounds: int, quick: bool) -> dict:
+    from app.risk_engine.optimizer import build_constraints, optimize_portfolio
+
+    n = 100 if quick else 1000
+    rng = np.random.default_rng(13)
+    # One-factor returns over 252 days: a singular sample covariance, as in production (n > T)
+    returns = rng.standard_normal((252, 1)) * 0.01 + rng.standard_normal((252, n)) * 0.015
+    cov = np.cov(returns, rowvar=False) * 252
+    sectors = [("Technology", "Energy", "Banking", "")[i % 4] for i in range(n)]
+    constraints = build_constraints(n, 0.0, 20.0 / n, sectors, {"Technology": 0.05, "Energy": 0.05})
+
+    results = {}
+    for method in ("min_variance", "risk_parity", "max_diversification"):
+        results[f"optimizer[{method},n={n}]"] = measure(lambda: optimize_portfolio(cov, method, constraints),
+                                                        max(3, rounds // 10))
+    return results
+
+def bench_scenarios(rounds: int, quick: bool) -> dict:
+    from app.scenarios.future_risk import simulate_portfolio
+    from app.scenarios.stress_tests import stress_test_portfolio
+
+    n = 10 if quick else 100
+    holdings = [{"symbol": s, "weight": 1.0 / n} for s in synthetic_symbols(n)]
+    simulate_portfolio(holdings, paths=100)
+
+    return {
+        f"simulate_portfolio[n={n},10000x21d]": measure(lambda: simulate_portfolio(holdings, 21, 10000, seed=1),
+                                                          max(3, rounds // 4)),
+        f"stress_test_portfolio[n={n}]": measure(lambda: stress_test_portfolio(holdings), rounds)
+    }
+
+def bench_aggregate(rounds: int) -> dict:
+    from app.risk_engine.aggregation import aggregate_stock_risk
+
+    return {
+        "aggregate_stock_risk": measure(lambda: aggregate_stock_risk("MSFT"), rounds, inner=5)
+    }
+
+def bench_cache(rounds: int, n_keys: int = 10000) -> dict:
+    from app.utils.cache import get_cache, set_cache, remove_cache
+
+    keys = [f"bench_{i}" for i in range(n_keys)]
+    value = np.arange(252, dtype=float)
+
+    def do_set():
+        for key in keys:
+            set_cache(key, value, ttl_seconds=3600)
+
+    def do_get():
+        for key in keys:
+            get_cache(key)
+
+    set_stats = measure(do_set, rounds)
+    get_stats = measure(do_get, rounds)
+
+    for key in keys:
+        remove_cache(key)
+
+    for stats in (set_stats, get_stats):
+        stats["keys"] = n_keys
+        stats["ops_per_sec"] = n_keys * 1000.0 / stats["median_ms"] if stats["median_ms"] > 0 else float("inf")
+
+    return {"cache_set": set_stats, "cache_get": get_stats}
+
+def bench_symbol_search(rounds: int) -> dict:
+    from app.data_sources.symbol_index import get_symbol_index, search_symbols
+
+    get_symbol_index()
+    return {
+        "search_symbols[prefix]": measure(lambda: search_symbols("tata", 10), rounds, inner=200),
+        "search_symbols[tokens]": measure(lambda: search_symbols("state bank", 10), rounds, inner=200),
+        "search_symbols[fuzzy]": measure(lambda: search_symbols("relaince", 10), rounds, inner=20)
+    }
+
+def parse_importtime(stderr: str) -> dict:
+    """Map module name -> cumulative import time in microseconds from -X importtime output"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line.split("|")
+        cumulative[module.strip()] = int(cumulative_us)
+    return cumulative
+
+def bench_import_time(rounds: int, module: str = "app.main") -> dict:
+    """
+    Cold import time of the app, each round in a fresh interpreter
+
+    Also records which LAZY_MODULES the import pulled in; any of them counts
+    as a regression in check_regressions.
+    """
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [backend_dir, env.get("PYTHONPATH")]))
+
+    samples = []
+    eager = set()
+    for _ in range(rounds):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=backend_dir, env=env, capture_output=True, text=True, check=True
+        )
+        cumulative = parse_importtime(completed.stderr)
+        samples.append(cumulative[module] / 1000.0)
+        eager.update(name for name in LAZY_MODULES if name in cumulative)
+
+    stats = summarize(samples, rounds)
+    stats["eager_lazy_modules"] = sorted(eager)
+    return {f"import[{module}]": stats}
+
+def load_thresholds(path: str = THRESHOLDS_PATH) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def check_regressions(results: dict, thresholds: dict, baseline: dict = None, tolerance: float = 0.25) -> list:
+    """
+    Compare results against absolute thresholds and an optional baseline
+
+    Returns:
+        List of regression descriptions (empty when everything passes)
+    """
+    regressions = []
+
+    for name, stats in results.items():
+        for module in stats.get("eager_lazy_modules", []):
+            regressions.append({
+                "benchmark": name,
+                "reason": f"eager import of {module}",
+                "median_ms": stats["median_ms"],
+                "limit_ms": stats["median_ms"]
+            })
+
+        limit = thresholds.get(name, {}).get("max_median_ms")
+        if limit is not None and stats["median_ms"] > limit:
+            regressions.append({
+                "benchmark": name,
+                "reason": "threshold",
+                "median_ms": stats["median_ms"],
+                "limit_ms": limit
+            })
+
+        if baseline and name in baseline:
+            allowed = baseline[name]["median_ms"] * (1 + tolerance)
+            if stats["median_ms"] > allowed:
+                regressions.append({
+                    "benchmark": name,
+                    "reason": "baseline",
+                    "median_ms": stats["median_ms"],
+                    "baseline_ms": baseline[name]["median_ms"],
+                    "limit_ms": allowed
+                })
+
+    return regressions
+
+def run_benchmarks(groups: list = None, quick: bool = False) -> dict:
+    """Run the selected benchmark groups and return results keyed by name"""
+    rounds = 5 if quick else 20
+    sizes = [10, 100] if quick else [10, 100, 1000]
+
+    available = {
+        "market_metrics": lambda: bench_market_metrics(rounds),
+        "correlation_matrix": lambda: bench_correlation_matrix(rounds, sizes),
+        "correlation_store": lambda: bench_correlation_store(rounds, quick),
+        "matrix_encoding": lambda: bench_matrix_encoding(rounds, sizes),
+        "horizon_metrics": lambda: bench_horizon_metrics(rounds, quick),
+        "factor_model": lambda: bench_factor_model(rounds, quick),
+        "portfolio_session": lambda: bench_portfolio_session(rounds, quick),
+        "optimizer": lambda: bench_optimizer(rounds, quick),
+        "scenarios": lambda: bench_scenarios(rounds, quick),
+        "aggregate": lambda: bench_aggregate(rounds),
+        "synthetic_market": lambda: bench_synthetic_market(rounds, quick),
+        "cache": lambda: bench_cache(rounds),
+        "symbol_search": lambda: bench_symbol_search(rounds),
+        "import_time": lambda: bench_import_time(3 if quick else 7)
+    }
+
+    results = {}
+    for name in groups or available:
+        print(f"Running {name} benchmarks...", file=sys.stderr)
+        results.update(available[name]())
+    return results
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Risk engine benchmarks")
+    parser.add_argument("--output", help="Write JSON results to this path")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (fraction)")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH, help="Absolute thresholds JSON")
+    parser.add_argument("--only", action="append", help="Benchmark group to run (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="Fewer rounds, skip the largest sizes")
+    parser.add_argument("--with-logging", action="store_true", help="Keep log sinks enabled while measuring")
+    args = parser.parse_args(argv)
+
+    if not args.with_logging:
+        from app.utils.logger import get_logger
+        get_logger().remove()
+
+    results = run_benchmarks(args.only, args.quick)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+
+    regressions = check_regressions(results, load_thresholds(args.thresholds), baseline, args.tolerance)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "quick": args.quick
+        },
+        "results": results,
+        "regressions": regressions
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['benchmark']}: {regression['median_ms']:.3f} ms "
+              f"> {regression['limit_ms']:.3f} ms ({regression['reason']})", file=sys.stderr)
+
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
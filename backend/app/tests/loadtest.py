@@ -0,0 +1,293 @@
+"""
+Offline end-to-end load test for the FastAPI endpoints
+
+Starts app.main:app under uvicorn with local stand-ins for every upstream:
+Yahoo (synthetic or replayed cassette data), DuckDuckGo (stub news search)
+and Groq (stub LLM backend), each with injectable latency and error rates.
+Then drives the analysis and search endpoints at a fixed concurrency and
+reports p50/p95/p99 latency, throughput and error rate per endpoint.
+
+Usage (from backend/):
+    python -m app.tests.loadtest --concurrency 16 --requests 200
+    python -m app.tests.loadtest --data-provider replay --llm-latency-ms 800 --output load.json
+    python -m app.tests.loadtest --base-url http://localhost:8000 --endpoints search
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx
+
+DEFAULT_SYMBOLS = [
+    "AAPL", "MSFT", "GOOGL", "AMZN", "META", "TSLA", "NVDA", "JPM", "V", "JNJ",
+    "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", "INFY.NS", "ICICIBANK.NS", "ITC.NS"
+]
+
+SEARCH_QUERIES = ["bank", "tata", "infosys", "reliance", "tech", "hdfc", "icici", "airtel"]
+
+ENDPOINTS = ["stock", "portfolio", "search", "quotes"]
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def build_request(endpoint: str, rng: random.Random, symbols: list) -> tuple:
+    """Return (method, path, kwargs) for one request to an endpoint"""
+    if endpoint == "stock":
+        return "POST", "/api/analyze/stock", {"json": {"symbol": rng.choice(symbols)}}
+
+    if endpoint == "portfolio":
+        picks = rng.sample(symbols, k=min(len(symbols), rng.randint(2, 5)))
+        weight = 1.0 / len(picks)
+        holdings = [{"symbol": s, "weight": weight} for s in picks]
+        return "POST", "/api/analyze/portfolio", {"json": {"holdings": holdings}}
+
+    if endpoint == "search":
+        return "GET", "/api/search/stocks", {"params": {"q": rng.choice(SEARCH_QUERIES), "limit": 10}}
+
+    if endpoint == "quotes":
+        picks = rng.sample(symbols, k=min(len(symbols), rng.randint(5, 20)))
+        return "GET", "/api/search/quotes", {"params": {"symbols": ",".join(picks)}}
+
+    raise ValueError(f"Unknown endpoint: {endpoint}")
+
+async def drive_endpoint(client: httpx.AsyncClient, endpoint: str, total: int, concurrency: int,
+                         symbols: list, seed: int) -> dict:
+    """
+    Send `total` requests to one endpoint with at most `concurrency` in flight
+
+    Returns:
+        Latency percentiles (ms), throughput (req/s) and error rate
+    """
+    rng = random.Random(seed)
+    requests_to_send = [build_request(endpoint, rng, symbols) for _ in range(total)]
+    queue = asyncio.Queue()
+    for item in requests_to_send:
+        queue.put_nowait(item)
+
+    latencies = []
+    errors = 0
+    status_counts = {}
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                method, path, kwargs = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                status = response.status_code
+                # Search reports failures in the body with a 200
+                failed = status >= 400 or (endpoint == "search" and "error" in response.json())
+            except Exception:
+                status = "exception"
+                failed = True
+
+            latencies.append((time.perf_counter() - start) * 1000.0)
+            status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+            if failed:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "duration_s": elapsed,
+        "throughput_rps": total / elapsed if elapsed > 0 else 0.0,
+        "error_rate": errors / total if total else 0.0,
+        "status_counts": status_counts,
+        "latency_ms": {
+            "min": latencies[0] if latencies else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0,
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0
+        }
+    }
+
+def stand_in_environment(args, workdir: str) -> dict:
+    """Environment variables that replace every upstream with a local stand-in"""
+    env = dict(os.environ)
+    env.update({
+        "DATA_PROVIDER": args.data_provider,
+        "DATA_RECORD": "False",
+        "DATA_INJECT_LATENCY_MS": str(args.upstream_latency_ms),
+        "DATA_INJECT_ERROR_RATE": str(args.upstream_error_rate),
+        "NEWS_SEARCH_BACKEND": "stub",
+        "NEWS_STUB_LATENCY_MS": str(args.news_latency_ms),
+        "NEWS_STUB_ERROR_RATE": str(args.news_error_rate),
+        "LLM_BACKEND": "stub",
+        "LLM_STUB_LATENCY_MS": str(args.llm_latency_ms),
+        "LLM_STUB_ERROR_RATE": str(args.llm_error_rate),
+        "VERDICT_CACHE_PATH": os.path.join(workdir, "news_verdicts.sqlite3"),
+    })
+    if args.cassette:
+        env["DATA_CASSETTE_PATH"] = args.cassette
+    if args.replay_latency:
+        env["DATA_REPLAY_LATENCY"] = "True"
+    return env
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(args, workdir: str) -> tuple:
+    """Start uvicorn in a subprocess and wait until /api/health answers"""
+    port = args.port or free_port()
+    log_path = os.path.join(workdir, "server.log")
+    log_file = open(log_path, "w")
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(args.workers),
+         "--log-level", "warning"],
+        env=stand_in_environment(args, workdir),
+        cwd=workdir if args.isolate_cwd else os.getcwd(),
+        stdout=log_file,
+        stderr=subprocess.STDOUT
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup, see {log_path}")
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=1.0).status_code == 200:
+                return process, base_url, log_path
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError(f"Server did not become healthy within {args.startup_timeout}s, see {log_path}")
+
+async def run_load(base_url: str, args) -> dict:
+    results = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.request_timeout, limits=limits) as client:
+        for endpoint in args.endpoints:
+            if args.warmup:
+                await drive_endpoint(client, endpoint, args.warmup, args.concurrency, args.symbols, args.seed + 1)
+            print(f"Driving {endpoint} ({args.requests} requests, concurrency {args.concurrency})...", file=sys.stderr)
+            results[endpoint] = await drive_endpoint(client, endpoint, args.requests, args.concurrency,
+                                                     args.symbols, args.seed)
+    return results
+
+def print_summary(results: dict):
+    print(f"{'endpoint':<10} {'rps':>8} {'err%':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}", file=sys.stderr)
+    for endpoint, stats in results.items():
+        latency = stats["latency_ms"]
+        print(f"{endpoint:<10} {stats['throughput_rps']:>8.1f} {stats['error_rate'] * 100:>6.1f} "
+              f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f}", file=sys.stderr)
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline load test for the risk analysis API")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=0, help="Untimed requests per endpoint first")
+    parser.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--universe", type=int, default=0,
+                        help="Draw from N synthetic tickers (SYN0000...) instead of --symbols, "
+                             "so cache hit rates resemble a large user base")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--request-timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="Write JSON report to this path")
+
+    server = parser.add_argument_group("server")
+    server.add_argument("--base-url", help="Target an already running server instead of starting one")
+    server.add_argument("--port", type=int, default=0)
+    server.add_argument("--workers", type=int, default=1)
+    server.add_argument("--startup-timeout", type=float, default=60.0)
+    server.add_argument("--isolate-cwd", action="store_true", help="Run the server in a temp dir (logs, caches)")
+
+    stand_ins = parser.add_argument_group("stand-ins")
+    stand_ins.add_argument("--data-provider", choices=["synthetic", "replay"], default="synthetic")
+    stand_ins.add_argument("--cassette", help="Cassette path for --data-provider replay")
+    stand_ins.add_argument("--replay-latency", action="store_true", help="Replay recorded upstream latency")
+    stand_ins.add_argument("--upstream-latency-ms", type=float, default=0.0)
+    stand_ins.add_argument("--upstream-error-rate", type=float, default=0.0)
+    stand_ins.add_argument("--news-latency-ms", type=float, default=0.0)
+    stand_ins.add_argument("--news-error-rate", type=float, default=0.0)
+    stand_ins.add_argument("--llm-latency-ms", type=float, default=0.0)
+    stand_ins.add_argument("--llm-error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    if args.universe:
+        args.symbols = [f"SYN{i:04d}" for i in range(args.universe)]
+
+    process = None
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        try:
+            if args.base_url:
+                base_url, log_path = args.base_url, None
+            else:
+                if args.isolate_cwd:
+                    # uvicorn must still be able to import the app package
+                    os.environ["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), os.environ.get("PYTHONPATH")]))
+                process, base_url, log_path = start_server(args, workdir)
+
+            results = asyncio.run(run_load(base_url, args))
+        finally:
+            if process is not None:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "base_url": base_url,
+            "workers": None if args.base_url else args.workers,
+            "stand_ins": None if args.base_url else {
+                "data_provider": args.data_provider,
+                "upstream_latency_ms": args.upstream_latency_ms,
+                "upstream_error_rate": args.upstream_error_rate,
+                "news_latency_ms": args.news_latency_ms,
+                "news_error_rate": args.news_error_rate,
+                "llm_latency_ms": args.llm_latency_ms,
+                "llm_error_rate": args.llm_error_rate
+            }
+        },
+        "endpoints": results
+    }
+
+    print_summary(results)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
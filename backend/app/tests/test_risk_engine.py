@@ -0,0 +1,380 @@
+"""
+Risk engine tests - fused kernels checked against plain numpy, and the
+conditional stock analysis endpoint
+"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import search, stock
+from app.main import app
+from app.risk_engine import correlation_store, optimizer, portfolio_session
+from app.risk_engine.factor_model import fit_factor_model, portfolio_factor_risk
+from app.risk_engine.horizon_metrics import compute_horizon_metrics
+from app.risk_engine.market_risk import calculate_beta
+from app.risk_engine.optimizer import build_constraints, optimize_portfolio
+from app.risk_engine.portfolio_risk import calculate_portfolio_risk
+from app.utils import cache as cache_module, serialization
+from app.utils.cache import clear_cache, get_cache, remove_cache, set_cache
+
+HORIZONS = {"1m": 21, "3m": 63, "6m": 126}
+
+def _reference(returns: np.ndarray, benchmark: np.ndarray, days: int) -> dict:
+    r = returns[-(days - 1):]
+    b = benchmark[-(days - 1):]
+    centered = r - r.mean()
+    m2 = np.mean(centered ** 2)
+    wealth = np.concatenate([[1.0], np.cumprod(1.0 + r)])
+    return {
+        "volatility": r.std() * np.sqrt(252),
+        "beta": np.cov(r, b, ddof=0)[0, 1] / np.var(b),
+        "correlation": np.corrcoef(r, b)[0, 1],
+        "max_drawdown": (wealth / np.maximum.accumulate(wealth) - 1.0).min(),
+        "skew": np.mean(centered ** 3) / m2 ** 1.5,
+        "kurtosis": np.mean(centered ** 4) / m2 ** 2 - 3.0
+    }
+
+@pytest.fixture
+def market():
+    rng = np.random.default_rng(7)
+    benchmark = rng.normal(0.0004, 0.01, 300)
+    returns = 1.3 * benchmark + rng.standard_t(4, 300) * 0.008
+    return returns, benchmark
+
+def test_horizon_kernel_matches_numpy(market):
+    returns, benchmark = market
+    results = compute_horizon_metrics(returns, benchmark, HORIZONS)
+
+    for label, days in HORIZONS.items():
+        expected = _reference(returns, benchmark, days)
+        for metric, value in expected.items():
+            assert results[label][metric] == pytest.approx(value, rel=1e-6, abs=1e-9), (label, metric)
+
+def test_horizon_kernel_panel_matches_single_series(market):
+    returns, benchmark = market
+    panel = np.stack([returns, benchmark * 0.5 + returns * 0.5])
+    results = compute_horizon_metrics(panel, benchmark, HORIZONS)
+
+    for row, series in enumerate(panel):
+        single = compute_horizon_metrics(series, benchmark, HORIZONS)
+        for label in HORIZONS:
+            for metric in ("volatility", "beta", "max_drawdown", "skew", "kurtosis"):
+                assert results[label][metric][row] == pytest.approx(single[label][metric], rel=1e-9)
+
+def test_full_window_beta_agrees_with_kernel(market):
+    returns, benchmark = market
+    data = {"symbol": "TEST", "aligned_returns": returns, "benchmark_returns": benchmark}
+    kernel = compute_horizon_metrics(returns, benchmark, {"all": len(returns) + 1})["all"]
+    assert calculate_beta(data) == pytest.approx(kernel["beta"], rel=1e-9)
+
+def test_horizon_longer_than_history_is_none(market):
+    returns, benchmark = market
+    results = compute_horizon_metrics(returns[-50:], benchmark[-50:], HORIZONS)
+    assert results["1m"] is not None
+    assert results["3m"] is None and results["6m"] is None
+
+@pytest.fixture
+def uneven_prices(monkeypatch):
+    """Synthetic price histories of different lengths, with a gap in one"""
+    rng = np.random.default_rng(11)
+    common = rng.normal(0, 0.01, 120)
+    lengths = {"AAA": 120, "BBB": 80, "CCC": 45, "DDD": 120}
+    prices = {}
+    for i, (symbol, length) in enumerate(lengths.items()):
+        returns = 0.6 * common[-length:] + rng.normal(0, 0.01, length) * (i + 1) / 2
+        prices[symbol] = 100.0 * np.cumprod(np.concatenate([[1.0], returns]))
+    # A symbol with the full history but one missing day in the middle
+    gappy = prices["DDD"].copy()
+    gappy[60] = np.nan
+    prices["DDD"] = gappy
+
+    monkeypatch.setattr(correlation_store, "get_stock_prices", lambda symbol, period: prices[symbol][-period:])
+    monkeypatch.setenv("CORRELATION_MIN_OVERLAP", "20")
+    correlation_store.clear_correlation_store()
+    yield prices
+    correlation_store.clear_correlation_store()
+
+def test_correlation_store_matches_pairwise_corrcoef(uneven_prices):
+    period = 121
+    symbols = list(uneven_prices)
+    matrix = correlation_store.get_correlation_matrix(symbols, period)
+
+    rows = [correlation_store.returns_window(uneven_prices[s][-period:], period - 1) for s in symbols]
+    for i in range(len(symbols)):
+        for j in range(len(symbols)):
+            both = np.isfinite(rows[i]) & np.isfinite(rows[j])
+            expected = 1.0 if i == j else np.corrcoef(rows[i][both], rows[j][both])[0, 1]
+            assert matrix[i, j] == pytest.approx(expected, abs=1e-4), (symbols[i], symbols[j])
+
+def test_correlation_store_reuses_rows_in_any_order(uneven_prices):
+    period = 121
+    first = correlation_store.get_correlation_matrix(["AAA", "BBB"], period)
+    full = correlation_store.get_correlation_matrix(["CCC", "AAA", "DDD", "BBB"], period)
+    assert full[1, 3] == pytest.approx(first[0, 1])
+    assert np.allclose(full, full.T)
+
+def test_correlation_store_short_overlap_is_uncorrelated(uneven_prices, monkeypatch):
+    monkeypatch.setenv("CORRELATION_MIN_OVERLAP", "60")
+    matrix = correlation_store.get_correlation_matrix(["AAA", "CCC"], 121)
+    assert matrix[0, 1] == 0.0
+
+def test_covariance_survives_store_clear_during_load(uneven_prices, monkeypatch):
+    load = correlation_store._load_returns
+
+    def load_then_clear(symbols, period, workers):
+        rows = load(symbols, period, workers)
+        # Another request clears the stores (or the date rolls over) meanwhile
+        correlation_store.clear_correlation_store()
+        return rows
+
+    monkeypatch.setattr(correlation_store, "_load_returns", load_then_clear)
+    cov = correlation_store.get_covariance_matrix(["AAA", "BBB"], 121)
+
+    returns = np.diff(uneven_prices["AAA"]) / uneven_prices["AAA"][:-1]
+    assert cov[0, 0] == pytest.approx(np.var(returns, ddof=1) * 252, rel=1e-4)
+    assert cov[0, 1] == pytest.approx(cov[1, 0])
+
+@pytest.fixture
+def covariance():
+    rng = np.random.default_rng(3)
+    factors = rng.normal(size=(12, 3))
+    vols = rng.uniform(0.15, 0.45, 12)
+    corr = factors @ factors.T + np.eye(12) * 2.0
+    corr /= np.sqrt(np.outer(np.diag(corr), np.diag(corr)))
+    return corr * np.outer(vols, vols)
+
+@pytest.mark.parametrize("method", ["min_variance", "risk_parity", "max_diversification"])
+def test_optimizer_respects_box_and_sector_caps(covariance, method):
+    sectors = ["Tech"] * 5 + ["Banking"] * 4 + [None] * 3
+    caps = {"Tech": 0.3, "Banking": 0.25}
+    constraints = build_constraints(len(covariance), 0.02, 0.2, sectors, caps)
+    result = optimize_portfolio(covariance, method, constraints)
+    weights = np.asarray(result["weights"])
+
+    tol = 1e-6
+    assert weights.sum() == pytest.approx(1.0, abs=tol)
+    assert np.all(weights >= 0.02 - tol) and np.all(weights <= 0.2 + tol)
+    assert weights[:5].sum() <= 0.3 + tol
+    assert weights[5:9].sum() <= 0.25 + tol
+
+def test_min_variance_beats_equal_weights(covariance, monkeypatch):
+    monkeypatch.setenv("OPTIMIZER_SHRINKAGE", "0")
+    result = optimize_portfolio(covariance, "min_variance")
+    equal = np.full(len(covariance), 1.0 / len(covariance))
+    assert result["converged"]
+    assert result["volatility"] <= np.sqrt(equal @ covariance @ equal) + 1e-9
+
+@pytest.mark.parametrize("method", ["min_variance", "risk_parity", "max_diversification"])
+def test_zero_variance_asset_is_rejected(method):
+    with pytest.raises(ValueError, match="zero or undefined variance"):
+        optimize_portfolio(np.diag([0.04, 0.09, 0.0]), method)
+
+def test_zero_variance_symbol_is_named(monkeypatch):
+    monkeypatch.setattr(optimizer, "load_sector_map", lambda symbols, path: {})
+    with pytest.raises(ValueError, match="FLAT"):
+        optimizer.optimize_symbols(["AAA", "FLAT"], "risk_parity", cov=np.diag([0.04, 0.0]))
+
+def test_infeasible_constraints_are_rejected():
+    with pytest.raises(ValueError):
+        build_constraints(4, min_weight=0.3)
+    with pytest.raises(ValueError):
+        build_constraints(4, max_weight=0.5, sectors=["A"] * 4, sector_caps={"A": 0.5})
+
+@pytest.fixture
+def factor_universe():
+    """Returns built from a market factor, one shock per sector and noise, with known loadings"""
+    rng = np.random.default_rng(13)
+    days = 500
+    market = rng.normal(0.0003, 0.01, days)
+    shocks = rng.normal(0, 0.008, (3, days))
+    # Loadings average one within each sector, so the fitted sector factor tracks its shock
+    betas = np.tile([0.6, 0.8, 1.0, 1.2, 1.4], 3)
+    gammas = np.tile([1.5, 0.5, 1.0, 1.2, 0.8], 3)
+    sectors = [sector for sector in ("Banking", "Energy", "IT") for _ in range(5)]
+    noise = rng.normal(0, 0.006, (15, days))
+    returns = betas[:, None] * market + gammas[:, None] * shocks[np.repeat([0, 1, 2], 5)] + noise
+    symbols = [f"S{i:02d}" for i in range(15)]
+
+    model = fit_factor_model(symbols, returns, market, sectors, {})
+    model["index"] = {symbol: i for i, symbol in enumerate(symbols)}
+    return model, returns, noise, betas, gammas
+
+def test_factor_fit_recovers_known_exposures(factor_universe):
+    model, returns, noise, betas, gammas = factor_universe
+    assert model["factors"] == ["market", "sector:Banking", "sector:Energy", "sector:IT"]
+
+    exposures = model["exposures"]
+    assert exposures[:, 0] == pytest.approx(betas, abs=0.1)
+    for i in range(15):
+        sector = 1 + i // 5
+        assert exposures[i, sector] == pytest.approx(gammas[i], abs=0.15)
+        assert np.all(np.delete(exposures[i, 1:], sector - 1) == 0.0)
+
+    explained = 1.0 - noise.var(axis=1) / returns.var(axis=1)
+    assert model["r_squared"] == pytest.approx(explained, abs=0.07)
+    assert model["idio_vol"] == pytest.approx(0.006 * np.sqrt(252), rel=0.2)
+
+def test_factor_risk_decomposes_portfolio_variance(factor_universe):
+    model = factor_universe[0]
+    holdings = [{"symbol": "S00", "weight": 0.5}, {"symbol": "S07", "weight": 0.3}, {"symbol": "GONE", "weight": 0.2}]
+    risk = portfolio_factor_risk(holdings, model)
+
+    weights = np.zeros(15)
+    weights[[0, 7]] = [0.5, 0.3]
+    b = weights @ model["exposures"]
+    factor_var = b @ model["factor_cov"] @ b
+    specific_var = np.sum((weights * model["idio_vol"]) ** 2)
+    assert risk["volatility"] == pytest.approx(np.sqrt(factor_var + specific_var))
+    assert risk["systematic_share"] == pytest.approx(factor_var / (factor_var + specific_var))
+    assert sum(risk["risk_contributions"].values()) == pytest.approx(risk["systematic_share"])
+    assert risk["covered_weight"] == pytest.approx(0.8) and risk["uncovered_symbols"] == ["GONE"]
+
+def test_factor_risk_unknown_without_covered_holdings(factor_universe):
+    assert portfolio_factor_risk([{"symbol": "GONE", "weight": 1.0}], factor_universe[0]) is None
+
+HOLDINGS = [{"symbol": "AAPL", "weight": 0.5}, {"symbol": "MSFT", "weight": 0.3}, {"symbol": "JPM", "weight": 0.2}]
+
+@pytest.fixture
+def session(monkeypatch):
+    """What-if session on synthetic prices"""
+    monkeypatch.setenv("DATA_PROVIDER", "synthetic")
+    clear_cache()
+    correlation_store.clear_correlation_store()
+    yield portfolio_session.create_session(HOLDINGS)
+    correlation_store.clear_correlation_store()
+    clear_cache()
+
+def _assert_matches_fresh_session(session: dict, holdings: list):
+    """Session metrics agree with a session created from scratch on the same holdings"""
+    fresh = portfolio_session.create_session(holdings)
+    portfolio_session.delete_session(fresh["id"])
+    expected = portfolio_session.session_metrics(fresh)["metrics"]["portfolio_risk"]
+    metrics = portfolio_session.session_metrics(session)["metrics"]["portfolio_risk"]
+
+    for key in ("volatility", "diversification_ratio", "concentration_index", "diversification_score", "num_holdings"):
+        assert metrics[key] == pytest.approx(expected[key]), key
+    assert metrics["risk_contributions"] == pytest.approx(expected["risk_contributions"])
+    summary, expected_summary = metrics["correlation_summary"], expected["correlation_summary"]
+    assert summary["mean"] == pytest.approx(expected_summary["mean"])
+    assert [p["symbols"] for p in summary["top_pairs"]] == [p["symbols"] for p in expected_summary["top_pairs"]]
+
+def test_session_metrics_match_portfolio_risk(session):
+    metrics = portfolio_session.session_metrics(session)["metrics"]["portfolio_risk"]
+    expected = calculate_portfolio_risk(HOLDINGS, matrix_as_array=True)
+
+    for key in ("correlation_summary", "concentration_index", "diversification_score", "num_holdings"):
+        assert metrics[key] == pytest.approx(expected[key]), key
+
+    w = np.array([h["weight"] for h in HOLDINGS])
+    vols = np.array([session["risk"][h["symbol"]]["market_risk"]["volatility"] for h in HOLDINGS])
+    cov = expected["correlation_matrix"] * np.outer(vols, vols)
+    assert metrics["volatility"] == pytest.approx(np.sqrt(w @ cov @ w))
+    assert sum(metrics["risk_contributions"].values()) == pytest.approx(1.0)
+
+def test_session_reweight_matches_fresh_session(session):
+    reweighted = [{"symbol": "AAPL", "weight": 0.2}, {"symbol": "MSFT", "weight": 0.3}, {"symbol": "JPM", "weight": 0.5}]
+    portfolio_session.update_session(session, weights={"AAPL": 0.2, "JPM": 0.5})
+
+    assert session["version"] == 2
+    _assert_matches_fresh_session(session, reweighted)
+
+def test_session_add_and_remove_match_fresh_session(session):
+    portfolio_session.update_session(session, add=[{"symbol": "XOM", "weight": 0.2}], remove=["JPM"])
+    edited = [{"symbol": "AAPL", "weight": 0.5}, {"symbol": "MSFT", "weight": 0.3}, {"symbol": "XOM", "weight": 0.2}]
+
+    assert session["symbols"] == ["AAPL", "MSFT", "XOM"] and list(session["risk"]) == session["symbols"]
+    _assert_matches_fresh_session(session, edited)
+
+    with pytest.raises(ValueError):
+        portfolio_session.update_session(session, remove=["JPM"])
+    with pytest.raises(ValueError):
+        portfolio_session.update_session(session, remove=["AAPL", "MSFT", "XOM"])
+
+def test_session_edit_during_analysis_is_kept(session, monkeypatch):
+    analyze = portfolio_session._analyze_holdings
+    calls = []
+
+    def analyze_while_edited(symbols):
+        # The session lock is free while fetching, so a concurrent re-weight goes through
+        if not calls:
+            portfolio_session.update_session(session, weights={"MSFT": 0.1})
+        calls.append(symbols)
+        return analyze(symbols)
+
+    monkeypatch.setattr(portfolio_session, "_analyze_holdings", analyze_while_edited)
+    portfolio_session.update_session(session, add=[{"symbol": "XOM", "weight": 0.2}])
+
+    assert calls == [["XOM"]]
+    assert session["version"] == 3
+    assert session["weights"] == {"AAPL": 0.5, "MSFT": 0.1, "JPM": 0.2, "XOM": 0.2}
+    assert session["correlation"].shape == (4, 4)
+
+@pytest.fixture
+def client(monkeypatch):
+    """API client on synthetic prices, stub news and stub LLM, with a cold cache"""
+    monkeypatch.setenv("DATA_PROVIDER", "synthetic")
+    monkeypatch.setenv("LLM_BACKEND", "stub")
+    monkeypatch.setenv("NEWS_SEARCH_BACKEND", "stub")
+    clear_cache()
+    builds = []
+    build = stock.build_stock_analysis
+    monkeypatch.setattr(stock, "build_stock_analysis", lambda symbol: builds.append(symbol) or build(symbol))
+    yield TestClient(app), builds
+    clear_cache()
+
+def test_analysis_etag_and_not_modified(client):
+    api, builds = client
+    first = api.get("/api/analyze/stock/AAPL")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag.startswith('W/"')
+
+    again = api.get("/api/analyze/stock/AAPL")
+    assert again.json() == first.json() and again.headers["ETag"] == etag
+
+    not_modified = api.get("/api/analyze/stock/AAPL", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.headers["ETag"] == etag
+    assert builds == ["AAPL"]
+
+def test_analysis_etag_check_never_fetches(client):
+    api, builds = client
+    etag = api.get("/api/analyze/stock/MSFT").headers["ETag"]
+
+    # With the inputs gone from the cache the tag is unknown: no 304, the analysis runs again
+    remove_cache("news_context_MSFT")
+    response = api.get("/api/analyze/stock/MSFT", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert builds == ["MSFT", "MSFT"]
+
+def test_analysis_body_cache_keeps_one_entry_per_symbol(client):
+    api, builds = client
+    api.get("/api/analyze/stock/NVDA")
+    set_cache("info_NVDA", {"longName": "Changed fundamentals"})
+    changed = api.get("/api/analyze/stock/NVDA")
+
+    assert builds == ["NVDA", "NVDA"]
+    assert get_cache("analysis_NVDA")[0] == changed.headers["ETag"]
+    assert not [key for key in list(cache_module._cache) if key.startswith("analysis_NVDA_")]
+
+def test_info_etag_checked_before_fetching(client, monkeypatch):
+    api, _ = client
+    etag = api.get("/api/search/info/ZZZZ").headers["ETag"]
+    monkeypatch.setattr(search, "get_stock_info_api", lambda symbol: pytest.fail("fetched on a cached tag"))
+
+    response = api.get("/api/search/info/ZZZZ", headers={"If-None-Match": etag})
+    assert response.status_code == 304 and response.headers["ETag"] == etag
+
+def test_portfolio_rejects_repeated_symbols(client):
+    api, _ = client
+    holdings = [{"symbol": "AAPL", "weight": 0.5}, {"symbol": "aapl", "weight": 0.5}]
+    response = api.post("/api/analyze/portfolio", json={"holdings": holdings})
+    assert response.status_code == 422 and "AAPL" in response.text
+
+def test_json_fallback_matches_orjson(monkeypatch):
+    payload = {"value": float("nan"), "matrix": np.array([[1.0, np.inf], [np.nan, 0.5]]),
+               "score": np.float32(2.5), "count": np.int64(3), "pairs": ({"ok": True, "beta": -np.inf},)}
+    expected = b'{"value":null,"matrix":[[1.0,null],[null,0.5]],"score":2.5,"count":3,"pairs":[{"ok":true,"beta":null}]}'
+    if serialization.orjson is not None:
+        assert serialization.dumps_json(payload) == expected
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert serialization.dumps_json(payload) == expected
@@ -0,0 +1,194 @@
+"""
+Scenario and background job tests - stress shocks, simulation and the job queue
+"""
+
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pytest
+
+from app.jobs import store, worker
+from app.scenarios import future_risk, stress_tests
+
+@pytest.fixture
+def job_store(tmp_path, monkeypatch):
+    """Job queue in a fresh SQLite file"""
+    monkeypatch.setenv("JOB_QUEUE_PATH", str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(store, "_connection", None)
+    yield store
+    if store._connection is not None:
+        store._connection.close()
+
+def test_jobs_claimed_by_priority_then_submission_order(job_store):
+    low = job_store.submit_job("stress", {"holdings": []}, priority=1)
+    first = job_store.submit_job("simulation", {"holdings": []}, priority=5)
+    second = job_store.submit_job("screen", {}, priority=5)
+
+    assert [job_store.claim_next_job()["id"] for _ in range(3)] == [first["id"], second["id"], low["id"]]
+    assert job_store.claim_next_job() is None
+    assert job_store.get_job(first["id"])["status"] == "running"
+
+def test_job_queue_limit(job_store, monkeypatch):
+    monkeypatch.setenv("JOB_QUEUE_MAX", "2")
+    assert job_store.submit_job("screen", {}) is not None
+    assert job_store.submit_job("screen", {}) is not None
+    assert job_store.submit_job("screen", {}) is None
+
+def test_finished_job_keeps_result(job_store):
+    job = job_store.submit_job("simulation", {"paths": 10})
+    claimed = job_store.claim_next_job()
+    assert claimed["params"] == {"paths": 10}
+
+    job_store.report_progress(job["id"], 0.5, "Halfway")
+    job_store.finish_job(job["id"], "succeeded", {"value": 1.5})
+
+    finished = job_store.get_job(job["id"])
+    assert finished["status"] == "succeeded"
+    assert finished["progress"] == 1.0 and finished["message"] is None
+    assert job_store.get_job_result(job["id"]) == b'{"value":1.5}'
+
+def test_cancel_queued_job_stops_it_at_once(job_store):
+    job = job_store.submit_job("screen", {})
+    cancelled = job_store.cancel_job(job["id"])
+
+    assert cancelled["status"] == "cancelled"
+    assert job_store.claim_next_job() is None
+    assert job_store.get_job_result(job["id"]) is None
+
+def test_cancel_running_job_is_requested(job_store):
+    job = job_store.submit_job("screen", {})
+    job_store.claim_next_job()
+
+    assert job_store.report_progress(job["id"], 0.1) is False
+    assert job_store.cancel_job(job["id"])["cancel_requested"] is True
+    assert job_store.report_progress(job["id"], 0.2) is True
+
+    job_store.finish_job(job["id"], "cancelled")
+    assert job_store.get_job(job["id"])["status"] == "cancelled"
+
+def test_stale_jobs_are_requeued_unless_cancelled(job_store, monkeypatch):
+    kept = job_store.submit_job("screen", {}, priority=9)
+    dropped = job_store.submit_job("screen", {}, priority=1)
+    job_store.claim_next_job()
+    job_store.claim_next_job()
+    job_store.cancel_job(dropped["id"])
+
+    monkeypatch.setenv("JOB_STALE_SECONDS", "-1")
+    assert job_store.requeue_stale_jobs() == 1
+
+    requeued = job_store.get_job(kept["id"])
+    assert requeued["status"] == "queued" and requeued["started_at"] is None
+    assert job_store.get_job(dropped["id"])["status"] == "cancelled"
+    assert job_store.claim_next_job()["id"] == kept["id"]
+
+def test_requeue_running_job(job_store):
+    job = job_store.submit_job("screen", {})
+    job_store.claim_next_job()
+    job_store.requeue_job(job["id"], "Requeued: worker pool unavailable")
+
+    requeued = job_store.get_job(job["id"])
+    assert requeued["status"] == "queued" and requeued["message"] == "Requeued: worker pool unavailable"
+    assert job_store.claim_next_job()["id"] == job["id"]
+
+class _BrokenPool:
+    """Stand-in for a process pool whose workers died"""
+
+    def __init__(self):
+        self.shutdowns = 0
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("A child process terminated abruptly")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+@pytest.fixture
+def broken_pool(job_store, monkeypatch):
+    pool = _BrokenPool()
+    replacements = []
+    monkeypatch.setattr(worker, "_executor", pool)
+    monkeypatch.setattr(worker, "_running", {})
+    monkeypatch.setattr(worker, "_new_executor", lambda config: replacements.append(object()) or replacements[-1])
+    return pool, replacements
+
+def test_failed_submit_requeues_job_and_frees_slot(broken_pool):
+    pool, replacements = broken_pool
+    job = store.submit_job("screen", {})
+
+    assert worker._submit(store.claim_next_job()) is False
+    assert worker._running == {}
+    assert store.get_job(job["id"])["status"] == "queued"
+    assert worker._executor is replacements[0] and pool.shutdowns == 1
+
+def test_broken_pool_is_replaced_once(broken_pool):
+    pool, replacements = broken_pool
+    jobs = [store.submit_job("screen", {}) for _ in range(3)]
+    for job in jobs:
+        store.claim_next_job()
+        future = Future()
+        future.set_exception(BrokenProcessPool("A child process terminated abruptly"))
+        worker._job_done(job["id"], "screen", pool, future)
+
+    assert len(replacements) == 1 and pool.shutdowns == 1
+    assert all(store.get_job(job["id"])["status"] == "failed" for job in jobs)
+
+def test_queue_stats_count_every_status(job_store):
+    job_store.submit_job("screen", {})
+    job = job_store.submit_job("screen", {})
+    job_store.cancel_job(job["id"])
+    assert job_store.get_queue_stats() == {"queued": 1, "running": 0, "succeeded": 0, "failed": 0, "cancelled": 1}
+
+@pytest.fixture
+def factor_model(monkeypatch):
+    model = {
+        "index": {"BANK": 0, "SOFT": 1},
+        "factors": ["market", "sector:Banking", "sector:IT"],
+        "exposures": np.array([[1.2, 0.8, 0.0], [0.9, 0.0, 1.1]]),
+        "sectors": ["Banking", "IT"]
+    }
+    monkeypatch.setattr(stress_tests, "get_factor_model", lambda: model)
+    monkeypatch.setattr(stress_tests, "load_sector_map", lambda symbols, path: {})
+    return model
+
+def test_stress_returns_follow_factor_exposures(factor_model):
+    holdings = [{"symbol": "BANK", "weight": 3}, {"symbol": "SOFT", "weight": 1}]
+    custom = {"bank_run": {"market": -0.2, "sectors": {"Banking": -0.3}}}
+    result = stress_tests.stress_test_portfolio(holdings, ["tech_selloff"], custom)
+
+    bank_run = result["scenarios"]["bank_run"]
+    assert bank_run["holding_returns"]["BANK"] == pytest.approx(1.2 * -0.2 + 0.8 * -0.3)
+    assert bank_run["holding_returns"]["SOFT"] == pytest.approx(0.9 * -0.2)
+    assert bank_run["portfolio_return"] == pytest.approx(0.75 * -0.48 + 0.25 * -0.18)
+    assert result["worst_scenario"] == "bank_run"
+    assert [h["weight"] for h in result["holdings"]] == [0.75, 0.25]
+
+def test_stress_rejects_unknown_scenarios(factor_model):
+    with pytest.raises(ValueError):
+        stress_tests.stress_test_portfolio([{"symbol": "BANK", "weight": 1}], ["meteor_strike"])
+
+@pytest.fixture
+def price_history(monkeypatch):
+    rng = np.random.default_rng(5)
+    prices = {symbol: 100.0 * np.cumprod(1.0 + rng.normal(0.0005, 0.012, 300)) for symbol in ("AAA", "BBB")}
+    monkeypatch.setattr(future_risk, "get_stock_prices", lambda symbol, period: prices[symbol][-period:])
+    return prices
+
+def test_simulation_is_reproducible_and_ordered(price_history):
+    holdings = [{"symbol": "AAA", "weight": 0.5}, {"symbol": "BBB", "weight": 0.5}]
+    reports = []
+    first = future_risk.simulate_portfolio(holdings, horizon_days=20, paths=3000, confidence=0.95, seed=1,
+                                           progress=lambda fraction, message: reports.append(fraction))
+    second = future_risk.simulate_portfolio(holdings, horizon_days=20, paths=3000, confidence=0.95, seed=1)
+
+    assert first == second
+    assert first["conditional_value_at_risk"] >= first["value_at_risk"]
+    percentiles = list(first["return_percentiles"].values())
+    assert percentiles == sorted(percentiles)
+    assert 0.0 <= first["max_drawdown"]["median"] <= first["max_drawdown"]["95"]
+    assert reports[-1] == pytest.approx(1.0) and reports == sorted(reports)
+
+def test_simulation_needs_history(price_history, monkeypatch):
+    monkeypatch.setattr(future_risk, "get_stock_prices", lambda symbol, period: price_history[symbol][-5:])
+    with pytest.raises(ValueError):
+        future_risk.simulate_portfolio([{"symbol": "AAA", "weight": 1.0}], horizon_days=20, paths=100)
@@ -2,38 +2,134 @@
 Simple in-memory cache for API responses
 """
 
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Optional
+from typing import Any, Callable, Optional, Tuple
+from app.utils.logger import get_logger
+from app.utils.metrics import record_cache_lookup
+
+logger = get_logger()
 
 # Simple dict-based cache
 _cache = {}
 
-def set_cache(key: str, value: Any, ttl_seconds: int = 3600):
-    """Set a value in cache with TTL"""
+# Keys with a background refresh in flight
+_refreshing = set()
+_refresh_lock = threading.Lock()
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+def set_cache(key: str, value: Any, ttl_seconds: int = 3600, stale_seconds: int = 0):
+    """
+    Set a value in cache with TTL
+    
+    Args:
+        key: Cache key
+        value: Value to store
+        ttl_seconds: Seconds the value is fresh
+        stale_seconds: Further seconds get_cache_or_stale may still serve it
+    """
     expiry = datetime.now() + timedelta(seconds=ttl_seconds)
     _cache[key] = {
         "value": value,
-        "expiry": expiry
+        "expiry": expiry,
+        "stale_until": expiry + timedelta(seconds=stale_seconds)
     }
 
 def get_cache(key: str) -> Optional[Any]:
     """Get a value from cache if not expired"""
+    # Namespace is the key prefix, e.g. "prices" for "prices_AAPL_252"
+    namespace = key.split("_", 1)[0]
+    
     if key not in _cache:
+        record_cache_lookup(namespace, False)
         return None
     
     cached_item = _cache[key]
-    if datetime.now() > cached_item["expiry"]:
-        # Expired, remove it
-        del _cache[key]
+    now = datetime.now()
+    if now > cached_item["expiry"]:
+        # Expired; keep it around while it may still be served stale
+        if now > cached_item.get("stale_until", cached_item["expiry"]):
+            _cache.pop(key, None)
+        record_cache_lookup(namespace, False)
+        return None
+    
+    record_cache_lookup(namespace, True)
+    return cached_item["value"]
+
+def get_cache_or_stale(key: str) -> Optional[Tuple[Any, bool]]:
+    """
+    Get a value that is fresh or inside its stale window
+    
+    Returns:
+        (value, is_stale) or None when missing or past the stale window
+    """
+    namespace = key.split("_", 1)[0]
+    cached_item = _cache.get(key)
+    now = datetime.now()
+    
+    if cached_item is None or now > cached_item.get("stale_until", cached_item["expiry"]):
+        if cached_item is not None:
+            _cache.pop(key, None)
+        record_cache_lookup(namespace, False)
         return None
     
+    record_cache_lookup(namespace, True)
+    return cached_item["value"], now > cached_item["expiry"]
+
+def is_cached(key: str) -> bool:
+    """Whether key can be served (fresh or stale) without a fetch; no metrics recorded"""
+    cached_item = _cache.get(key)
+    return cached_item is not None and datetime.now() <= cached_item.get("stale_until", cached_item["expiry"])
+
+def peek_cache(key: str) -> Optional[Any]:
+    """Fresh value for key, or None; no metrics recorded and nothing evicted or fetched"""
+    cached_item = _cache.get(key)
+    if cached_item is None or datetime.now() > cached_item["expiry"]:
+        return None
     return cached_item["value"]
 
+def get_expiring_keys(within_seconds: float, prefix: str = "") -> list:
+    """Keys (optionally with a prefix) that expire within the next within_seconds"""
+    horizon = datetime.now() + timedelta(seconds=within_seconds)
+    return [
+        key for key, item in list(_cache.items())
+        if key.startswith(prefix) and item["expiry"] <= horizon
+    ]
+
+def schedule_refresh(key: str, refresh: Callable[[], Any]):
+    """
+    Run refresh in the background unless one is already in flight for key
+    
+    Args:
+        key: Cache key being refreshed (used to de-duplicate)
+        refresh: Callable that recomputes and re-caches the value
+    """
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+    
+    def _refresh():
+        try:
+            refresh()
+        except Exception as e:
+            logger.error(f"Background refresh of {key} failed: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
+    
+    _refresh_executor.submit(_refresh)
+
 def clear_cache():
     """Clear all cache"""
     global _cache
     _cache = {}
 
+def get_cache_size() -> int:
+    """Number of entries currently held (including not yet evicted expired ones)"""
+    return len(_cache)
+
 def remove_cache(key: str):
     """Remove specific cache key"""
     if key in _cache:
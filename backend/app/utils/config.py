@@ -48,3 +48,238 @@ def get_risk_thresholds():
         "debt_equity_high": float(os.getenv("DEBT_EQUITY_HIGH", "2.0")),
         "interest_coverage_low": float(os.getenv("INTEREST_COVERAGE_LOW", "2.0"))
     }
+
+def get_risk_engine_config():
+    """Get risk engine data window configuration"""
+    return {
+        # Trading days of prices loaded per analysis; 756 enables the 3y horizon
+        "history_days": max(22, int(os.getenv("RISK_HISTORY_DAYS", "252")))
+    }
+
+def get_correlation_store_config():
+    """Get pairwise correlation store configuration"""
+    return {
+        # Rows of new symbols correlated against the store per float32 block
+        "chunk_size": max(1, int(os.getenv("CORRELATION_CHUNK_SIZE", "512"))),
+        # Pairs with fewer overlapping returns are treated as uncorrelated
+        "min_overlap": max(3, int(os.getenv("CORRELATION_MIN_OVERLAP", "20"))),
+        # The store for a window is rebuilt from scratch beyond this many symbols
+        "max_symbols": int(os.getenv("CORRELATION_STORE_MAX_SYMBOLS", "5000")),
+        "workers": int(os.getenv("CORRELATION_LOAD_WORKERS", "8"))
+    }
+
+def get_portfolio_session_config():
+    """Get what-if portfolio session configuration"""
+    return {
+        # Idle seconds before a session is dropped
+        "ttl": int(os.getenv("PORTFOLIO_SESSION_TTL", "1800")),
+        "max_sessions": int(os.getenv("PORTFOLIO_SESSION_MAX", "1000")),
+        # Holdings analyzed in parallel when a session is created or extended
+        "workers": int(os.getenv("PORTFOLIO_SESSION_WORKERS", "8"))
+    }
+
+def get_optimizer_config():
+    """Get portfolio optimizer configuration"""
+    return {
+        "max_iter": int(os.getenv("OPTIMIZER_MAX_ITER", "2000")),
+        "tolerance": float(os.getenv("OPTIMIZER_TOLERANCE", "1e-8")),
+        # Shrink covariances toward their diagonal (0 = sample covariance)
+        "shrinkage": float(os.getenv("OPTIMIZER_SHRINKAGE", "0.05")),
+        "max_assets": int(os.getenv("OPTIMIZER_MAX_ASSETS", "3000"))
+    }
+
+def get_job_config():
+    """Get background job queue and worker pool configuration"""
+    return {
+        "enabled": os.getenv("JOBS_ENABLED", "True").lower() == "true",
+        "path": os.getenv("JOB_QUEUE_PATH", "cache/jobs.sqlite3"),
+        "workers": max(1, int(os.getenv("JOB_WORKERS", "2"))),
+        # Queued (not yet running) jobs accepted before submissions are refused
+        "queue_max": int(os.getenv("JOB_QUEUE_MAX", "100")),
+        "result_ttl": int(os.getenv("JOB_RESULT_TTL", "3600")),
+        "poll_interval": float(os.getenv("JOB_POLL_INTERVAL", "0.5")),
+        # Running jobs without a heartbeat for this long are requeued
+        "stale_after": int(os.getenv("JOB_STALE_SECONDS", "60")),
+        "progress_interval": float(os.getenv("JOB_PROGRESS_INTERVAL", "0.5")),
+        "start_method": os.getenv("JOB_START_METHOD", "spawn"),
+        "max_symbols": int(os.getenv("JOB_MAX_SYMBOLS", "5000"))
+    }
+
+def get_simulation_config():
+    """Get Monte Carlo portfolio simulation configuration"""
+    return {
+        "paths": int(os.getenv("SIMULATION_PATHS", "10000")),
+        "horizon_days": int(os.getenv("SIMULATION_HORIZON_DAYS", "21")),
+        # Consecutive days drawn together, keeping volatility clustering
+        "block_days": max(1, int(os.getenv("SIMULATION_BLOCK_DAYS", "5"))),
+        "confidence": float(os.getenv("SIMULATION_CONFIDENCE", "0.95"))
+    }
+
+def get_factor_model_config():
+    """Get universe factor model configuration"""
+    return {
+        "path": os.getenv("FACTOR_MODEL_PATH", "cache/factor_model.npz"),
+        # Comma-separated; empty means every symbol in the symbol master
+        "universe": [s.strip() for s in os.getenv("FACTOR_UNIVERSE", "").split(",") if s.strip()],
+        # CSV with symbol,sector columns; empty uses the symbol master sectors
+        "sector_path": os.getenv("FACTOR_SECTOR_PATH", ""),
+        "benchmark": os.getenv("FACTOR_BENCHMARK", "^GSPC"),
+        "history_days": max(64, int(os.getenv("FACTOR_HISTORY_DAYS", "252"))),
+        # Sectors with fewer symbols get no sector factor
+        "min_sector_size": max(2, int(os.getenv("FACTOR_MIN_SECTOR_SIZE", "3"))),
+        # Refit when the saved model is older than this (hours)
+        "max_age": float(os.getenv("FACTOR_MODEL_MAX_AGE_HOURS", "24")) * 3600,
+        "fit_on_startup": os.getenv("FACTOR_FIT_ON_STARTUP", "True").lower() == "true",
+        "workers": int(os.getenv("FACTOR_FIT_WORKERS", "8"))
+    }
+
+def get_verdict_cache_config():
+    """Get persistent news verdict cache configuration"""
+    return {
+        "enabled": os.getenv("VERDICT_CACHE_ENABLED", "True").lower() == "true",
+        "path": os.getenv("VERDICT_CACHE_PATH", "cache/news_verdicts.sqlite3"),
+        "ttl": int(os.getenv("VERDICT_CACHE_TTL", "604800"))  # 7 days default
+    }
+
+def get_explanation_cache_config():
+    """Get AI explanation cache configuration"""
+    return {
+        "enabled": os.getenv("EXPLANATION_CACHE_ENABLED", "True").lower() == "true",
+        "ttl": int(os.getenv("EXPLANATION_CACHE_TTL", "3600")),
+        "serve_stale": os.getenv("EXPLANATION_CACHE_SERVE_STALE", "True").lower() == "true",
+        "stale_ttl": int(os.getenv("EXPLANATION_CACHE_STALE_TTL", "86400")),
+        "max_entries": int(os.getenv("EXPLANATION_CACHE_MAX_ENTRIES", "2000"))
+    }
+
+def get_llm_config():
+    """Get shared LLM gateway configuration"""
+    return {
+        "backend": os.getenv("LLM_BACKEND", "groq").lower(),
+        "api_key": os.getenv("GROQ_API_KEY", ""),
+        "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+        "max_connections": int(os.getenv("LLM_MAX_CONNECTIONS", "10")),
+        "timeout": float(os.getenv("LLM_TIMEOUT", "30")),
+        "max_retries": int(os.getenv("LLM_MAX_RETRIES", "3")),
+        "backoff_base": float(os.getenv("LLM_BACKOFF_BASE", "0.5")),
+        "stub_latency_ms": float(os.getenv("LLM_STUB_LATENCY_MS", "0")),
+        "stub_error_rate": float(os.getenv("LLM_STUB_ERROR_RATE", "0"))
+    }
+
+def get_data_provider_config():
+    """Get market data provider configuration"""
+    return {
+        # auto, yfinance, chart_api, synthetic or replay
+        "provider": os.getenv("DATA_PROVIDER", "auto").lower(),
+        "record": os.getenv("DATA_RECORD", "False").lower() == "true",
+        "cassette_path": os.getenv("DATA_CASSETTE_PATH", "cassettes/market_data.json.gz"),
+        # Seconds between writes of newly recorded responses (also written at shutdown)
+        "cassette_flush_interval": float(os.getenv("DATA_CASSETTE_FLUSH_INTERVAL", "10")),
+        "replay_latency": os.getenv("DATA_REPLAY_LATENCY", "False").lower() == "true",
+        # Fault injection for load tests, applied to every provider call
+        "inject_latency_ms": float(os.getenv("DATA_INJECT_LATENCY_MS", "0")),
+        "inject_error_rate": float(os.getenv("DATA_INJECT_ERROR_RATE", "0")),
+        # Circuit breaker: skip a provider after consecutive failures
+        "circuit_failures": int(os.getenv("DATA_CIRCUIT_FAILURES", "5")),
+        "circuit_cooldown": float(os.getenv("DATA_CIRCUIT_COOLDOWN", "60"))
+    }
+
+def get_news_search_config():
+    """Get web news search configuration"""
+    return {
+        # duckduckgo or stub
+        "backend": os.getenv("NEWS_SEARCH_BACKEND", "duckduckgo").lower(),
+        "stub_latency_ms": float(os.getenv("NEWS_STUB_LATENCY_MS", "0")),
+        "stub_error_rate": float(os.getenv("NEWS_STUB_ERROR_RATE", "0")),
+        # Verified news context per symbol is reused for this long
+        "context_ttl": int(os.getenv("NEWS_CONTEXT_TTL", "900"))
+    }
+
+def get_profiling_config():
+    """Get per-request profiling configuration"""
+    return {
+        # Middleware is only installed when enabled, so disabled costs nothing
+        "enabled": os.getenv("PROFILING_ENABLED", "False").lower() == "true",
+        # Requests carrying X-Profile: <token> are profiled; also guards the admin endpoints
+        "admin_token": os.getenv("PROFILE_ADMIN_TOKEN", ""),
+        # Fraction of all requests to profile
+        "sample_rate": float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+        "interval_ms": float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+        "directory": os.getenv("PROFILE_DIR", "profiles"),
+        "max_files": int(os.getenv("PROFILE_MAX_FILES", "200"))
+    }
+
+def get_logging_config():
+    """Get logging configuration"""
+    levels = {}
+    # e.g. "app.risk_engine=WARNING,app.data_sources=INFO"
+    for item in os.getenv("LOG_LEVELS", "").split(","):
+        if "=" in item:
+            module, level = item.split("=", 1)
+            levels[module.strip()] = level.strip().upper()
+
+    return {
+        "console_level": os.getenv("LOG_LEVEL", "INFO").upper(),
+        "file_level": os.getenv("LOG_FILE_LEVEL", "DEBUG").upper(),
+        "file_path": os.getenv("LOG_FILE", "logs/app.log"),
+        # text or json (one JSON object per line)
+        "format": os.getenv("LOG_FORMAT", "text").lower(),
+        # Hand records to a background writer thread instead of blocking the caller
+        "enqueue": os.getenv("LOG_ENQUEUE", "True").lower() == "true",
+        "module_levels": levels,
+        # Per-message-template budget for hot-path logs, per second
+        "hot_rate_limit": float(os.getenv("LOG_HOT_RATE_LIMIT", "20"))
+    }
+
+def get_warmup_config():
+    """Get startup warm-up and refresh-ahead configuration"""
+    return {
+        "enabled": os.getenv("WARMUP_ENABLED", "True").lower() == "true",
+        # Comma-separated; empty means the built-in popular stock list
+        "symbols": [s.strip() for s in os.getenv("WARMUP_SYMBOLS", "").split(",") if s.strip()],
+        "indices": [s.strip() for s in os.getenv("WARMUP_INDICES", "^GSPC").split(",") if s.strip()],
+        "max_symbols": int(os.getenv("WARMUP_MAX_SYMBOLS", "50")),
+        "workers": int(os.getenv("WARMUP_WORKERS", "8")),
+        # Refresh-ahead: every interval, refresh hot entries expiring within margin
+        "refresh_enabled": os.getenv("REFRESH_AHEAD_ENABLED", "True").lower() == "true",
+        "refresh_interval": float(os.getenv("REFRESH_AHEAD_INTERVAL", "60")),
+        "refresh_margin": float(os.getenv("REFRESH_AHEAD_MARGIN", "300")),
+        # Seconds past expiry that market data may still be served while refreshing
+        "stale_ttl": int(os.getenv("MARKET_DATA_STALE_TTL", "3600"))
+    }
+
+def get_symbol_search_config():
+    """Get local symbol index and autocomplete configuration"""
+    markets = os.getenv("SEARCH_MARKETS", "NSE,BSE")
+    return {
+        # CSV with symbol,name,market,sector columns; empty uses the bundled master
+        "master_path": os.getenv("SYMBOL_MASTER_PATH", ""),
+        # Markets returned by default ("all" disables the filter)
+        "markets": [] if markets.strip().lower() == "all" else [m.strip().upper() for m in markets.split(",") if m.strip()],
+        # Ask Yahoo autocomplete when the local index has no match
+        "yahoo_fallback": os.getenv("SEARCH_YAHOO_FALLBACK", "True").lower() == "true",
+        "fuzzy_cutoff": float(os.getenv("SEARCH_FUZZY_CUTOFF", "0.75"))
+    }
+
+def get_quotes_config():
+    """Get batched quote endpoint configuration"""
+    return {
+        "cache_ttl": int(os.getenv("QUOTES_CACHE_TTL", "60")),
+        "max_symbols": int(os.getenv("QUOTES_MAX_SYMBOLS", "300"))
+    }
+
+def get_http_cache_config():
+    """Get Cache-Control settings for conditional GET endpoints"""
+    return {
+        "analysis_max_age": int(os.getenv("ANALYSIS_CACHE_MAX_AGE", "60")),
+        "info_max_age": int(os.getenv("INFO_CACHE_MAX_AGE", "300")),
+        "stale_while_revalidate": int(os.getenv("HTTP_STALE_WHILE_REVALIDATE", "300")),
+        # Rendered analyses kept per data snapshot
+        "analysis_ttl": int(os.getenv("ANALYSIS_RESPONSE_TTL", "3600"))
+    }
+
+def get_batch_analysis_config():
+    """Get streaming batch analysis configuration"""
+    return {
+        "max_symbols": int(os.getenv("BATCH_MAX_SYMBOLS", "100")),
+        "concurrency": max(1, int(os.getenv("BATCH_CONCURRENCY", "8")))
+    }
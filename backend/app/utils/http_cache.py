@@ -0,0 +1,68 @@
+"""
+HTTP caching helpers: ETags, If-None-Match and Cache-Control
+"""
+
+import hashlib
+import json
+from typing import Optional
+
+import numpy as np
+
+def fingerprint(value) -> str:
+    """
+    Short stable digest of a value
+
+    numpy arrays are hashed from their raw bytes; everything else from its
+    canonical JSON form (sorted keys), so equal data always gives equal tags.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    if isinstance(value, np.ndarray):
+        digest.update(str(value.dtype).encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    else:
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+def make_etag(parts: dict) -> str:
+    """
+    Weak ETag over named version parts
+
+    Weak because equal tags mean semantically equal responses, not identical
+    bytes (timestamps and LLM wording may differ).
+
+    Args:
+        parts: Version components, e.g. {"prices": ..., "news": ...}
+
+    Returns:
+        ETag header value such as W/"3f2a..."
+    """
+    return f'W/"{fingerprint(parts)}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def cache_control(max_age: int, stale_while_revalidate: int = 0, public: bool = True) -> str:
+    """Build a Cache-Control value (no-cache when max_age is 0)"""
+    if max_age <= 0:
+        return "no-cache"
+    value = f"{'public' if public else 'private'}, max-age={max_age}"
+    if stale_while_revalidate > 0:
+        value += f", stale-while-revalidate={stale_while_revalidate}"
+    return value
+
+def caching_headers(etag: str, max_age: int, stale_while_revalidate: int = 0) -> dict:
+    """ETag and Cache-Control headers for a cacheable response"""
+    return {"ETag": etag, "Cache-Control": cache_control(max_age, stale_while_revalidate)}
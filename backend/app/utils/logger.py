@@ -2,31 +2,140 @@
 Logging configuration using Loguru
 """
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from loguru import logger
 import sys
+import time
+
+from app.utils.config import get_logging_config
+
+# Set inside batch/screening runs to drop per-symbol logs before any formatting
+_quiet_symbol_logs = ContextVar("quiet_symbol_logs", default=False)
+
+# Populated by setup_logger
+_state = {"module_levels": {}, "sink_levels": [], "hot_rate_limit": 0.0}
+
+# (module, level) -> whether any sink would accept the record
+_enabled_cache = {}
+
+# message template -> [window start, count in window, suppressed since last emit]
+_hot_windows = {}
 
 def setup_logger():
     """Configure logger with file and console output"""
+    config = get_logging_config()
     logger.remove()  # Remove default handler
-    
+
+    module_levels = config["module_levels"]
+    serialize = config["format"] == "json"
+
+    def sink_options(level: str) -> dict:
+        # Module overrides may be more or less verbose than the sink default
+        lowest = min([logger.level(level).no] + [logger.level(l).no for l in module_levels.values()])
+        return {
+            "level": lowest,
+            "filter": {"": level, **module_levels},
+            "serialize": serialize,
+            "enqueue": config["enqueue"]
+        }
+
     # Console output
     logger.add(
         sys.stdout,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan> - <level>{message}</level>",
-        level="INFO"
+        **sink_options(config["console_level"])
     )
-    
+
     # File output
     logger.add(
-        "logs/app.log",
+        config["file_path"],
         rotation="500 MB",
         retention="10 days",
         format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function} - {message}",
-        level="DEBUG"
+        **sink_options(config["file_level"])
     )
-    
+
+    _state["module_levels"] = module_levels
+    _state["sink_levels"] = [config["console_level"], config["file_level"]]
+    _state["hot_rate_limit"] = config["hot_rate_limit"]
+    _enabled_cache.clear()
+
     return logger
 
 def get_logger():
     """Get configured logger instance"""
     return logger
+
+def _is_enabled(module: str, level: str) -> bool:
+    """Whether a record from module at level would reach any sink"""
+    key = (module, level)
+    enabled = _enabled_cache.get(key)
+
+    if enabled is None:
+        if not _state["sink_levels"]:
+            enabled = True
+        else:
+            # Same resolution as loguru's dict filter: the most specific parent module wins
+            override = None
+            for prefix, prefix_level in _state["module_levels"].items():
+                if module == prefix or module.startswith(prefix + "."):
+                    if override is None or len(prefix) > len(override[0]):
+                        override = (prefix, prefix_level)
+
+            level_no = logger.level(level).no
+            thresholds = [override[1] if override else sink_level for sink_level in _state["sink_levels"]]
+            enabled = any(level_no >= logger.level(threshold).no for threshold in thresholds)
+
+        _enabled_cache[key] = enabled
+
+    return enabled
+
+def log_hot(level: str, message: str, *args):
+    """
+    Log from a per-symbol hot path
+
+    The message is formatted lazily from args, and only if some sink accepts
+    it. Each message template is rate limited to LOG_HOT_RATE_LIMIT records
+    per second (counts are approximate under threads). Inside
+    quiet_symbol_logs() the call is a no-op.
+
+    Args:
+        level: Loguru level name
+        message: Template with {} placeholders
+        args: Values for the placeholders
+    """
+    if _quiet_symbol_logs.get():
+        return
+
+    module = sys._getframe(1).f_globals.get("__name__", "")
+    if not _is_enabled(module, level):
+        return
+
+    suppressed = 0
+    limit = _state["hot_rate_limit"]
+    if limit > 0:
+        now = time.monotonic()
+        window = _hot_windows.get(message)
+        if window is None or now - window[0] >= 1.0:
+            suppressed = window[2] if window else 0
+            window = [now, 0, 0]
+            _hot_windows[message] = window
+        if window[1] >= limit:
+            window[2] += 1
+            return
+        window[1] += 1
+
+    if suppressed:
+        logger.opt(depth=1).bind(suppressed=suppressed).log(level, message + " (+{} similar suppressed)", *args, suppressed)
+    else:
+        logger.opt(depth=1).log(level, message, *args)
+
+@contextmanager
+def quiet_symbol_logs():
+    """Suppress log_hot records in this context (batch and screening runs)"""
+    token = _quiet_symbol_logs.set(True)
+    try:
+        yield
+    finally:
+        _quiet_symbol_logs.reset(token)
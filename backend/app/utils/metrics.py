@@ -0,0 +1,153 @@
+"""
+Minimal in-process metrics registry with Prometheus text exposition
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# name -> {"type", "help", "labels", "buckets", "values": {label tuple -> value}}
+_metrics = {}
+_lock = threading.Lock()
+
+def register_metric(name: str, metric_type: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+    """
+    Declare a metric (idempotent)
+
+    Args:
+        name: Prometheus metric name
+        metric_type: counter, gauge or histogram
+        help_text: HELP line
+        labels: Label names, in order
+        buckets: Histogram upper bounds in seconds
+    """
+    with _lock:
+        if name not in _metrics:
+            _metrics[name] = {
+                "type": metric_type,
+                "help": help_text,
+                "labels": tuple(labels),
+                "buckets": tuple(buckets),
+                "values": {}
+            }
+
+def _label_key(metric: dict, labels: dict) -> tuple:
+    labels = labels or {}
+    return tuple(str(labels.get(name, "")) for name in metric["labels"])
+
+def inc_counter(name: str, labels: dict = None, value: float = 1.0):
+    """Increment a counter (or gauge) by value"""
+    metric = _metrics[name]
+    key = _label_key(metric, labels)
+    with _lock:
+        metric["values"][key] = metric["values"].get(key, 0.0) + value
+
+def set_gauge(name: str, value: float, labels: dict = None):
+    """Set a gauge to value"""
+    metric = _metrics[name]
+    with _lock:
+        metric["values"][_label_key(metric, labels)] = float(value)
+
+def observe_histogram(name: str, value: float, labels: dict = None):
+    """Record one histogram observation"""
+    metric = _metrics[name]
+    key = _label_key(metric, labels)
+    with _lock:
+        series = metric["values"].get(key)
+        if series is None:
+            series = {"buckets": [0] * len(metric["buckets"]), "sum": 0.0, "count": 0}
+            metric["values"][key] = series
+        index = bisect.bisect_left(metric["buckets"], value)
+        if index < len(series["buckets"]):
+            series["buckets"][index] += 1
+        series["sum"] += value
+        series["count"] += 1
+
+@contextmanager
+def time_stage(stage: str):
+    """
+    Time a pipeline stage into risk_stage_duration_seconds
+
+    Stages: data_fetch, symbol_data, market_metrics, financial_metrics,
+    news_retrieval, llm_verification, explanation, factor_model_fit and
+    serialization (encoding a response body).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_histogram("risk_stage_duration_seconds", time.perf_counter() - start, {"stage": stage})
+
+def record_cache_lookup(namespace: str, hit: bool):
+    """Count a cache hit or miss for a namespace"""
+    inc_counter("cache_requests_total", {"namespace": namespace, "result": "hit" if hit else "miss"})
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: tuple, values: tuple, extra: tuple = ()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in extra]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+def render_metrics() -> str:
+    """Render every registered metric in Prometheus text format 0.0.4"""
+    lines = []
+
+    with _lock:
+        for name, metric in sorted(_metrics.items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+
+            for key, value in sorted(metric["values"].items()):
+                if metric["type"] != "histogram":
+                    lines.append(f"{name}{_format_labels(metric['labels'], key)} {_format_value(value)}")
+                    continue
+
+                cumulative = 0
+                for bound, count in zip(metric["buckets"], value["buckets"]):
+                    cumulative += count
+                    labels = _format_labels(metric["labels"], key, (("le", _format_value(bound)),))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = _format_labels(metric["labels"], key, (("le", "+Inf"),))
+                lines.append(f"{name}_bucket{labels} {value['count']}")
+                lines.append(f"{name}_sum{_format_labels(metric['labels'], key)} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{_format_labels(metric['labels'], key)} {value['count']}")
+
+    return "\n".join(lines) + "\n"
+
+# Core metrics
+register_metric("risk_stage_duration_seconds", "histogram",
+                "Duration of analysis pipeline stages", ("stage",))
+register_metric("cache_requests_total", "counter",
+                "Cache lookups by namespace and result", ("namespace", "result"))
+register_metric("upstream_requests_total", "counter",
+                "Upstream data provider calls by outcome", ("provider", "capability", "outcome"))
+register_metric("upstream_request_duration_seconds", "histogram",
+                "Upstream data provider call latency", ("provider", "capability"))
+register_metric("upstream_fallback_total", "counter",
+                "Requests served by a fallback instead of a live provider", ("capability", "fallback"))
+register_metric("upstream_circuit_open", "gauge",
+                "1 if the provider circuit breaker is open", ("provider",))
+register_metric("llm_requests_total", "counter",
+                "LLM gateway calls by model and outcome", ("model", "outcome"))
+register_metric("llm_tokens_total", "counter",
+                "LLM tokens consumed by model and kind", ("model", "kind"))
+register_metric("llm_request_duration_seconds", "histogram",
+                "LLM gateway call latency including retries", ("model",))
+register_metric("http_requests_in_flight", "gauge",
+                "HTTP requests currently being handled", ("handler",))
+register_metric("http_requests_total", "counter",
+                "HTTP requests by handler and status", ("method", "handler", "status"))
+register_metric("http_request_duration_seconds", "histogram",
+                "HTTP request latency until response headers", ("method", "handler"))
+register_metric("jobs_finished_total", "counter",
+                "Background jobs by type and final status", ("type", "status"))
@@ -0,0 +1,223 @@
+"""
+Sampling profiler for individual requests, written as speedscope JSON
+
+Open the files at https://www.speedscope.app. Profiles are process-wide:
+each thread that was running during the request becomes its own profile, so
+work handed to the threadpool shows up next to the event loop, but so does
+whatever concurrent requests were doing at the time. Profile under low
+concurrency, or read the request's own frames from the stacks.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger()
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+_UNSAFE_CHARACTERS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# Profile IDs handed out but not saved yet (guarded by _pending_lock)
+_pending = set()
+_pending_lock = threading.Lock()
+
+def is_valid_request_id(request_id: str) -> bool:
+    """Request IDs double as file names, so only allow a safe charset"""
+    return bool(request_id) and bool(_REQUEST_ID_PATTERN.match(request_id)) and ".." not in request_id
+
+def sanitize_request_id(request_id: str) -> str:
+    """
+    Safe file-name form of a client request ID
+
+    Runs of other characters become "_", leading dots are dropped and the
+    result is cut to 64 characters. Empty when nothing usable is left.
+    """
+    cleaned = _UNSAFE_CHARACTERS.sub("_", request_id or "").replace("..", "_").lstrip(".")
+    return cleaned[:64] if is_valid_request_id(cleaned[:64]) else ""
+
+def reserve_profile_id(directory: str, request_id: str) -> str:
+    """
+    Profile ID for a request that no saved or in-flight profile uses yet
+
+    A taken ID gets a numeric suffix (<id>-2, <id>-3, ...) so an earlier
+    profile is never overwritten. Release it with save_profile or
+    release_profile_id.
+    """
+    base = request_id[:58]
+    with _pending_lock:
+        candidate, attempt = request_id, 1
+        while candidate in _pending or os.path.exists(os.path.join(directory, f"{candidate}.speedscope.json")):
+            attempt += 1
+            candidate = f"{base}-{attempt}"
+        _pending.add(candidate)
+    return candidate
+
+def release_profile_id(profile_id: str):
+    """Forget a reserved profile ID"""
+    with _pending_lock:
+        _pending.discard(profile_id)
+
+def start_sampler(interval_ms: float) -> dict:
+    """
+    Start sampling every thread's stack in the background
+
+    Python cannot tell which request a thread is working for, so the
+    samples cover the whole process (see build_speedscope).
+
+    Args:
+        interval_ms: Sampling interval in milliseconds
+
+    Returns:
+        Session dict to pass to stop_sampler
+    """
+    session = {
+        "interval": interval_ms / 1000.0,
+        "stop": threading.Event(),
+        # thread ident -> list of stacks (root first), one per sample
+        "samples": {},
+        "started_at": time.perf_counter(),
+        "ended_at": None
+    }
+
+    def _run():
+        own_ident = threading.get_ident()
+        while not session["stop"].wait(session["interval"]):
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+                    frame = frame.f_back
+                stack.reverse()
+                session["samples"].setdefault(ident, []).append(tuple(stack))
+
+    session["thread"] = threading.Thread(target=_run, name="request-profiler", daemon=True)
+    session["thread"].start()
+    return session
+
+def stop_sampler(session: dict):
+    """Stop a sampler started with start_sampler"""
+    session["stop"].set()
+    session["thread"].join()
+    session["ended_at"] = time.perf_counter()
+
+def build_speedscope(session: dict, name: str) -> dict:
+    """
+    Convert collected samples to the speedscope file format
+
+    The document name is marked "process-wide" since threads serving other
+    requests are sampled too.
+
+    Args:
+        session: Stopped sampler session
+        name: Profile name shown in speedscope
+
+    Returns:
+        Speedscope document
+    """
+    frames = []
+    frame_index = {}
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+    interval_ms = session["interval"] * 1000.0
+    duration_ms = ((session["ended_at"] or time.perf_counter()) - session["started_at"]) * 1000.0
+
+    profiles = []
+    for ident, stacks in session["samples"].items():
+        samples = []
+        for stack in stacks:
+            indexes = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indexes.append(frame_index[frame])
+            samples.append(indexes)
+
+        profiles.append({
+            "type": "sampled",
+            "name": thread_names.get(ident, f"thread-{ident}"),
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": max(duration_ms, len(samples) * interval_ms),
+            "samples": samples,
+            "weights": [interval_ms] * len(samples)
+        })
+
+    # Busiest thread first, that is what speedscope opens
+    profiles.sort(key=lambda profile: len(profile["samples"]), reverse=True)
+
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": f"{name} [process-wide]",
+        "activeProfileIndex": 0,
+        "exporter": "ai-stock-risk-platform",
+        "shared": {"frames": frames},
+        "profiles": profiles
+    }
+
+def save_profile(directory: str, request_id: str, document: dict, max_files: int) -> str:
+    """
+    Write a speedscope document as <request_id>.speedscope.json
+
+    The ID should come from reserve_profile_id; an existing file is never
+    overwritten. The oldest profiles are removed once the directory holds
+    more than max_files.
+
+    Returns:
+        Path of the written file
+
+    Raises:
+        OSError: When the file cannot be written or already exists
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{request_id}.speedscope.json")
+        with open(path, "x") as f:
+            json.dump(document, f)
+    finally:
+        release_profile_id(request_id)
+
+    profiles = list_profiles(directory)
+    for stale in profiles[max_files:]:
+        try:
+            os.remove(os.path.join(directory, f"{stale['request_id']}.speedscope.json"))
+        except OSError as e:
+            logger.warning(f"Could not remove old profile {stale['request_id']}: {e}")
+
+    return path
+
+def list_profiles(directory: str) -> list:
+    """List saved profiles, newest first"""
+    if not os.path.isdir(directory):
+        return []
+
+    profiles = []
+    for entry in os.scandir(directory):
+        if not entry.name.endswith(".speedscope.json"):
+            continue
+        stat = entry.stat()
+        profiles.append({
+            "request_id": entry.name[:-len(".speedscope.json")],
+            "size_bytes": stat.st_size,
+            "created_at": stat.st_mtime
+        })
+
+    profiles.sort(key=lambda profile: profile["created_at"], reverse=True)
+    return profiles
+
+def get_profile_path(directory: str, request_id: str) -> Optional[str]:
+    """Path of the profile for a request ID, or None if there is none"""
+    if not is_valid_request_id(request_id):
+        return None
+    path = os.path.join(directory, f"{request_id}.speedscope.json")
+    return path if os.path.isfile(path) else None
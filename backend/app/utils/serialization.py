@@ -0,0 +1,249 @@
+"""
+Response encodings for large numeric payloads (correlation matrices)
+
+JSON goes through orjson when it is installed. MessagePack and Arrow IPC are
+optional dependencies, imported on first use.
+"""
+
+import base64
+import json
+import math
+from typing import Optional
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream"
+}
+
+# Accept header media type -> format
+_ACCEPT_FORMATS = {
+    "application/json": "json",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/*": "json",
+    "*/*": "json"
+}
+
+MATRIX_MODES = ("full", "triangle", "summary")
+
+def negotiate_format(accept: Optional[str]) -> Optional[str]:
+    """
+    Pick a response format from an Accept header
+
+    Args:
+        accept: Accept header value (missing means JSON)
+
+    Returns:
+        "json", "msgpack" or "arrow", or None if nothing acceptable is offered
+    """
+    if not accept:
+        return "json"
+
+    best = None
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        fmt = _ACCEPT_FORMATS.get(media_type.lower())
+        if fmt and quality > 0:
+            # Highest quality wins, earlier entries break ties
+            rank = (quality, -position)
+            if best is None or rank > best[0]:
+                best = (rank, fmt)
+
+    return best[1] if best else None
+
+def dumps_json(obj) -> bytes:
+    """
+    Serialize to JSON bytes, with numpy arrays and scalars supported
+
+    NaN and infinities are written as null by both orjson and the json
+    fallback, so the output never contains bare NaN tokens.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_json_safe(obj), allow_nan=False, separators=(",", ":")).encode()
+
+def _json_safe(value):
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return _json_safe(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+def encode_upper_triangle(matrix: np.ndarray) -> bytes:
+    """Upper triangle (diagonal included), row-major, as little-endian float32"""
+    rows, cols = np.triu_indices(matrix.shape[0])
+    return matrix[rows, cols].astype("<f4").tobytes()
+
+def decode_upper_triangle(data: bytes, size: int) -> np.ndarray:
+    """
+    Rebuild a symmetric matrix from encode_upper_triangle output
+
+    Args:
+        data: Raw float32 bytes (base64-decode JSON payloads first)
+        size: Matrix dimension
+
+    Returns:
+        size x size float64 array
+    """
+    values = np.frombuffer(data, dtype="<f4").astype(float)
+    matrix = np.zeros((size, size))
+    matrix[np.triu_indices(size)] = values
+    return matrix + np.triu(matrix, 1).T
+
+def summarize_matrix(matrix: np.ndarray, labels: list, top_n: int = 5) -> dict:
+    """
+    Summary statistics of the off-diagonal entries of a correlation matrix
+
+    Args:
+        matrix: Square correlation matrix
+        labels: Row/column labels (symbols)
+        top_n: Number of most correlated pairs to list
+
+    Returns:
+        Dictionary with mean/median/min/max pairwise correlation and top pairs
+    """
+    n = matrix.shape[0]
+    rows, cols = np.triu_indices(n, 1)
+    values = matrix[rows, cols]
+    finite = np.isfinite(values)
+    if not finite.any():
+        return {"pairs": 0, "mean": None, "median": None, "min": None, "max": None, "top_pairs": []}
+
+    values, rows, cols = values[finite], rows[finite], cols[finite]
+    k = min(top_n, len(values))
+    top = np.argpartition(-values, k - 1)[:k]
+    top = top[np.argsort(-values[top])]
+
+    return {
+        "pairs": int(len(values)),
+        "mean": float(values.mean()),
+        "median": float(np.median(values)),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "top_pairs": [
+            {"symbols": [labels[rows[i]], labels[cols[i]]], "correlation": float(values[i])}
+            for i in top
+        ]
+    }
+
+def _matrix_payload(matrix: np.ndarray, labels: list, mode: str, binary: bool):
+    """Matrix field for JSON/MessagePack bodies in the requested mode"""
+    if mode == "full":
+        return matrix
+    data = encode_upper_triangle(matrix)
+    return {
+        "encoding": "upper_triangle",
+        "dtype": "float32",
+        "byte_order": "little",
+        "size": int(matrix.shape[0]),
+        "labels": labels,
+        "data": data if binary else base64.b64encode(data).decode("ascii")
+    }
+
+def _numpy_to_builtin(value):
+    if isinstance(value, dict):
+        return {k: _numpy_to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_numpy_to_builtin(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def encode_matrix_response(body: dict, path: tuple, matrix: np.ndarray, labels: list,
+                           fmt: str, mode: str) -> bytes:
+    """
+    Encode a response body that carries a large matrix
+
+    Args:
+        body: Response body without the matrix
+        path: Keys of the dict inside body that receives the matrix, plus the
+            matrix field name, e.g. ("metrics", "portfolio_risk", "correlation_matrix")
+        matrix: Square matrix
+        labels: Row/column labels
+        fmt: "json", "msgpack" or "arrow"
+        mode: "full", "triangle" or "summary" (matrix omitted)
+
+    Returns:
+        Encoded bytes
+
+    Raises:
+        ImportError: msgpack or pyarrow is not installed
+    """
+    if fmt == "arrow":
+        return _encode_arrow(body, matrix, labels, mode)
+
+    if mode != "summary":
+        *parents, field = path
+        target = body
+        for key in parents:
+            target = target[key]
+        target[field] = _matrix_payload(matrix, labels, mode, binary=(fmt == "msgpack"))
+
+    if fmt == "msgpack":
+        try:
+            import msgpack
+        except ImportError:
+            raise ImportError("MessagePack responses need the msgpack package") from None
+        return msgpack.packb(_numpy_to_builtin(body), use_bin_type=True)
+
+    return dumps_json(body)
+
+def _encode_arrow(body: dict, matrix: np.ndarray, labels: list, mode: str) -> bytes:
+    """
+    Arrow IPC stream: the matrix is the table, the rest of the body is schema metadata
+
+    Full mode has one float32 column per label. Triangle mode has a single
+    "upper_triangle" column in the same order as encode_upper_triangle.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("Arrow responses need the pyarrow package") from None
+
+    if mode == "full":
+        # Built from a list, not a dict, so a repeated label still keeps its own column
+        names = list(labels)
+        arrays = [pa.array(matrix[:, i].astype("float32")) for i in range(len(names))]
+    elif mode == "triangle":
+        names = ["upper_triangle"]
+        arrays = [pa.array(np.frombuffer(encode_upper_triangle(matrix), dtype="<f4"))]
+    else:
+        names, arrays = [], []
+
+    metadata = {
+        "encoding": "full" if mode == "full" else "upper_triangle" if mode == "triangle" else "none",
+        "size": str(matrix.shape[0]),
+        "labels": dumps_json(labels),
+        "response": dumps_json(body)
+    }
+    table = pa.Table.from_arrays(arrays, names=names).replace_schema_metadata(metadata)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -7,17 +7,14 @@ const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api'
 
 /**
  * Analyze risk for a single stock
+ * Uses the cacheable GET endpoint so the browser revalidates with ETags
  * @param {string} symbol - Stock ticker symbol
  * @returns {Promise<object>} Risk analysis result
  */
 export const analyzeStock = async (symbol) => {
-    const response = await fetch(`${API_BASE_URL}/analyze/stock`, {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ symbol }),
-    });
+    const response = await fetch(
+        `${API_BASE_URL}/analyze/stock/${encodeURIComponent(symbol.trim().toUpperCase())}`
+    );
 
     if (!response.ok) {
         throw new Error(`Failed to analyze stock: ${response.statusText}`);